@@ -0,0 +1,119 @@
+import copy
+import importlib
+import random
+from abc import ABC, abstractmethod
+
+# Результат партии: индекс победителя (0 - ходит первым, 1 - вторым) или ничья
+DRAW = -1
+
+# Модули с адаптерами, регистрирующими себя через register_engine
+ENGINE_MODULES = [
+    "games.chess.engine",
+    "games.checkers.engine",
+    "games.tic_tac_toe.engine",
+    "games.battleship.engine",
+]
+
+ENGINES = {}  # {game_id: класс движка}
+
+
+def register_engine(cls):
+    ENGINES[cls.game_id] = cls
+    return cls
+
+
+def load_engines():
+    """Импортирует все адаптеры (без Qt) и возвращает {game_id: класс}"""
+    for module in ENGINE_MODULES:
+        importlib.import_module(module)
+    return ENGINES
+
+
+class GameEngine(ABC):
+    """
+    Общий безголовый интерфейс правил для ботов, бенчмарков и сервера.
+
+    Ход - неизменяемое значение (кортеж), которое возвращает legal_moves.
+    undo откатывает последний apply. Откат через снимок состояния уже
+    сделан в SnapshotEngine, адаптер с более дешевым откатом реализует
+    apply / undo сам. seed задает генератор случайных чисел движка
+    (например, расстановку флота), чтобы партии воспроизводились.
+    """
+    game_id = None
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self._history = []
+
+    @classmethod
+    def from_logic(cls, logic, seed=None):
+        """Движок над копией логики из UI (для ботов)"""
+        engine = cls(seed=seed)
+        engine.logic = copy.deepcopy(logic)
+        return engine
+
+    # --- Обязательно для адаптера ---
+    @abstractmethod
+    def legal_moves(self):
+        pass
+
+    @abstractmethod
+    def apply(self, move):
+        """Делает ход; False, если он нелегален (позиция не меняется)"""
+
+    @abstractmethod
+    def undo(self):
+        """Откатывает последний apply; False, если откатывать нечего"""
+
+    @abstractmethod
+    def current_player(self):
+        pass
+
+    @abstractmethod
+    def is_terminal(self):
+        pass
+
+    @abstractmethod
+    def result(self):
+        """Индекс победителя, DRAW или None, пока партия идет"""
+
+    # --- Общая часть ---
+    def evaluate(self):
+        """Оценка незаконченной позиции для игрока 0 (от 0.0 до 1.0)"""
+        return 0.5
+
+    def serialize(self):
+        """Компактный снимок позиции (to_bytes логики)"""
+        return self.logic.to_bytes()
+
+    def hash(self):
+        return hash(self.serialize())
+
+
+class SnapshotEngine(GameEngine):
+    """Движок с откатом через снимок: перед каждым ходом состояние логики кладется в историю"""
+
+    @abstractmethod
+    def _play(self, move):
+        """Применяет ход к логике, возвращает True если ход легален"""
+
+    @abstractmethod
+    def _snapshot(self):
+        pass
+
+    @abstractmethod
+    def _restore(self, state):
+        pass
+
+    def apply(self, move):
+        self._history.append(self._snapshot())
+        if not self._play(move):
+            self._restore(self._history.pop())
+            return False
+        return True
+
+    def undo(self):
+        if not self._history:
+            return False
+        self._restore(self._history.pop())
+        return True
@@ -0,0 +1,60 @@
+"""
+Часы партии на клиенте: оценка сдвига до часов сервера и остаток времени.
+
+Клиент шлет {"type": "clock_sync", "t0": свое время}, сервер отвечает тем
+же t0 и своим временем ts. Сдвиг = ts - (t0 + t1) / 2, где t1 - время
+получения ответа; из нескольких замеров берется тот, у которого меньше
+всего задержка (RTT), - у него меньше и ошибка сдвига.
+"""
+import time
+
+
+class ClockSync:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.offset = None  # Время сервера минус наше
+        self.rtt = None
+
+        self.state = None  # Последнее сообщение "clock" от сервера
+        self.received = 0.0
+
+    def request(self):
+        return {"type": "clock_sync", "t0": self.clock()}
+
+    def on_reply(self, data):
+        t0, ts = data.get("t0"), data.get("ts")
+        if not isinstance(t0, (int, float)) or not isinstance(ts, (int, float)):
+            return
+        t1 = self.clock()
+        rtt = t1 - t0
+        if self.rtt is None or rtt <= self.rtt:
+            self.rtt = rtt
+            self.offset = ts - (t0 + t1) / 2
+
+    def on_clock(self, data):
+        self.state = data
+        self.received = self.clock()
+
+    def server_now(self):
+        return self.clock() + (self.offset or 0.0)
+
+    def left(self, color):
+        """Остаток времени color с учетом того, сколько прошло с отправки сообщения сервером"""
+        state = self.state
+        if not state or state.get(color) is None:
+            return None
+        value = state[color]
+        if state.get("turn") == color:
+            # Без замера сдвига считаем от момента получения (ошибка - половина RTT)
+            if self.offset is not None and isinstance(state.get("ts"), (int, float)):
+                value -= self.server_now() - state["ts"]
+            else:
+                value -= self.clock() - self.received
+        return max(0.0, value)
+
+
+def format_clock(seconds):
+    if seconds is None:
+        return "∞"
+    seconds = int(seconds + 0.999)  # Округляем вверх: 0:00 - только когда время вышло
+    return f"{seconds // 60}:{seconds % 60:02d}"
@@ -0,0 +1,65 @@
+"""
+Трассировка задержки хода: от клика у ходившего до отрисовки у соперника.
+
+Ход с трассировкой несет поле tr - id и метки времени участков пути. Все
+метки в часах сервера (его time.monotonic): клиент переводит свои через
+сдвиг, который NetworkClient оценивает по пингу (server_offset).
+
+    ci  ввод у ходившего (последнее нажатие или отпускание мыши)
+    cs  ходивший отдает ход в сеть (send_json)
+    sr  сервер принял
+    ss  сервер отправляет сопернику
+    pr  соперник принял (поток сети, сразу после разбора)
+    pd  окно соперника начало обработку (очередь Qt позади)
+    pp  ход отрисован у соперника
+
+Соперник дописывает трассу строкой JSON в latency.jsonl рядом с
+настройками; tools/trace_summary.py сводит перцентили по участкам.
+"""
+import json
+import os
+import time
+import uuid
+
+from PyQt6.QtCore import QObject, QEvent
+
+from core.settings import SettingsManager
+
+HOPS = ["ci", "cs", "sr", "ss", "pr", "pd", "pp"]
+INPUT_WINDOW = 2.0  # Нажатие старше этого (сек) к ходу уже не относится
+_INPUT_EVENTS = (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease)
+
+
+def default_path():
+    return os.path.join(os.path.dirname(os.path.abspath(SettingsManager().file_path)), "latency.jsonl")
+
+
+class LatencyTracer(QObject):
+    """Фильтр событий приложения (время ввода) и запись трасс в файл"""
+
+    def __init__(self, path=None):
+        super().__init__()
+        self.path = path or default_path()
+        self.last_input = None
+
+    def eventFilter(self, obj, event):
+        if event.type() in _INPUT_EVENTS:
+            self.last_input = time.monotonic()
+        return False
+
+    def outgoing(self, data, offset):
+        """Копия хода с tr; offset - сдвиг до часов сервера"""
+        now = time.monotonic()
+        tr = {"id": uuid.uuid4().hex[:12], "cs": now + offset}
+        if self.last_input is not None and now - self.last_input < INPUT_WINDOW:
+            tr["ci"] = self.last_input + offset
+        return {**data, "tr": tr}
+
+    def write(self, tr, game, lobby):
+        hops = {hop: tr[hop] for hop in HOPS if isinstance(tr.get(hop), (int, float))}
+        record = {"id": tr.get("id"), "game": game, "lobby": lobby, "hops": hops}
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass  # Трассировка не должна мешать игре
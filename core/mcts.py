@@ -0,0 +1,237 @@
+import math
+import multiprocessing
+import pickle
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from core.engine import DRAW
+
+# Пулы процессов для корневого параллелизма: {число воркеров: пул}
+_pools = {}
+
+
+def _get_pool(workers):
+    if workers not in _pools:
+        # spawn, а не fork: у UI есть потоки (Qt, сеть), после fork их блокировки могут так и остаться занятыми
+        _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pools[workers]
+
+
+class MCTS:
+    """
+    Поиск по дереву Монте-Карло для любого GameEngine.
+
+    Узлы хранятся не объектами, а в плоских массивах фиксированной емкости:
+    индекс узла -> родитель, первый ребенок, число детей, посещения, сумма
+    наград, кто сделал ход в узел. Дети узла лежат подряд, поэтому для
+    расширения достаточно сдвинуть счетчик свободных узлов.
+    """
+
+    def __init__(self, capacity=100000, exploration=1.4, rollout_limit=60, seed=None):
+        self.capacity = capacity
+        self.exploration = exploration
+        self.rollout_limit = rollout_limit
+        self.rng = random.Random(seed)
+
+        self.parent = array('i', [-1]) * capacity
+        self.first_child = array('i', [-1]) * capacity
+        self.child_count = array('i', [0]) * capacity
+        self.visits = array('i', [0]) * capacity
+        self.reward = array('d', [0.0]) * capacity
+        self.mover = array('b', [0]) * capacity  # Игрок, сделавший ход в узел
+        self.move = [None] * capacity
+        self.size = 0
+
+        self.playouts = 0
+        self.elapsed = 0.0
+
+    def _reset(self, engine):
+        # Массивы переиспользуются между поисками, обнуляем только занятую часть
+        for i in range(self.size):
+            self.first_child[i] = -1
+            self.child_count[i] = 0
+            self.visits[i] = 0
+            self.reward[i] = 0.0
+            self.move[i] = None
+        self.size = 1
+        self.parent[0] = -1
+        self.mover[0] = 1 - engine.current_player()
+        self.playouts = 0
+
+    def search(self, engine, iterations=None, time_limit=None):
+        """
+        Ищет ход из текущей позиции engine (состояние после поиска не меняется).
+        Останавливается по числу итераций и/или времени. Возвращает
+        {ход: посещения} для детей корня.
+        """
+        if iterations is None and time_limit is None:
+            iterations = 1000
+        self._reset(engine)
+
+        start = time.perf_counter()
+        deadline = start + time_limit if time_limit is not None else None
+        while iterations is None or self.playouts < iterations:
+            # Часы - на каждом плейауте: в шахматах он длится миллисекунды, и проверка раз в
+            # несколько плейаутов перебирает лимит. perf_counter по сравнению с ним ничего не стоит
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self._iterate(engine)
+            self.playouts += 1
+        self.elapsed = time.perf_counter() - start
+
+        first = self.first_child[0]
+        return {self.move[first + i]: self.visits[first + i] for i in range(self.child_count[0])}
+
+    @property
+    def playouts_per_sec(self):
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+    def _iterate(self, engine):
+        node, depth = 0, 0
+
+        # 1. Выбор (UCT) по уже раскрытым узлам
+        while self.child_count[node] > 0:
+            node = self._select(node)
+            engine.apply(self.move[node])
+            depth += 1
+
+        # 2. Расширение
+        if not engine.is_terminal() and self.visits[node] > 0:
+            moves = engine.legal_moves()
+            if moves and self.size + len(moves) <= self.capacity:
+                first = self.size
+                player = engine.current_player()
+                for i, move in enumerate(moves):
+                    child = first + i
+                    self.parent[child] = node
+                    self.move[child] = move
+                    self.mover[child] = player
+                self.first_child[node] = first
+                self.child_count[node] = len(moves)
+                self.size += len(moves)
+
+                node = first + self.rng.randrange(len(moves))
+                engine.apply(self.move[node])
+                depth += 1
+
+        # 3. Случайная партия до конца (или до лимита)
+        played = 0
+        while played < self.rollout_limit and not engine.is_terminal():
+            moves = engine.legal_moves()
+            if not moves:
+                break
+            engine.apply(self.rng.choice(moves))
+            played += 1
+        score = self._score(engine)
+
+        for _ in range(played + depth):
+            engine.undo()
+
+        # 4. Обратное распространение
+        while node >= 0:
+            self.visits[node] += 1
+            self.reward[node] += score if self.mover[node] == 0 else 1.0 - score
+            node = self.parent[node]
+
+    def _select(self, node):
+        first = self.first_child[node]
+        log_n = math.log(self.visits[node] + 1)
+        best, best_value = first, -1.0
+        for child in range(first, first + self.child_count[node]):
+            n = self.visits[child]
+            if n == 0:
+                return child
+            value = self.reward[child] / n + self.exploration * math.sqrt(log_n / n)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    @staticmethod
+    def _score(engine):
+        """Награда с точки зрения игрока 0"""
+        winner = engine.result()
+        if winner is None:
+            return engine.evaluate()
+        if winner == DRAW:
+            return 0.5
+        return 1.0 if winner == 0 else 0.0
+
+
+def _worker_search(engine_blob, iterations, time_limit, seed, capacity, rollout_limit):
+    engine = pickle.loads(engine_blob)
+    tree = MCTS(capacity=capacity, rollout_limit=rollout_limit, seed=seed)
+    visits = tree.search(engine, iterations, time_limit)
+    return visits, tree.playouts
+
+
+class MCTSPlayer:
+    """
+    Выбор хода через MCTS. При workers > 1 - корневой параллелизм: каждый
+    процесс строит свое дерево, посещения детей корня суммируются.
+    engine_cls нужен для choose_move (ход по логике из UI).
+    """
+
+    def __init__(self, engine_cls=None, iterations=None, time_limit=0.5, workers=1, capacity=100000,
+                 rollout_limit=60, seed=None):
+        self.engine_cls = engine_cls
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.capacity = capacity
+        self.rollout_limit = rollout_limit
+        self.rng = random.Random(seed)
+        self.tree = None
+
+        self.playouts = 0
+        self.elapsed = 0.0
+
+    @property
+    def playouts_per_sec(self):
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+    def choose(self, engine, samples=None):
+        """
+        samples - дополнительные варианты позиции для воркеров (например,
+        разные случайные расстановки скрытого флота в морском бое)
+        """
+        moves = engine.legal_moves()
+        if len(moves) <= 1:
+            return moves[0] if moves else None
+
+        start = time.perf_counter()
+        if self.workers > 1:
+            visits = self._search_parallel(samples or [engine] * self.workers)
+        else:
+            if self.tree is None:
+                self.tree = MCTS(capacity=self.capacity, rollout_limit=self.rollout_limit,
+                                 seed=self.rng.randrange(2 ** 31))
+            visits = self.tree.search(engine, self.iterations, self.time_limit)
+            self.playouts = self.tree.playouts
+        self.elapsed = time.perf_counter() - start
+
+        if not visits:
+            return self.rng.choice(moves)
+        return max(visits, key=visits.get)
+
+    def choose_move(self, logic):
+        """Ход для логики из UI: движок строится через from_logic"""
+        engines = [self.engine_cls.from_logic(logic, seed=self.rng.randrange(2 ** 31))
+                   for _ in range(max(1, self.workers))]
+        return self.choose(engines[0], engines)
+
+    def _search_parallel(self, engines):
+        iterations = None if self.iterations is None else max(1, self.iterations // self.workers)
+        futures = [
+            _get_pool(self.workers).submit(_worker_search, pickle.dumps(engine), iterations, self.time_limit,
+                                           self.rng.randrange(2 ** 31), self.capacity, self.rollout_limit)
+            for engine in engines
+        ]
+        visits, self.playouts = {}, 0
+        for future in futures:
+            child_visits, playouts = future.result()
+            self.playouts += playouts
+            for move, n in child_visits.items():
+                visits[move] = visits.get(move, 0) + n
+        return visits
@@ -0,0 +1,114 @@
+"""
+Ходы всех игр как одно целое число (поле "m" в game_move).
+
+Клетка кодируется как r * cols + c. Шахматы и шашки: биты 0-5 - откуда,
+6-11 - куда, 12-15 - фигура превращения (0 - по умолчанию ферзь).
+Крестики-нолики, гомоку и выстрел в морском бое - одна клетка.
+
+Декодирование не бросает исключений: некорректный ход дает None.
+"""
+
+# Размер поля (rows, cols) и тип хода: "pair" - откуда/куда, "cell" - одна клетка
+MOVE_FORMATS = {
+    "chess": (8, 8, "pair"),
+    "checkers": (8, 8, "pair"),
+    "tic_tac_toe": (3, 3, "cell"),
+    "gomoku": (15, 15, "cell"),
+    "battleship": (10, 10, "cell"),
+}
+
+QUEEN = 5  # Код ферзя, как в ChessLogic.to_bytes
+
+
+def encode_move(game_id, move, promo=0):
+    """move: ((r1, c1), (r2, c2)) или (r, c) -> int"""
+    rows, cols, kind = MOVE_FORMATS[game_id]
+    if kind == "pair":
+        (r1, c1), (r2, c2) = move
+        return (r1 * cols + c1) | ((r2 * cols + c2) << 6) | (promo << 12)
+    r, c = move
+    return r * cols + c
+
+
+def decode_move(game_id, value):
+    """int -> ход в формате encode_move или None"""
+    fmt = MOVE_FORMATS.get(game_id)
+    if fmt is None or type(value) is not int or value < 0:
+        return None
+    rows, cols, kind = fmt
+    cells = rows * cols
+
+    if kind == "pair":
+        if value >> 16:
+            return None
+        start, end, promo = value & 63, (value >> 6) & 63, value >> 12
+        if start >= cells or end >= cells or start == end or promo not in (0, QUEEN):
+            return None
+        return divmod(start, cols), divmod(end, cols)
+
+    if value >= cells:
+        return None
+    return divmod(value, cols)
+
+
+def _parse_cell(text, rows, cols):
+    r, sep, c = text.partition(",")
+    if not sep or not r.isdigit() or not c.isdigit():
+        return None
+    r, c = int(r), int(c)
+    if r >= rows or c >= cols:
+        return None
+    return r, c
+
+
+def parse_legacy(game_id, text):
+    """Старый строковый формат "r1,c1:r2,c2" / "r,c" -> ход или None"""
+    fmt = MOVE_FORMATS.get(game_id)
+    if fmt is None or not isinstance(text, str):
+        return None
+    rows, cols, kind = fmt
+
+    if kind == "pair":
+        start, sep, end = text.partition(":")
+        if not sep:
+            return None
+        start, end = _parse_cell(start, rows, cols), _parse_cell(end, rows, cols)
+        if start is None or end is None or start == end:
+            return None
+        return start, end
+    return _parse_cell(text, rows, cols)
+
+
+def message_move(game_id, data):
+    """Ход из сообщения game_move: новое поле "m" или старые "data" / "r", "c" (выстрел)"""
+    if not isinstance(data, dict):
+        return None
+    if "m" in data:
+        return decode_move(game_id, data["m"])
+    if "data" in data:
+        return parse_legacy(game_id, data["data"])
+
+    r, c = data.get("r"), data.get("c")
+    if game_id != "battleship" or type(r) is not int or type(c) is not int:
+        return None
+    return (r, c) if 0 <= r < 10 and 0 <= c < 10 else None
+
+
+def legacy_message(game_id, data):
+    """game_move с полем "m" в старом виде для клиента без CAP_MOVES: "data" строкой или "r", "c" выстрела"""
+    move = decode_move(game_id, data.get("m"))
+    if move is None:
+        return data
+    message = {key: value for key, value in data.items() if key != "m"}
+    if MOVE_FORMATS[game_id][2] == "pair":
+        (r1, c1), (r2, c2) = move
+        message["data"] = f"{r1},{c1}:{r2},{c2}"
+    elif game_id == "battleship":
+        message["r"], message["c"] = move
+    else:
+        message["data"] = f"{move[0]},{move[1]}"
+    return message
+
+
+def move_message(game_id, move, **extra):
+    return {"type": "game_move", "m": encode_move(game_id, move), **extra}
@@ -1,7 +1,13 @@
 import socket
-import json
+import threading
+import time
 from PyQt6.QtCore import QThread, pyqtSignal
 
+from core.wire import CAP_FRAMES, CAP_STRUCT, StreamDecoder, hello, encode_line, encode_frame
+
+# Сервер с пингом шлет его раз в несколько секунд: столько секунд тишины - соединение мертво
+SERVER_SILENCE = 25
+
 
 class NetworkClient(QThread):
     json_received = pyqtSignal(dict)
@@ -18,6 +24,20 @@ class NetworkClient(QThread):
         self.target_ip = "127.0.0.1"
         self.target_port = 5555
 
+        # Протокол: None - до login, 'pending' - ждем ответа на login
+        # (исходящие копятся в pending), затем 'json' или 'frames'
+        self.mode = None
+        self.compact = False
+        self.pending = []
+        self.send_lock = threading.Lock()
+        self.decoder = StreamDecoder()
+
+        # Трассировка задержки ходов: tracer - LatencyTracer, пока она включена;
+        # сдвиг до часов сервера (его time.monotonic минус наш) оцениваем по пингам
+        self.tracer = None
+        self.server_offset = None
+        self.offset_rtt = None
+
     # ЭТОТ МЕТОД ОБЯЗАТЕЛЕН
     def connect_to(self, ip, port):
         self.target_ip = ip
@@ -45,6 +65,10 @@ class NetworkClient(QThread):
         # Создаем НОВЫЙ сокет при каждом запуске потока
         self.client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.client.settimeout(10)  # Таймаут 10 сек, чтобы не висело вечно
+        with self.send_lock:
+            self.mode, self.compact, self.pending = None, False, []
+        self.decoder = StreamDecoder()
+        self.server_offset = self.offset_rtt = None  # У другого сервера другие часы
 
         try:
             self.client.connect((self.target_ip, self.target_port))
@@ -55,17 +79,24 @@ class NetworkClient(QThread):
 
             while self.is_running:
                 try:
-                    data = self.client.recv(4096)
+                    data = self.client.recv(65536)
                     if not data: break
 
-                    parts = data.decode('utf-8').split('\n')
-                    for part in parts:
-                        if part.strip():
-                            try:
-                                self.json_received.emit(json.loads(part))
-                            except:
-                                pass
-                except socket.error:
+                    # Сообщение может прийти частями или несколько в одном recv
+                    self.decoder.feed(data)
+                    while True:
+                        message = self.decoder.next_message()
+                        if message is None:
+                            break
+                        if self.mode == 'pending' and self._finish_handshake(message):
+                            continue
+                        mtype = message.get("type")
+                        if mtype == "ping":
+                            self._pong(message)
+                        elif mtype == "game_move" and self.tracer and isinstance(message.get("tr"), dict):
+                            self._stamp(message["tr"], "pr")
+                        self.json_received.emit(message)
+                except (socket.error, ValueError):
                     break
 
         except Exception as e:
@@ -76,11 +107,73 @@ class NetworkClient(QThread):
             self.disconnected.emit()
             if self.client: self.client.close()
 
+    def _finish_handshake(self, message):
+        """
+        Первый ответ на login: login_ok - переходим на кадры, любое другое
+        сообщение - старый сервер, остаемся на JSON. True, если сообщение
+        служебное и дальше его передавать не нужно.
+        """
+        caps = message.get("caps") or []
+        is_ok = message.get("type") == "login_ok" and CAP_FRAMES in caps
+        with self.send_lock:
+            self.mode = 'frames' if is_ok else 'json'
+            self.compact = is_ok and CAP_STRUCT in caps
+            self.decoder.framed = is_ok
+            pending, self.pending = self.pending, []
+            try:
+                for data in pending:
+                    self.client.sendall(self._encode(data))
+            except OSError:
+                self.is_running = False
+        return is_ok
+
+    def _pong(self, ping):
+        """Отвечаем из потока сети, а не из окна: занятый интерфейс не должен выглядеть обрывом"""
+        # Раз сервер пингует, молчание дольше SERVER_SILENCE - полуоткрытое соединение
+        self.client.settimeout(SERVER_SILENCE)
+        t, rtt = ping.get("t"), ping.get("rtt")
+        if isinstance(t, (int, float)) and isinstance(rtt, (int, float)):
+            # Пинг шел к нам около rtt/2; замер с меньшей задержкой точнее (как в ClockSync)
+            if self.offset_rtt is None or rtt <= self.offset_rtt:
+                self.offset_rtt = rtt
+                self.server_offset = t + rtt / 2 - time.monotonic()
+        try:
+            with self.send_lock:
+                self.client.sendall(self._encode({"type": "pong", "t": ping.get("t")}))
+        except OSError:
+            self.is_running = False
+
+    def server_time(self):
+        """Наше time.monotonic в часах сервера или None, пока сдвиг не известен"""
+        offset = self.server_offset
+        return None if offset is None else time.monotonic() + offset
+
+    def _stamp(self, tr, hop):
+        now = self.server_time()
+        if now is not None:
+            tr[hop] = now
+
+    def _encode(self, data):
+        if self.mode == 'frames':
+            return encode_frame(data, self.compact)
+        return encode_line(data)
+
     def send_json(self, data):
         if self.is_running and self.client:
+            out = data
+            tracer, offset = self.tracer, self.server_offset
+            if tracer and offset is not None and data.get("type") == "game_move":
+                out = tracer.outgoing(data, offset)
             try:
-                msg = json.dumps(data) + "\n"
-                self.client.send(msg.encode('utf-8'))
+                with self.send_lock:
+                    if self.mode is None and data.get("type") == "login":
+                        # Предлагаем серверу протокол 2; до ответа остальное копим
+                        self.client.sendall(encode_line({**data, **hello()}))
+                        self.mode = 'pending'
+                    elif self.mode == 'pending':
+                        self.pending.append(out)
+                    else:
+                        self.client.sendall(self._encode(out))
                 self.data_sent.emit(data)
             except:
                 self.is_running = False
@@ -0,0 +1,8 @@
+import os
+import sys
+
+
+def resource_path(relative_path):
+    """Путь к ресурсам внутри EXE (PyInstaller распаковывает их в sys._MEIPASS) или в папке проекта"""
+    base_path = getattr(sys, "_MEIPASS", os.path.abspath("."))
+    return os.path.join(base_path, relative_path)
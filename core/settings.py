@@ -11,7 +11,10 @@ DEFAULT_SETTINGS = {
     "mute": False,
     "window_opacity": 1.0, # Непрозрачность (1.0 = полностью видно)
     "ui_scale": 1.0,
-    "theme": "dark"
+    "theme": "dark",
+    "vs_computer": True,  # Оффлайн-игры против компьютера (где он есть)
+    "ai_strength": 1.0,  # Сила компьютера (1.0 = без ошибок)
+    "latency_trace": False  # Трассы задержки ходов в latency.jsonl (core.latency)
 }
 
 class SettingsManager:
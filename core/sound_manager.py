@@ -1,8 +1,9 @@
 import os
-import sys
 from PyQt6.QtMultimedia import QSoundEffect
 from PyQt6.QtCore import QUrl
 
+from core.resources import resource_path
+
 
 class SoundManager:
     _instance = None  # Singleton
@@ -16,15 +17,6 @@ class SoundManager:
             cls._instance.load_sounds()
         return cls._instance
 
-    def resource_path(self, relative_path):
-        """Получает путь к ресурсам внутри EXE или в папке проекта"""
-        try:
-            base_path = sys._MEIPASS
-        except Exception:
-            base_path = os.path.abspath(".")
-
-        return os.path.join(base_path, relative_path)
-
     def load_sounds(self):
         # Список звуков и путей (относительно assets/sounds/)
         sound_files = {
@@ -40,7 +32,7 @@ class SoundManager:
         }
 
         for name, filename in sound_files.items():
-            full_path = self.resource_path(os.path.join("assets", "sounds", filename))
+            full_path = resource_path(os.path.join("assets", "sounds", filename))
 
             if os.path.exists(full_path):
                 effect = QSoundEffect()
@@ -6,6 +6,8 @@ import ssl
 import shutil
 import tempfile
 
+from core.resources import resource_path
+
 
 class AutoUpdater:
     def __init__(self, current_version):
@@ -48,21 +50,13 @@ class AutoUpdater:
             print(f"Update error: {e}")
             return False
 
-    def get_resource_path(self, relative_path):
-        """Находит updater.exe внутри упакованного приложения"""
-        try:
-            base_path = sys._MEIPASS
-        except Exception:
-            base_path = os.path.abspath(".")
-        return os.path.join(base_path, relative_path)
-
     def restart_and_replace(self):
         # 1. Определяем пути
         current_exe = os.path.abspath(sys.executable)
         pid = os.getpid()
 
         # 2. Достаем updater.exe из ресурсов
-        bundled_updater = self.get_resource_path(os.path.join("assets", "updater.exe"))
+        bundled_updater = resource_path(os.path.join("assets", "updater.exe"))
         extracted_updater = os.path.join(self.temp_dir, "updater_tool.exe")
 
         try:
@@ -0,0 +1,232 @@
+"""
+Формат сообщений на проводе, общий для сервера и клиента.
+
+Версия 1 - JSON по строкам ("...\\n"). С версии 2 клиент сообщает в login
+поля "proto" и "caps"; сервер отвечает login_ok (еще строкой JSON), и
+после этого обе стороны переходят на кадры:
+
+    [длина тела: 4 байта][вид тела: 1 байт][тело]
+
+Тело - JSON (KIND_JSON) либо, для частых сообщений, компактная
+структура (ход, выстрел, результат выстрела, готовность). Компактные
+тела используются, только если обе стороны заявили CAP_STRUCT.
+
+Клиент с CAP_HEARTBEAT отвечает на ping сервера ({"t", "rtt"}) сообщением
+pong с тем же t; кто молчит несколько пингов подряд, отключается.
+
+Клиент с CAP_SHOTS в морском бою присылает флот при готовности и
+принимает результаты выстрелов от сервера (start_game с server_shots).
+
+Клиент с CAP_MOVES принимает ходы соперника числом "m" (core.moves);
+без нее сервер пересылает ход в прежнем виде: строкой "data", выстрел -
+полями "r", "c". Присылать можно любой из видов.
+"""
+import json
+import struct
+
+PROTO_VERSION = 2
+CAP_FRAMES = "frames"
+CAP_STRUCT = "struct"
+CAP_HEARTBEAT = "heartbeat"
+CAP_SHOTS = "shots"
+CAP_MOVES = "moves"
+CAPS = [CAP_FRAMES, CAP_STRUCT, CAP_HEARTBEAT, CAP_SHOTS, CAP_MOVES]
+
+HEADER = struct.Struct("!IB")
+MAX_FRAME_SIZE = 1 << 20  # Больше - ошибка протокола
+
+KIND_JSON = 0
+KIND_MOVE = 1  # {"type": "game_move", "m": int}
+KIND_SHOT = 2  # {"type": "game_move", "sub_type": "shot", "m": int}
+KIND_SHOT_RESULT = 3  # {"type": "game_move", "sub_type": "shot_result", ...}
+KIND_READY = 4  # {"type": "toggle_ready", "status": bool}
+
+U16 = struct.Struct("!H")
+SHOT_RESULT = struct.Struct("!6B")  # клетка, статус, флаги, клетка корабля, ориентация, размер
+READY = struct.Struct("!?")
+
+SHOT_STATUSES = ["miss", "hit", "kill"]
+SHOT_INCOMING, SHOT_HAS_SHIP = 1, 2
+SHOT_RESULT_KEYS = {"type", "sub_type", "r", "c", "status", "ship_data"}
+SHIP_KEYS = {"r", "c", "ori", "size"}
+
+
+def hello():
+    """Поля для login: версия протокола и возможности клиента"""
+    return {"proto": PROTO_VERSION, "caps": list(CAPS)}
+
+
+def negotiate(data):
+    """Возможности, общие с клиентом (по сообщению login); [] - остаемся на JSON"""
+    proto, caps = data.get("proto"), data.get("caps")
+    if type(proto) is not int or proto < 2 or not isinstance(caps, list) or CAP_FRAMES not in caps:
+        return []
+    return [cap for cap in CAPS if cap in caps]
+
+
+# --- JSON ПО СТРОКАМ (версия 1) ---
+
+def encode_line(data):
+    return (json.dumps(data) + "\n").encode("utf-8")
+
+
+def decode_json(raw):
+    """bytes -> dict или None (битый JSON не бросает исключений наружу)"""
+    try:
+        data = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+# --- КАДРЫ (версия 2) ---
+
+def _u8(value, limit=256):
+    return type(value) is int and 0 <= value < limit
+
+
+def _pack_shot_result(data):
+    keys = set(data)
+    incoming = "incoming" in keys
+    if incoming:
+        if data["incoming"] is not True:
+            return None
+        keys.discard("incoming")
+    r, c, ship = data.get("r"), data.get("c"), data.get("ship_data")
+    if keys != SHOT_RESULT_KEYS or not _u8(r, 10) or not _u8(c, 10) or data["status"] not in SHOT_STATUSES:
+        return None
+
+    flags = SHOT_INCOMING if incoming else 0
+    ship_cell = ori = size = 0
+    if ship is not None:
+        if not isinstance(ship, dict) or set(ship) != SHIP_KEYS or ship["ori"] not in ('h', 'v') or \
+                not _u8(ship["r"], 10) or not _u8(ship["c"], 10) or not _u8(ship["size"], 11):
+            return None
+        flags |= SHOT_HAS_SHIP
+        ship_cell, ori, size = ship["r"] * 10 + ship["c"], ship["ori"] == 'v', ship["size"]
+    return SHOT_RESULT.pack(r * 10 + c, SHOT_STATUSES.index(data["status"]), flags, ship_cell, ori, size)
+
+
+def _pack_compact(data):
+    """(вид, тело) для частых сообщений или None, если структура не подходит без потерь"""
+    ctype = data.get("type")
+    if ctype == "game_move":
+        sub_type, move = data.get("sub_type"), data.get("m")
+        if sub_type is None and len(data) == 2 and _u8(move, 1 << 16):
+            return KIND_MOVE, U16.pack(move)
+        if sub_type == "shot" and len(data) == 3 and _u8(move, 1 << 16):
+            return KIND_SHOT, U16.pack(move)
+        if sub_type == "shot_result":
+            body = _pack_shot_result(data)
+            if body is not None:
+                return KIND_SHOT_RESULT, body
+    elif ctype == "toggle_ready" and len(data) == 2 and type(data.get("status")) is bool:
+        return KIND_READY, READY.pack(data["status"])
+    return None
+
+
+def _unpack_compact(kind, body):
+    if kind in (KIND_MOVE, KIND_SHOT) and len(body) == U16.size:
+        message = {"type": "game_move", "m": U16.unpack(body)[0]}
+        if kind == KIND_SHOT:
+            message["sub_type"] = "shot"
+        return message
+
+    if kind == KIND_SHOT_RESULT and len(body) == SHOT_RESULT.size:
+        cell, status, flags, ship_cell, ori, size = SHOT_RESULT.unpack(body)
+        if status >= len(SHOT_STATUSES):
+            return None
+        message = {"type": "game_move", "sub_type": "shot_result", "r": cell // 10, "c": cell % 10,
+                   "status": SHOT_STATUSES[status], "ship_data": None}
+        if flags & SHOT_HAS_SHIP:
+            message["ship_data"] = {"r": ship_cell // 10, "c": ship_cell % 10,
+                                    "ori": 'v' if ori else 'h', "size": size}
+        if flags & SHOT_INCOMING:
+            message["incoming"] = True
+        return message
+
+    if kind == KIND_READY and len(body) == READY.size:
+        return {"type": "toggle_ready", "status": READY.unpack(body)[0]}
+    return None
+
+
+def encode_frame(data, compact=True):
+    packed = _pack_compact(data) if compact else None
+    kind, body = packed or (KIND_JSON, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+    return HEADER.pack(len(body), kind) + body
+
+
+def decode_body(kind, body):
+    """Тело кадра -> dict или None для неизвестного/битого тела"""
+    if kind == KIND_JSON:
+        return decode_json(body)
+    return _unpack_compact(kind, body)
+
+
+async def read_frame(reader, header=None):
+    """
+    Следующий кадр из asyncio.StreamReader: dict или None (битое тело).
+    Обрыв соединения - IncompleteReadError (это EOFError).
+    """
+    return decode_body(*await read_frame_raw(reader, header))
+
+
+async def read_frame_raw(reader, header=None, limit=MAX_FRAME_SIZE):
+    """
+    (kind, тело) следующего кадра без разбора тела. Кадр длиннее limit -
+    ValueError. header - bytearray: пока тело кадра не пришло, в нем лежит
+    уже прочитанный заголовок (чтобы передать соединение другому процессу).
+    """
+    raw = await reader.readexactly(HEADER.size)
+    length, kind = HEADER.unpack(raw)
+    if length > limit:
+        raise ValueError(f"frame too large: {length}")
+    if header is not None:
+        header[:] = raw
+    body = await reader.readexactly(length)
+    if header is not None:
+        del header[:]
+    return kind, body
+
+
+class StreamDecoder:
+    """
+    Разбор входящего потока для клиента на обычных сокетах: копит байты,
+    пока не придет целое сообщение (строка JSON или кадр). framed
+    переключается между сообщениями, как только пришел login_ok.
+    """
+
+    def __init__(self, max_line=MAX_FRAME_SIZE):
+        self.buffer = bytearray()
+        self.framed = False
+        self.max_line = max_line
+
+    def feed(self, data):
+        self.buffer += data
+
+    def next_message(self):
+        """Следующее целое сообщение из буфера или None, если нужно дочитать"""
+        while True:
+            if self.framed:
+                if len(self.buffer) < HEADER.size:
+                    return None
+                length, kind = HEADER.unpack_from(self.buffer)
+                if length > MAX_FRAME_SIZE:
+                    raise ValueError(f"frame too large: {length}")
+                end = HEADER.size + length
+                if len(self.buffer) < end:
+                    return None
+                message = decode_body(kind, bytes(self.buffer[HEADER.size:end]))
+                del self.buffer[:end]
+            else:
+                end = self.buffer.find(b"\n")
+                if end < 0:
+                    if len(self.buffer) > self.max_line:
+                        raise ValueError("line too long")
+                    return None
+                line = bytes(self.buffer[:end])
+                del self.buffer[:end + 1]
+                message = decode_json(line) if line.strip() else None
+
+            if message is not None:
+                return message
@@ -0,0 +1,141 @@
+import random
+
+import numpy as np
+
+BOARD_SIZE = 10
+
+# Значения клеток в enemy_view (см. BattleshipLogic.process_shot_result)
+UNKNOWN, MISS, HIT, KILLED = 0, 1, 2, 3
+
+
+class BattleshipAI:
+    """
+    Компьютерный соперник для оффлайн-режима.
+
+    Для каждой клетки считаем, сколькими способами в неё можно поставить
+    оставшиеся корабли, не противореча уже известным промахам, попаданиям
+    и убитым кораблям. Стреляем в клетку с максимальной плотностью.
+    Если на поле есть раненый корабль (режим добивания), учитываются
+    только расстановки, проходящие через попадания.
+
+    Общий MCTS (core.mcts) здесь не используется: со случайными
+    доигрываниями он топит флот в среднем за 70 выстрелов против 57
+    у плотности, и в сотни раз дольше думает.
+
+    strength: 1.0 - всегда по плотности, 0.0 - всегда наугад.
+    """
+
+    def __init__(self, fleet_config, strength=1.0, rng=None):
+        self.fleet_sizes = sorted((ship["size"] for ship in fleet_config), reverse=True)
+        self.strength = strength
+        self.rng = rng or random.Random()
+
+    def choose_shot(self, enemy_view):
+        """Возвращает (r, c) следующего выстрела"""
+        view = np.asarray(enemy_view, dtype=np.int8)
+        unknown = view == UNKNOWN
+
+        best = 0
+        if self.rng.random() < self.strength:
+            heat = self.heatmap(view)
+            heat[~unknown] = 0
+            best = heat.max()
+
+        if best <= 0:
+            # Слабый компьютер или нет ни одной согласованной расстановки - стреляем наугад
+            candidates = np.argwhere(unknown)
+        else:
+            candidates = np.argwhere(heat == best)
+
+        if len(candidates) == 0:
+            return None
+        r, c = candidates[self.rng.randrange(len(candidates))]
+        return int(r), int(c)
+
+    def heatmap(self, view):
+        """Матрица 10x10: число допустимых расстановок, покрывающих клетку"""
+        view = np.asarray(view, dtype=np.int8)
+        hits = view == HIT
+
+        # Клетки по диагонали от попадания всегда пустые (корабли не касаются)
+        hits_pad = np.pad(hits, 1)
+        diagonal = (hits_pad[:-2, :-2] | hits_pad[:-2, 2:] |
+                    hits_pad[2:, :-2] | hits_pad[2:, 2:])
+        blocked = (view == MISS) | (view == KILLED) | diagonal
+
+        target_mode = bool(hits.any())
+        sizes = self.remaining_sizes(view)
+
+        heat = self._density(blocked, hits, sizes, need_hit=target_mode)
+        if target_mode and heat.max() <= 0:
+            # Попадания противоречат модели - откатываемся в режим поиска
+            heat = self._density(blocked, hits, sizes, need_hit=False)
+        return heat
+
+    def remaining_sizes(self, view):
+        """Размеры ещё не потопленных кораблей соперника"""
+        killed = np.asarray(view) == KILLED
+        remaining = list(self.fleet_sizes)
+
+        # Начало убитого корабля - клетка без убитых соседей слева и сверху
+        left = np.zeros_like(killed)
+        left[:, 1:] = killed[:, :-1]
+        up = np.zeros_like(killed)
+        up[1:, :] = killed[:-1, :]
+
+        for r, c in np.argwhere(killed & ~left & ~up):
+            size = 1
+            while c + size < BOARD_SIZE and killed[r, c + size]:
+                size += 1
+            if size == 1:
+                while r + size < BOARD_SIZE and killed[r + size, c]:
+                    size += 1
+            if size in remaining:
+                remaining.remove(size)
+        return remaining
+
+    def _density(self, blocked, hits, sizes, need_hit):
+        heat = np.zeros((BOARD_SIZE, BOARD_SIZE), dtype=np.int32)
+        rows = self._prefix_sums(blocked, hits)
+        cols = self._prefix_sums(blocked.T, hits.T)
+        for size in set(sizes):
+            count = sizes.count(size)
+            heat += count * self._row_density(rows, size, need_hit)
+            if size > 1:
+                heat += count * self._row_density(cols, size, need_hit).T
+        return heat
+
+    @staticmethod
+    def _prefix_sums(blocked, hits):
+        """Префиксные суммы вдоль строк и интегральное изображение попаданий"""
+        blocked_cs = np.zeros((BOARD_SIZE, BOARD_SIZE + 1), dtype=np.int16)
+        np.cumsum(blocked, axis=1, out=blocked_cs[:, 1:])
+        hits_cs = np.zeros((BOARD_SIZE, BOARD_SIZE + 1), dtype=np.int16)
+        np.cumsum(hits, axis=1, out=hits_cs[:, 1:])
+
+        integral = np.zeros((BOARD_SIZE + 3, BOARD_SIZE + 3), dtype=np.int16)
+        integral[1:, 1:] = np.pad(hits, 1).cumsum(axis=0).cumsum(axis=1)
+        return blocked_cs, hits_cs, integral
+
+    @staticmethod
+    def _row_density(sums, size, need_hit):
+        """Горизонтальные расстановки корабля длины size (скользящее окно)"""
+        blocked_cs, hits_cs, integral = sums
+        n = BOARD_SIZE - size + 1
+
+        window_blocked = blocked_cs[:, size:] - blocked_cs[:, :n]
+        window_hits = hits_cs[:, size:] - hits_cs[:, :n]
+
+        # Попадания в ореоле окна (3 x size+2) означают касание другого корабля
+        halo_hits = (integral[3:, size + 2:size + 2 + n] - integral[:-3, size + 2:size + 2 + n]
+                     - integral[3:, :n] + integral[:-3, :n]) - window_hits
+
+        valid = (window_blocked == 0) & (halo_hits == 0)
+        if need_hit:
+            valid &= window_hits > 0
+
+        # Каждая допустимая позиция добавляет единицу во все клетки корабля
+        density = np.zeros((BOARD_SIZE, BOARD_SIZE), dtype=np.int32)
+        for i in range(size):
+            density[:, i:i + n] += valid
+        return density
@@ -0,0 +1,202 @@
+from core.engine import GameEngine, SnapshotEngine, register_engine
+from games.battleship.logic import BattleshipLogic
+
+# enemy_view -> отметка на доске соперника: промах, попадание, убит
+VIEW_TO_BOARD = {1: -1, 2: -2, 3: -3}
+BOARD_TO_VIEW = {-1: 1, -2: 2, -3: 3}
+
+
+def dead_ships(view):
+    """Убитые корабли на enemy_view: список (r, c, ori, size)"""
+    ships = []
+    for r in range(10):
+        for c in range(10):
+            if view[r][c] != 3:
+                continue
+            if (c > 0 and view[r][c - 1] == 3) or (r > 0 and view[r - 1][c] == 3):
+                continue  # Не начало корабля
+            size, ori = 1, 'h'
+            while c + size < 10 and view[r][c + size] == 3:
+                size += 1
+            if size == 1:
+                while r + size < 10 and view[r + size][c] == 3:
+                    size += 1
+                ori = 'v' if size > 1 else 'h'
+            ships.append((r, c, ori, size))
+    return ships
+
+
+def sample_fleet(logic, view, rng, attempts=50):
+    """
+    Случайно расставляет флот logic так, чтобы он не противоречил view
+    (enemy_view стреляющего): убитые корабли на своих местах, все
+    попадания накрыты, на промахах кораблей нет.
+    """
+    sizes = {ship["id"]: ship["size"] for ship in logic.fleet_config}
+    hits = [(r, c) for r in range(10) for c in range(10) if view[r][c] == 2]
+
+    def cells(r, c, ori, size):
+        return [(r, c + i) if ori == 'h' else (r + i, c) for i in range(size)]
+
+    def allowed(r, c, ori, size):
+        if (ori == 'h' and c + size > 10) or (ori == 'v' and r + size > 10):
+            return False
+        return all(view[cr][cc] in (0, 2) for cr, cc in cells(r, c, ori, size))
+
+    for _ in range(attempts):
+        for ship_id in list(logic.placed_ships):
+            logic.remove_ship(ship_id)
+        free = dict(sizes)
+
+        ok = True
+        for r, c, ori, size in dead_ships(view):
+            ship_id = next((sid for sid, s in free.items() if s == size), None)
+            if ship_id is None or not logic.place_ship(ship_id, r, c, ori):
+                ok = False
+                break
+            del free[ship_id]
+
+        # Сначала накрываем попадания, потом ставим остальные корабли куда угодно
+        order = sorted(free, key=lambda sid: -free[sid])
+        for target in hits:
+            if not ok:
+                break
+            if logic.my_board[target[0]][target[1]] != 0:
+                continue
+            options = []
+            for ship_id in order:
+                size = free[ship_id]
+                for ori in ('h', 'v'):
+                    for i in range(size):
+                        r = target[0] - (i if ori == 'v' else 0)
+                        c = target[1] - (i if ori == 'h' else 0)
+                        if r >= 0 and c >= 0 and allowed(r, c, ori, size) and \
+                                logic._can_place(r, c, size, ori, ignore_id=ship_id):
+                            options.append((ship_id, r, c, ori))
+            if not options:
+                ok = False
+                break
+            ship_id, r, c, ori = rng.choice(options)
+            logic.place_ship(ship_id, r, c, ori)
+            order.remove(ship_id)
+
+        for ship_id in order:
+            if not ok:
+                break
+            size = free[ship_id]
+            options = [(r, c, ori) for r in range(10) for c in range(10) for ori in ('h', 'v')
+                       if allowed(r, c, ori, size) and logic._can_place(r, c, size, ori, ignore_id=ship_id)
+                       and not any(view[cr][cc] == 2 for cr, cc in cells(r, c, ori, size))]
+            if not options:
+                ok = False
+                break
+            logic.place_ship(ship_id, *rng.choice(options))
+
+        if ok and logic.are_all_placed():
+            return True
+    return False
+
+
+@register_engine
+class BattleshipEngine(SnapshotEngine):
+    """
+    Обе стороны в одном процессе: у каждого игрока своя BattleshipLogic
+    со случайно расставленным флотом. Ход - выстрел (r, c) по сопернику.
+    """
+    game_id = "battleship"
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.sides = [BattleshipLogic(), BattleshipLogic()]
+        for side in self.sides:
+            side.place_fleet_randomly(self.rng)
+            side.phase = 'playing'
+        self.sides[0].my_turn = True
+        self.player = 0
+
+    @classmethod
+    def from_logic(cls, logic, seed=None):
+        """
+        Детерминизация для ботов: игрок 0 - logic (его ход), флот соперника
+        выбирается случайно, но согласованно с тем, что видно на enemy_view.
+        """
+        engine = cls.__new__(cls)
+        GameEngine.__init__(engine, seed)
+
+        me = BattleshipLogic()
+        me.my_board = [row[:] for row in logic.my_board]
+        me.enemy_view = [row[:] for row in logic.enemy_view]
+        me.placed_ships = dict(logic.placed_ships)
+        me.my_hits_taken, me.enemy_hits_made = logic.my_hits_taken, logic.enemy_hits_made
+        me.phase, me.my_turn = 'playing', True
+
+        enemy = BattleshipLogic()
+        if not sample_fleet(enemy, logic.enemy_view, engine.rng):
+            enemy.place_fleet_randomly(engine.rng)  # Наблюдения противоречивы - без ограничений
+        for r in range(10):
+            for c in range(10):
+                mark = VIEW_TO_BOARD.get(logic.enemy_view[r][c])
+                if mark is not None:
+                    enemy.my_board[r][c] = mark
+                enemy.enemy_view[r][c] = BOARD_TO_VIEW.get(logic.my_board[r][c], 0)
+        enemy.my_hits_taken, enemy.enemy_hits_made = logic.enemy_hits_made, logic.my_hits_taken
+        enemy.phase = 'playing'
+
+        engine.sides = [me, enemy]
+        engine.player = 0
+        return engine
+
+    def legal_moves(self):
+        shooter = self.sides[self.player]
+        if shooter.game_over:
+            return []
+        view = shooter.enemy_view
+        return [(r, c) for r in range(10) for c in range(10) if view[r][c] == 0]
+
+    def _play(self, move):
+        shooter, defender = self.sides[self.player], self.sides[1 - self.player]
+        r, c = move
+        status, ship_data = defender.receive_shot(r, c)
+        if status == "already":
+            return False
+        shooter.process_shot_result(r, c, status, ship_data)
+        if status == "miss":
+            self.player = 1 - self.player
+        return True
+
+    def current_player(self):
+        return self.player
+
+    def is_terminal(self):
+        return self.sides[0].game_over or self.sides[1].game_over
+
+    def result(self):
+        for i, side in enumerate(self.sides):
+            if side.winner == 'me':
+                return i
+        return None
+
+    def evaluate(self):
+        """Доля попаданий игрока 0 среди всех попаданий"""
+        made = self.sides[0].enemy_hits_made
+        taken = self.sides[0].my_hits_taken
+        return (made + 1) / (made + taken + 2)
+
+    def serialize(self):
+        """Чей ход + снимки обеих сторон"""
+        return bytes([self.player]) + self.sides[0].to_bytes() + self.sides[1].to_bytes()
+
+    def _snapshot(self):
+        sides = tuple(
+            (tuple(map(tuple, s.my_board)), tuple(map(tuple, s.enemy_view)),
+             s.my_hits_taken, s.enemy_hits_made, s.my_turn, s.game_over, s.winner)
+            for s in self.sides
+        )
+        return self.player, sides
+
+    def _restore(self, state):
+        self.player, sides = state
+        for s, data in zip(self.sides, sides):
+            my_board, enemy_view, s.my_hits_taken, s.enemy_hits_made, s.my_turn, s.game_over, s.winner = data
+            s.my_board = [list(row) for row in my_board]
+            s.enemy_view = [list(row) for row in enemy_view]
@@ -0,0 +1,90 @@
+from games.battleship.logic import BattleshipLogic
+
+BOARD_SIZE = 10
+
+
+def cell_bit(r, c):
+    return 1 << (r * BOARD_SIZE + c)
+
+
+class FleetMask:
+    """
+    Компактный флот для сервера: по одной 100-битной маске на корабль
+    плюс маска всех выстрелов. Используется, когда выстрелы разрешает
+    сервер, а не клиент защищающегося игрока.
+    """
+    __slots__ = ("ships", "occupied", "shots")
+
+    def __init__(self, ships):
+        self.ships = tuple(ships)
+        self.occupied = 0
+        for mask in self.ships:
+            self.occupied |= mask
+        self.shots = 0
+
+    @classmethod
+    def from_ships(cls, ships):
+        """
+        ships: список {"id", "r", "c", "ori"} (как placed_ships у клиента).
+        Возвращает None, если расстановка нарушает правила.
+        """
+        if not isinstance(ships, list):
+            return None
+
+        # Проверку правил берем из логики игры, чтобы не дублировать её
+        logic = BattleshipLogic()
+        for ship in ships:
+            if not isinstance(ship, dict):
+                return None
+            try:
+                sid, r, c = int(ship["id"]), int(ship["r"]), int(ship["c"])
+                ori = ship["ori"]
+            except (KeyError, TypeError, ValueError):
+                return None
+            if ori not in ('h', 'v') or not (0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE):
+                return None
+            if logic.is_ship_placed(sid) or not logic.place_ship(sid, r, c, ori):
+                return None
+        if not logic.are_all_placed():
+            return None
+
+        masks = []
+        for data in logic.placed_ships.values():
+            mask = 0
+            for i in range(data["size"]):
+                if data["ori"] == 'h':
+                    mask |= cell_bit(data["r"], data["c"] + i)
+                else:
+                    mask |= cell_bit(data["r"] + i, data["c"])
+            masks.append(mask)
+        return cls(masks)
+
+    @property
+    def all_sunk(self):
+        return self.occupied & ~self.shots == 0
+
+    def shoot(self, r, c):
+        """Возвращает (status, ship_data) в том же формате, что receive_shot"""
+        if not (0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE):
+            return "already", None
+
+        bit = cell_bit(r, c)
+        if self.shots & bit:
+            return "already", None
+        self.shots |= bit
+
+        if not self.occupied & bit:
+            return "miss", None
+
+        mask = next(m for m in self.ships if m & bit)
+        if mask & ~self.shots:
+            return "hit", None
+        return "kill", self._ship_data(mask)
+
+    @staticmethod
+    def _ship_data(mask):
+        first = (mask & -mask).bit_length() - 1
+        size = bin(mask).count("1")
+        ori = 'h' if size == 1 or mask & (1 << (first + 1)) else 'v'
+        r, c = divmod(first, BOARD_SIZE)
+        return {"r": r, "c": c, "ori": ori, "size": size}
@@ -1,7 +1,26 @@
-from core.sound_manager import SoundManager
+import random
+
+# Компактный снимок (to_bytes)
+PHASES = ['setup', 'wait_ready', 'wait_opp', 'playing']
+WINNER_CODES = {None: 0, 'me': 1, 'enemy': 2}
+CODE_WINNERS = {v: k for k, v in WINNER_CODES.items()}
+NO_SHIP = 0xFF
+SNAPSHOT_SIZE = 51
+
 
 class BattleshipLogic:
+    """
+    Правила морского боя без зависимостей от Qt.
+
+    О событиях игры (miss, hit, kill, game_over) логика сообщает подписчикам:
+    listener(event, info), где info - словарь с координатами "r", "c",
+    стороной "target" ('me' - стреляли по мне, 'enemy' - стрелял я)
+    и "winner" для game_over. Звуки и анимации подключает UI.
+    """
+
     def __init__(self):
+        self.listeners = []
+
         # Конфигурация флота: {id: size}
         # Используем уникальные ID для каждого корабля, чтобы перемещать их
         self.fleet_config = [
@@ -30,6 +49,87 @@ class BattleshipLogic:
         self.game_over = False
         self.winner = None
 
+    def to_bytes(self):
+        """
+        51 байт: флаги (фаза, ход, конец, победитель), позиции 10 кораблей
+        (r*10+c или 0xFF) и маска их ориентаций, 100-битная маска выстрелов
+        по моему полю и enemy_view по 2 бита на клетку. Попадания, убитые
+        корабли и счетчики восстанавливаются из этих данных.
+        """
+        data = bytearray(SNAPSHOT_SIZE)
+        data[0] = PHASES.index(self.phase) | (self.my_turn << 2) | (self.game_over << 3) | \
+            (WINNER_CODES[self.winner] << 4)
+
+        vertical = 0
+        for i, ship in enumerate(self.fleet_config):
+            placed = self.placed_ships.get(ship["id"])
+            data[1 + i] = NO_SHIP if placed is None else placed["r"] * 10 + placed["c"]
+            if placed is not None and placed["ori"] == 'v':
+                vertical |= 1 << i
+        data[11:13] = vertical.to_bytes(2, "little")
+
+        shots = 0
+        for i in range(100):
+            if self.my_board[i // 10][i % 10] < 0:
+                shots |= 1 << i
+        data[13:26] = shots.to_bytes(13, "little")
+
+        for i in range(100):
+            data[26 + (i >> 2)] |= self.enemy_view[i // 10][i % 10] << ((i & 3) * 2)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) != SNAPSHOT_SIZE or data[0] & 3 >= len(PHASES) or (data[0] >> 4) not in CODE_WINNERS:
+            raise ValueError("bad battleship snapshot")
+        logic = cls()
+        logic.phase = PHASES[data[0] & 3]
+        logic.my_turn = bool(data[0] & 4)
+        logic.game_over = bool(data[0] & 8)
+        logic.winner = CODE_WINNERS[data[0] >> 4]
+
+        vertical = int.from_bytes(data[11:13], "little")
+        for i, ship in enumerate(logic.fleet_config):
+            pos = data[1 + i]
+            if pos == NO_SHIP:
+                continue
+            ori = 'v' if vertical >> i & 1 else 'h'
+            if pos >= 100 or not logic.place_ship(ship["id"], pos // 10, pos % 10, ori):
+                raise ValueError("bad battleship snapshot")
+
+        shots = int.from_bytes(data[13:26], "little")
+        board = logic.my_board
+        for i in range(100):
+            if shots >> i & 1:
+                r, c = i // 10, i % 10
+                if board[r][c] > 0:
+                    board[r][c] = -2
+                    logic.my_hits_taken += 1
+                else:
+                    board[r][c] = -1
+        for ship_id in logic.placed_ships:
+            if logic._is_ship_dead(ship_id):
+                logic._mark_dead_ship(ship_id)
+
+        for i in range(100):
+            value = (data[26 + (i >> 2)] >> ((i & 3) * 2)) & 3
+            logic.enemy_view[i // 10][i % 10] = value
+            if value >= 2:
+                logic.enemy_hits_made += 1
+        return logic
+
+    def add_listener(self, listener):
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _emit(self, event, **info):
+        for listener in self.listeners:
+            listener(event, info)
+
     def is_ship_placed(self, ship_id):
         return ship_id in self.placed_ships
 
@@ -100,6 +200,28 @@ class BattleshipLogic:
     def are_all_placed(self):
         return len(self.placed_ships) == len(self.fleet_config)
 
+    def place_fleet_randomly(self, rng=None):
+        """Случайная расстановка всего флота (для компьютерного соперника)"""
+        rng = rng or random
+        ships = sorted(self.fleet_config, key=lambda s: s["size"], reverse=True)
+
+        for _ in range(100):
+            for ship_id in list(self.placed_ships):
+                self.remove_ship(ship_id)
+
+            for ship in ships:
+                for _ in range(200):
+                    ori = rng.choice(['h', 'v'])
+                    r, c = rng.randrange(10), rng.randrange(10)
+                    if self.place_ship(ship["id"], r, c, ori):
+                        break
+                else:
+                    break  # Тупик - начинаем заново
+
+            if self.are_all_placed():
+                return True
+        return False
+
     def receive_shot(self, r, c):
         """Обрабатывает выстрел ПРОТИВНИКА по мне"""
         cell = self.my_board[r][c]
@@ -107,7 +229,7 @@ class BattleshipLogic:
         if cell == 0:
             self.my_board[r][c] = -1  # Промах
             self.my_turn = True
-            SoundManager().play("miss")
+            self._emit("miss", r=r, c=c, target='me')
             return "miss", None
 
         elif cell > 0:
@@ -115,8 +237,6 @@ class BattleshipLogic:
             self.my_board[r][c] = -2  # Попадание
             self.my_hits_taken += 1
 
-            SoundManager().play("boom")
-
             # print(f"DEBUG: Меня ранили! Урон: {self.my_hits_taken}/{self.total_health}")
 
             # Проверяем, убит ли корабль целиком
@@ -129,10 +249,13 @@ class BattleshipLogic:
                 ship_data = self.placed_ships[ship_id]
                 status = "kill"
 
+            self._emit(status, r=r, c=c, target='me')
+
             # --- ИСПРАВЛЕНИЕ: ПРОВЕРКА ПОБЕДЫ ---
             if self.my_hits_taken >= self.total_health:
                 self.game_over = True
                 self.winner = 'enemy'  # Победил тот, кто стрелял (враг)
+                self._emit("game_over", r=r, c=c, target='me', winner=self.winner)
 
             return status, ship_data
 
@@ -143,28 +266,28 @@ class BattleshipLogic:
         if status == "miss":
             self.enemy_view[r][c] = 1
             self.my_turn = False
-            SoundManager().play("miss")
 
         elif status == "hit":
             self.enemy_view[r][c] = 2
             self.enemy_hits_made += 1
-            SoundManager().play("boom")
 
         elif status == "kill":
             self.enemy_view[r][c] = 2
             self.enemy_hits_made += 1
-            SoundManager().play("boom")
             if ship_data:
                 self._mark_enemy_dead_ship(ship_data)
 
+        if status in ["miss", "hit", "kill"]:
+            self._emit(status, r=r, c=c, target='enemy')
+
         if status in ["hit", "kill"]:
             # --- DEBUG PRINT ---
             # print(f"DEBUG: Я попал! Мой счет: {self.enemy_hits_made}/{self.total_health}")
 
             if self.enemy_hits_made >= self.total_health:
-                print("DEBUG: Я ПОБЕДИЛ!")
                 self.game_over = True
                 self.winner = 'me'
+                self._emit("game_over", r=r, c=c, target='enemy', winner=self.winner)
 
     def _is_ship_dead(self, ship_id):
         # Проверяем все клетки этого корабля
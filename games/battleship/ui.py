@@ -1,14 +1,19 @@
 from PyQt6.QtWidgets import QWidget, QLabel, QGridLayout, QVBoxLayout, QHBoxLayout, QPushButton
 from PyQt6.QtGui import QPixmap, QPainter, QPen, QColor, QFont, QBrush
-from PyQt6.QtCore import Qt, QRect, QPoint
+from PyQt6.QtCore import Qt, QRect, QPoint, QTimer
 from core.base_window import OverlayWindow
+from core.moves import message_move, move_message
+from core.sound_manager import SoundManager
+from core.settings import SettingsManager
 from games.battleship.logic import BattleshipLogic
+from games.battleship.ai import BattleshipAI
 
 
 class BattleshipGame(OverlayWindow):
     def __init__(self, is_online=False, is_host=True, network_client=None):
         super().__init__()
         self.logic = BattleshipLogic()
+        self.logic.add_listener(self.on_logic_event)
         self.resize(1000, 600)
         self.setMinimumSize(800, 500)
 
@@ -19,11 +24,21 @@ class BattleshipGame(OverlayWindow):
         self.is_first_player = is_host if is_host is not None else True
         self.opponent_ready = False
 
+        # Выстрелы разрешает сервер (флот отправляется ему при готовности)
+        self.server_resolved = False
+
         self.dragging_ship_id = None
         self.drag_orientation = 'h'
 
         self.can_restart = False
 
+        # Оффлайн против компьютера (у него своя копия логики)
+        self.ai = None
+        self.ai_logic = None
+        if not self.is_online and SettingsManager().get("vs_computer"):
+            self.ai_logic = BattleshipLogic()
+            self.ai = BattleshipAI(self.logic.fleet_config, strength=float(SettingsManager().get("ai_strength")))
+
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.layout = QVBoxLayout(self.central_widget)
@@ -49,6 +64,14 @@ class BattleshipGame(OverlayWindow):
         # if self.network:
         #     self.network.json_received.connect(self.on_network_message)
 
+    # Звуки для событий логики
+    EVENT_SOUNDS = {"miss": "miss", "hit": "boom", "kill": "boom"}
+
+    def on_logic_event(self, event, info):
+        sound = self.EVENT_SOUNDS.get(event)
+        if sound:
+            SoundManager().play(sound)
+
     # --- ГЛАВНОЕ ИСПРАВЛЕНИЕ ТУТ ---
     def _update_ui(self):
         """Вызывается из main.py при рестарте (restart_cmd)"""
@@ -201,6 +224,8 @@ class BattleshipGame(OverlayWindow):
             if self.can_restart and event.button() == Qt.MouseButton.LeftButton:
                 if self.is_online and self.network:
                     self.network.send_json({"type": "restart_game"})
+                elif self.ai:
+                    self.restart_offline()
             return
 
         # 2. ИГРА
@@ -213,11 +238,9 @@ class BattleshipGame(OverlayWindow):
 
                     if self.logic.enemy_view[row][col] == 0:
                         if self.is_online and self.network:
-                            self.network.send_json({
-                                "type": "game_move",
-                                "sub_type": "shot",
-                                "r": row, "c": col
-                            })
+                            self.network.send_json(move_message("battleship", (row, col), sub_type="shot"))
+                        elif self.ai:
+                            self.fire_offline(row, col)
             super().mousePressEvent(event)
             return
 
@@ -317,7 +340,15 @@ class BattleshipGame(OverlayWindow):
         self.update()
 
         if self.is_online and self.network:
-            self.network.send_json({"type": "game_move", "sub_type": "battleship_ready"})
+            msg = {"type": "game_move", "sub_type": "battleship_ready"}
+            if self.server_resolved:
+                msg["fleet"] = [{"id": sid, "r": d["r"], "c": d["c"], "ori": d["ori"]}
+                                for sid, d in self.logic.placed_ships.items()]
+            self.network.send_json(msg)
+        elif self.ai:
+            # Компьютер расставляет флот и сразу готов
+            self.ai_logic.place_fleet_randomly(self.ai.rng)
+            self.opponent_ready = True
 
         if self.opponent_ready:
             self.start_game()
@@ -334,7 +365,10 @@ class BattleshipGame(OverlayWindow):
             subtype = data.get("sub_type")
 
             if subtype == "shot":
-                r, c = data["r"], data["c"]
+                shot = message_move("battleship", data)
+                if shot is None:
+                    return
+                r, c = shot
                 res, ship_data = self.logic.receive_shot(r, c)
                 self.update()
 
@@ -346,6 +380,11 @@ class BattleshipGame(OverlayWindow):
                     "ship_data": ship_data
                 })
 
+            elif subtype == "shot_result" and data.get("incoming"):
+                # Сервер уже разрешил выстрел соперника - только отмечаем у себя
+                self.logic.receive_shot(data["r"], data["c"])
+                self.update()
+
             elif subtype == "shot_result":
                 r, c = data["r"], data["c"]
                 status = data["status"]
@@ -353,14 +392,49 @@ class BattleshipGame(OverlayWindow):
                 self.logic.process_shot_result(r, c, status, sdata)
                 self.update()
 
+        self.check_game_over()
+
+    def check_game_over(self):
         if self.logic.game_over and not self.can_restart:
             # Запускаем таймер на 2 секунды
-            from PyQt6.QtCore import QTimer
             QTimer.singleShot(2000, self.enable_restart)
 
     def enable_restart(self):
         self.can_restart = True
 
+    # --- ОФФЛАЙН: ИГРА ПРОТИВ КОМПЬЮТЕРА ---
+    def fire_offline(self, r, c):
+        """Мой выстрел по флоту компьютера"""
+        res, ship_data = self.ai_logic.receive_shot(r, c)
+        self.logic.process_shot_result(r, c, res, ship_data)
+        self.update()
+
+        self.check_game_over()
+        if not self.logic.game_over and not self.logic.my_turn:
+            QTimer.singleShot(600, self.ai_turn)
+
+    def ai_turn(self):
+        """Выстрел компьютера (повторяется, пока он попадает)"""
+        if self.logic.game_over or self.logic.my_turn or self.logic.phase != 'playing':
+            return
+
+        target = self.ai.choose_shot(self.ai_logic.enemy_view)
+        if target is None:
+            return
+        r, c = target
+        res, ship_data = self.logic.receive_shot(r, c)
+        self.ai_logic.process_shot_result(r, c, res, ship_data)
+        self.update()
+
+        self.check_game_over()
+        if not self.logic.game_over and not self.logic.my_turn:
+            QTimer.singleShot(600, self.ai_turn)
+
+    def restart_offline(self):
+        self.ai_logic.reset_game()
+        self.swap_sides('white')
+        self.can_restart = False
+
     def start_game(self):
         self.logic.phase = 'playing'
         self.ready_btn.hide()
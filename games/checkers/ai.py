@@ -0,0 +1,18 @@
+from core.mcts import MCTSPlayer
+from games.checkers.engine import CheckersEngine
+
+
+class CheckersAI:
+    """
+    Компьютер для шашек на общем MCTS. Случайные доигрывания короткие,
+    незаконченная позиция оценивается по материалу (CheckersEngine.evaluate).
+    strength (0..1) масштабирует время на ход.
+    """
+
+    def __init__(self, strength=1.0, time_limit=0.8, seed=None):
+        self.player = MCTSPlayer(CheckersEngine, time_limit=max(0.05, time_limit * strength),
+                                 rollout_limit=20, seed=seed)
+
+    def choose_move(self, logic):
+        """Ход (start, end) за сторону logic.turn"""
+        return self.player.choose_move(logic)
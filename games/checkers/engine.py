@@ -0,0 +1,58 @@
+from core.engine import SnapshotEngine, register_engine
+from games.checkers.logic import CheckersLogic
+
+
+@register_engine
+class CheckersEngine(SnapshotEngine):
+    game_id = "checkers"
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.logic = CheckersLogic()
+
+    def legal_moves(self):
+        l = self.logic
+        if l.game_over:
+            return []
+        if l.lock_piece:
+            starts = [l.lock_piece]
+        else:
+            pieces = [1, 3] if l.turn == 'white' else [2, 4]
+            starts = [(r, c) for r in range(8) for c in range(8) if l.board[r][c] in pieces]
+        return [(start, target) for start in starts for target in l.get_valid_moves(*start)]
+
+    def _play(self, move):
+        return self.logic.move_piece(move[0], move[1])
+
+    def current_player(self):
+        return 0 if self.logic.turn == 'white' else 1
+
+    def is_terminal(self):
+        return self.logic.game_over
+
+    def result(self):
+        winner = self.logic.winner
+        if winner is None:
+            return None
+        return 0 if winner == 'white' else 1
+
+    def evaluate(self):
+        """Доля материала белых (дамка - за три шашки)"""
+        values = {1: (1, 0), 3: (3, 0), 2: (0, 1), 4: (0, 3)}
+        white = black = 0
+        for row in self.logic.board:
+            for piece in row:
+                if piece:
+                    w, b = values[piece]
+                    white += w
+                    black += b
+        return (white + 1) / (white + black + 2)
+
+    def _snapshot(self):
+        l = self.logic
+        return tuple(tuple(row) for row in l.board), l.turn, l.lock_piece, l.game_over, l.winner
+
+    def _restore(self, state):
+        l = self.logic
+        board, l.turn, l.lock_piece, l.game_over, l.winner = state
+        l.board = [list(row) for row in board]
@@ -1,3 +1,10 @@
+# Компактный снимок (to_bytes): 32 темных клетки по 4 бита + флаги
+DARK_SQUARES = [(r, c) for r in range(8) for c in range(8) if (r + c) % 2 == 1]
+WINNER_CODES = {None: 0, 'white': 1, 'black': 2, 'Draw': 3}
+CODE_WINNERS = {v: k for k, v in WINNER_CODES.items()}
+SNAPSHOT_SIZE = 18
+
+
 class CheckersLogic:
     def __init__(self):
         self.reset_game()
@@ -20,6 +27,34 @@ class CheckersLogic:
                         board[row][col] = 1  # Белые
         return board
 
+    def to_bytes(self):
+        """18 байт: 32 темные клетки по 4 бита, флаги (ход, конец, победитель), залоченная шашка"""
+        data = bytearray(SNAPSHOT_SIZE)
+        for i, (r, c) in enumerate(DARK_SQUARES):
+            data[i >> 1] |= self.board[r][c] << ((i & 1) * 4)
+        data[16] = (self.turn == 'black') | (self.game_over << 1) | (WINNER_CODES[self.winner] << 2)
+        data[17] = 0xFF if self.lock_piece is None else self.lock_piece[0] * 8 + self.lock_piece[1]
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) != SNAPSHOT_SIZE:
+            raise ValueError("bad checkers snapshot")
+        logic = cls()
+        for i, (r, c) in enumerate(DARK_SQUARES):
+            piece = (data[i >> 1] >> ((i & 1) * 4)) & 0xF
+            if piece > 4:
+                raise ValueError("bad checkers snapshot")
+            logic.board[r][c] = piece
+
+        flags = data[16]
+        logic.turn = 'black' if flags & 1 else 'white'
+        logic.game_over = bool(flags & 2)
+        logic.winner = CODE_WINNERS[(flags >> 2) & 3]
+        lock = data[17]
+        logic.lock_piece = None if lock == 0xFF else (lock // 8, lock % 8)
+        return logic
+
     def move_piece(self, start_pos, end_pos):
         if self.game_over: return False
 
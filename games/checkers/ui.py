@@ -1,9 +1,26 @@
+import copy
 from PyQt6.QtWidgets import QWidget, QLabel, QGridLayout, QVBoxLayout
 from PyQt6.QtGui import QPixmap, QPainter, QBrush, QColor, QFont, QPen
-from PyQt6.QtCore import Qt, QRect, QPoint, QPropertyAnimation, QEasingCurve, QTimer
+from PyQt6.QtCore import Qt, QRect, QPoint, QPropertyAnimation, QEasingCurve, QTimer, QThread, pyqtSignal
 from core.base_window import OverlayWindow
+from core.moves import message_move, move_message
 from games.checkers.logic import CheckersLogic
+from games.checkers.ai import CheckersAI
 from core.sound_manager import SoundManager
+from core.settings import SettingsManager
+
+
+class AIWorker(QThread):
+    """Ход компьютера в своем потоке: MCTS думает до секунды, окно в это время не замирает"""
+    move_ready = pyqtSignal(object)
+
+    def __init__(self, ai, logic):
+        super().__init__()
+        self.ai = ai
+        self.logic = logic  # Копия: доска в окне в это время не должна меняться под поиском
+
+    def run(self):
+        self.move_ready.emit(self.ai.choose_move(self.logic))
 
 
 class CheckersGame(OverlayWindow):
@@ -24,6 +41,13 @@ class CheckersGame(OverlayWindow):
 
         self.hidden_piece_pos = None # Координата клетки, где шашку временно не надо рисовать
 
+        # Оффлайн против компьютера: человек - белые, компьютер - черные
+        self.ai = None
+        self.ai_color = 'black'
+        self.ai_worker = None  # AIWorker, пока компьютер думает
+        if not self.is_online and SettingsManager().get("vs_computer"):
+            self.ai = CheckersAI(strength=float(SettingsManager().get("ai_strength")))
+
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.main_layout = QVBoxLayout(self.central_widget)
@@ -54,6 +78,11 @@ class CheckersGame(OverlayWindow):
         self._init_board_ui()
         self._update_ui()
 
+    def closeEvent(self, event):
+        if self.ai_worker:
+            self.ai_worker.wait()  # Поток не должен пережить окно
+        super().closeEvent(event)
+
     def showEvent(self, event):
         super().showEvent(event)
         # Когда окно показывается (show), Layout уже закончил работу.
@@ -89,6 +118,8 @@ class CheckersGame(OverlayWindow):
 
             if self.is_online and self.logic.turn != self.my_color:
                 return
+            if self.ai and (self.logic.turn == self.ai_color or self.hidden_piece_pos):
+                return  # Ходит компьютер
 
             board_pos = self.board_container.mapFrom(self, event.position().toPoint())
             w = self.board_container.width()
@@ -210,8 +241,7 @@ class CheckersGame(OverlayWindow):
             if success:
                 # А. ОТПРАВЛЯЕМ ХОД В СЕТЬ (сразу, так как доска изменилась)
                 if self.is_online and self.network:
-                    data_str = f"{start_pos[0]},{start_pos[1]}:{end_pos[0]},{end_pos[1]}"
-                    self.network.send_json({"type": "game_move", "data": data_str})
+                    self.network.send_json(move_message("checkers", (start_pos, end_pos)))
 
                 # Б. ОБРАБОТКА СЕРИИ ВЗЯТИЙ (Мульти-джамп)
                 if self.logic.lock_piece:
@@ -259,20 +289,18 @@ class CheckersGame(OverlayWindow):
         self._update_ui()
         super().resizeEvent(event)
 
-    def on_network_message(self, message):
-        if message.startswith("move:"):
-            try:
-                coords = message.split(":")[1:]
-                r1, c1 = map(int, coords[0].split(","))
-                r2, c2 = map(int, coords[1].split(","))
+    def on_network_message(self, data):
+        if data.get("type") == "game_move":
+            move = message_move("checkers", data)
+            if move is None:
+                return
 
-                piece_val = self.logic.board[r1][c1]
+            start, end = move
+            piece_val = self.logic.board[start[0]][start[1]]
 
-                self.logic.move_piece((r1, c1), (r2, c2))
-                self.animate_move((r1, c1), (r2, c2), piece_val)
-            except:
-                pass
-        elif message == "restart_cmd":
+            if self.logic.move_piece(start, end):
+                self.animate_move(start, end, piece_val)
+        elif data.get("type") == "restart_cmd":
             self.logic.reset_game()
             self._update_ui()
 
@@ -375,4 +403,25 @@ class CheckersGame(OverlayWindow):
         floater.deleteLater()  # Удаляем летуна
         self.hidden_piece_pos = None  # Снимаем скрытие
         self._update_ui()  # Рисуем доску нормально
-        SoundManager().play("move")
\ No newline at end of file
+        SoundManager().play("move")
+
+        if self.ai and not self.logic.game_over and self.logic.turn == self.ai_color:
+            QTimer.singleShot(200, self.ai_move)
+
+    def ai_move(self):
+        if not self.ai or self.ai_worker or self.logic.game_over or self.logic.turn != self.ai_color:
+            return
+        self.ai_worker = AIWorker(self.ai, copy.deepcopy(self.logic))
+        self.ai_worker.move_ready.connect(self.apply_ai_move)
+        self.ai_worker.start()
+
+    def apply_ai_move(self, move):
+        self.ai_worker.wait()
+        self.ai_worker = None
+        if move is None or self.logic.game_over or self.logic.turn != self.ai_color:
+            return
+
+        start_pos, end_pos = move
+        piece_val = self.logic.board[start_pos[0]][start_pos[1]]
+        if self.logic.move_piece(start_pos, end_pos):
+            self.animate_move(start_pos, end_pos, piece_val)
\ No newline at end of file
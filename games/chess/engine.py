@@ -0,0 +1,65 @@
+from core.engine import SnapshotEngine, DRAW, register_engine
+from games.chess.logic import ChessLogic
+
+
+@register_engine
+class ChessEngine(SnapshotEngine):
+    game_id = "chess"
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.logic = ChessLogic()
+
+    def legal_moves(self):
+        if self.logic.game_over:
+            return []
+        prefix = 'w' if self.logic.turn == 'white' else 'b'
+        moves = []
+        for r in range(8):
+            for c in range(8):
+                if self.logic.board[r][c].startswith(prefix):
+                    for target in self.logic.get_valid_moves(r, c):
+                        moves.append(((r, c), target))
+        return moves
+
+    def _play(self, move):
+        return self.logic.move_piece(move[0], move[1])
+
+    def current_player(self):
+        return 0 if self.logic.turn == 'white' else 1
+
+    def is_terminal(self):
+        return self.logic.game_over
+
+    def result(self):
+        winner = self.logic.winner
+        if winner is None:
+            return None
+        if winner == 'Draw':
+            return DRAW
+        return 0 if winner == 'white' else 1
+
+    PIECE_VALUES = {'P': 1, 'N': 3, 'B': 3, 'R': 5, 'Q': 9, 'K': 0}
+
+    def evaluate(self):
+        """Доля материала белых"""
+        white = black = 0
+        for row in self.logic.board:
+            for piece in row:
+                if piece:
+                    if piece[0] == 'w':
+                        white += self.PIECE_VALUES[piece[1]]
+                    else:
+                        black += self.PIECE_VALUES[piece[1]]
+        return (white + 1) / (white + black + 2)
+
+    def _snapshot(self):
+        l = self.logic
+        return (tuple(tuple(row) for row in l.board), l.turn, l.is_check, l.game_over, l.winner,
+                tuple(sorted(l.moved_pieces)), l.en_passant_target)
+
+    def _restore(self, state):
+        l = self.logic
+        board, l.turn, l.is_check, l.game_over, l.winner, moved, l.en_passant_target = state
+        l.board = [list(row) for row in board]
+        l.moved_pieces = set(moved)
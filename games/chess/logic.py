@@ -1,5 +1,15 @@
 import copy
 
+# Компактный снимок (to_bytes): 32 байта доски по полбайта на клетку + флаги
+PIECE_CODES = {'P': 1, 'N': 2, 'B': 3, 'R': 4, 'Q': 5, 'K': 6}
+CODE_PIECES = {v: k for k, v in PIECE_CODES.items()}
+BLACK_BIT = 8
+# Право рокировки: (бит, поле короля, поле ладьи)
+CASTLING = [(1, (7, 4), (7, 7)), (2, (7, 4), (7, 0)), (4, (0, 4), (0, 7)), (8, (0, 4), (0, 0))]
+WINNER_CODES = {None: 0, 'white': 1, 'black': 2, 'Draw': 3}
+CODE_WINNERS = {v: k for k, v in WINNER_CODES.items()}
+SNAPSHOT_SIZE = 35
+
 
 class ChessLogic:
     def __init__(self):
@@ -29,6 +39,57 @@ class ChessLogic:
         # Координата "битого поля" для взятия на проходе. Пример: (2, 3)
         self.en_passant_target = None
 
+    def to_bytes(self):
+        """
+        35 байт: 64 клетки по 4 бита (тип фигуры + бит цвета), флаги
+        (ход, шах, конец игры, права рокировки), поле взятия на проходе, победитель.
+        """
+        data = bytearray(SNAPSHOT_SIZE)
+        for i in range(64):
+            piece = self.board[i // 8][i % 8]
+            if piece:
+                code = PIECE_CODES[piece[1]] | (BLACK_BIT if piece[0] == 'b' else 0)
+                data[i >> 1] |= code << ((i & 1) * 4)
+
+        castling = 0
+        for bit, king, rook in CASTLING:
+            if king not in self.moved_pieces and rook not in self.moved_pieces:
+                castling |= bit
+        flags = (self.turn == 'black') | (self.is_check << 1) | (self.game_over << 2)
+        data[32] = flags | (castling << 4)
+        data[33] = 0xFF if self.en_passant_target is None else self.en_passant_target[0] * 8 + self.en_passant_target[1]
+        data[34] = WINNER_CODES[self.winner]
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) != SNAPSHOT_SIZE or data[34] not in CODE_WINNERS:
+            raise ValueError("bad chess snapshot")
+        logic = cls()
+        for i in range(64):
+            code = (data[i >> 1] >> ((i & 1) * 4)) & 0xF
+            if code and (code & 7) not in CODE_PIECES:
+                raise ValueError("bad chess snapshot")
+            logic.board[i // 8][i % 8] = ('b' if code & BLACK_BIT else 'w') + CODE_PIECES[code & 7] if code else ''
+
+        flags = data[32]
+        logic.turn = 'black' if flags & 1 else 'white'
+        logic.is_check = bool(flags & 2)
+        logic.game_over = bool(flags & 4)
+        castling = flags >> 4
+
+        # "Не ходили" только король и ладьи с сохраненным правом рокировки
+        logic.moved_pieces = {(r, c) for r in range(8) for c in range(8)}
+        for bit, king, rook in CASTLING:
+            if castling & bit:
+                logic.moved_pieces.discard(king)
+                logic.moved_pieces.discard(rook)
+
+        ep = data[33]
+        logic.en_passant_target = None if ep == 0xFF else (ep // 8, ep % 8)
+        logic.winner = CODE_WINNERS[data[34]]
+        return logic
+
     def move_piece(self, start_pos, end_pos):
         if self.game_over: return False
 
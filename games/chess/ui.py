@@ -2,6 +2,7 @@ from PyQt6.QtWidgets import QWidget, QLabel, QGridLayout, QVBoxLayout
 from PyQt6.QtGui import QPixmap, QPainter, QPen, QColor, QFont, QBrush
 from PyQt6.QtCore import Qt, QRect, QPropertyAnimation, QEasingCurve
 from core.base_window import OverlayWindow
+from core.moves import message_move, move_message
 from games.chess.logic import ChessLogic
 from core.sound_manager import SoundManager
 
@@ -231,8 +232,7 @@ class ChessGame(OverlayWindow):
 
                 # Отправка по сети
                 if self.is_online and self.network:
-                    data_str = f"{start[0]},{start[1]}:{end[0]},{end[1]}"
-                    self.network.send_json({"type": "game_move", "data": data_str})
+                    self.network.send_json(move_message("chess", (start, end)))
 
                 self.animate_move(start, end, piece_code)
                 return
@@ -258,23 +258,20 @@ class ChessGame(OverlayWindow):
 
         self._update_ui()
 
-    def on_network_message(self, message):
-        """Вызывается из Лаунчера при ходе соперника"""
-        if message.startswith("move:"):
-            try:
-                # message = "move:6,4:4,4"
-                coords = message.split(":")[1:]  # ['6,4', '4,4']
-                r1, c1 = map(int, coords[0].split(","))
-                r2, c2 = map(int, coords[1].split(","))
-
-                piece_code = self.logic.board[r1][c1]
-
-                # Применяем ход
-                self.logic.move_piece((r1, c1), (r2, c2))
-                self.animate_move((r1, c1), (r2, c2), piece_code)
-            except Exception as e:
-                print(f"Ошибка сети в игре: {e}")
-        elif message == "restart_cmd":
+    def on_network_message(self, data):
+        """Вызывается из Лаунчера при ходе соперника (data - сообщение game_move)"""
+        if data.get("type") == "game_move":
+            move = message_move("chess", data)
+            if move is None:
+                return
+
+            start, end = move
+            piece_code = self.logic.board[start[0]][start[1]]
+
+            # Применяем ход (нелегальный ход логика просто отклонит)
+            if self.logic.move_piece(start, end):
+                self.animate_move(start, end, piece_code)
+        elif data.get("type") == "restart_cmd":
             self.logic.reset_game()
             self._update_ui()
 
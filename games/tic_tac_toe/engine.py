@@ -0,0 +1,56 @@
+from core.engine import GameEngine, DRAW, register_engine
+from games.tic_tac_toe.logic import TicTacToeLogic
+
+
+@register_engine
+class TicTacToeEngine(GameEngine):
+    game_id = "tic_tac_toe"
+    SIZE = (3, 3, 3)
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.logic = TicTacToeLogic(*self.SIZE)
+
+    def legal_moves(self):
+        l = self.logic
+        if l.game_over:
+            return []
+        return [(r, c) for r in range(l.rows) for c in range(l.cols) if l.board[r][c] == '']
+
+    def current_player(self):
+        return 0 if self.logic.turn == 'X' else 1
+
+    def is_terminal(self):
+        return self.logic.game_over
+
+    def result(self):
+        winner = self.logic.winner
+        if winner is None:
+            return None
+        if winner == 'Draw':
+            return DRAW
+        return 0 if winner == 'X' else 1
+
+    # Откат без копии доски: достаточно очистить клетку и вернуть флаги
+    def apply(self, move):
+        l = self.logic
+        state = (l.turn, l.winner, l.game_over, l.winning_line, l.last_move)
+        if not l.make_move(move[0], move[1]):
+            return False
+        self._history.append((move, state))
+        return True
+
+    def undo(self):
+        if not self._history:
+            return False
+        l = self.logic
+        (r, c), (l.turn, l.winner, l.game_over, l.winning_line, l.last_move) = self._history.pop()
+        l.board[r][c] = ''
+        l.empty_cells += 1
+        return True
+
+
+@register_engine
+class GomokuEngine(TicTacToeEngine):
+    game_id = "gomoku"
+    SIZE = (15, 15, 5)
@@ -1,27 +1,88 @@
+# Компактный снимок (to_bytes): 2 бита на клетку
+MARK_CODES = {'': 0, 'X': 1, 'O': 2}
+CODE_MARKS = {v: k for k, v in MARK_CODES.items()}
+WINNER_CODES = {None: 0, 'X': 1, 'O': 2, 'Draw': 3}
+CODE_WINNERS = {v: k for k, v in WINNER_CODES.items()}
+HEADER_SIZE = 6
+
+
 class TicTacToeLogic:
-    def __init__(self):
+    # Направления линий через клетку: горизонталь, вертикаль, две диагонали
+    DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+    def __init__(self, rows=3, cols=3, k=3):
+        # Обобщенная игра m,n,k: поле rows x cols, победа - k в ряд (3x3x3, гомоку 15x15x5)
+        self.rows = rows
+        self.cols = cols
+        self.k = k
         self.reset_game()
 
     def reset_game(self):
         # Пустая строка - пусто, 'X' - крестик, 'O' - нолик
-        self.board = [['' for _ in range(3)] for _ in range(3)]
+        self.board = [['' for _ in range(self.cols)] for _ in range(self.rows)]
         self.turn = 'X'  # X всегда ходит первым
         self.winner = None  # 'X', 'O', 'Draw' или None
         self.game_over = False
         self.winning_line = []  # Координаты победной линии [(0,0), (0,1), (0,2)]
+        self.empty_cells = self.rows * self.cols  # Счетчик для быстрой проверки ничьей
+        self.last_move = None
+
+    def to_bytes(self):
+        """Заголовок (rows, cols, k, флаги, последний ход) + 2 бита на клетку: 9 байт для 3x3"""
+        cells = self.rows * self.cols
+        data = bytearray(HEADER_SIZE + (cells + 3) // 4)
+        data[0], data[1], data[2] = self.rows, self.cols, self.k
+        data[3] = (self.turn == 'O') | (self.game_over << 1) | (WINNER_CODES[self.winner] << 2)
+        data[4], data[5] = self.last_move if self.last_move else (0xFF, 0xFF)
+        for i in range(cells):
+            data[HEADER_SIZE + (i >> 2)] |= MARK_CODES[self.board[i // self.cols][i % self.cols]] << ((i & 3) * 2)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER_SIZE:
+            raise ValueError("bad tic-tac-toe snapshot")
+        rows, cols, k = data[0], data[1], data[2]
+        cells = rows * cols
+        if len(data) != HEADER_SIZE + (cells + 3) // 4:
+            raise ValueError("bad tic-tac-toe snapshot")
+
+        logic = cls(rows, cols, k)
+        for i in range(cells):
+            code = (data[HEADER_SIZE + (i >> 2)] >> ((i & 3) * 2)) & 3
+            if code not in CODE_MARKS:
+                raise ValueError("bad tic-tac-toe snapshot")
+            if code:
+                logic.board[i // cols][i % cols] = CODE_MARKS[code]
+                logic.empty_cells -= 1
+
+        flags = data[3]
+        logic.turn = 'O' if flags & 1 else 'X'
+        logic.game_over = bool(flags & 2)
+        logic.winner = CODE_WINNERS[(flags >> 2) & 3]
+        if data[4] != 0xFF:
+            logic.last_move = (data[4], data[5])
+            if logic.winner in ('X', 'O'):
+                logic._check_win(*logic.last_move)  # Восстанавливает winning_line
+        return logic
 
     def make_move(self, row, col):
         if self.game_over:
             return False
 
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            return False
+
         if self.board[row][col] != '':
             return False
 
         # Записываем ход
         self.board[row][col] = self.turn
+        self.empty_cells -= 1
+        self.last_move = (row, col)
 
         # Проверяем победу
-        if self._check_win():
+        if self._check_win(row, col):
             self.winner = self.turn
             self.game_over = True
         elif self._check_draw():
@@ -33,31 +94,31 @@ class TicTacToeLogic:
 
         return True
 
-    def _check_win(self):
+    def _check_win(self, row, col):
+        """Победить мог только последний ход - проверяем 4 линии через него"""
         b = self.board
-        # Проверка строк и столбцов
-        for i in range(3):
-            # Строки
-            if b[i][0] == b[i][1] == b[i][2] != '':
-                self.winning_line = [(i, 0), (i, 1), (i, 2)]
-                return True
-            # Столбцы
-            if b[0][i] == b[1][i] == b[2][i] != '':
-                self.winning_line = [(0, i), (1, i), (2, i)]
-                return True
+        mark = b[row][col]
+
+        for dr, dc in self.DIRECTIONS:
+            line = [(row, col)]
 
-        # Диагонали
-        if b[0][0] == b[1][1] == b[2][2] != '':
-            self.winning_line = [(0, 0), (1, 1), (2, 2)]
-            return True
-        if b[0][2] == b[1][1] == b[2][0] != '':
-            self.winning_line = [(0, 2), (1, 1), (2, 0)]
-            return True
+            # Вперед по направлению
+            r, c = row + dr, col + dc
+            while 0 <= r < self.rows and 0 <= c < self.cols and b[r][c] == mark:
+                line.append((r, c))
+                r, c = r + dr, c + dc
+
+            # Назад
+            r, c = row - dr, col - dc
+            while 0 <= r < self.rows and 0 <= c < self.cols and b[r][c] == mark:
+                line.insert(0, (r, c))
+                r, c = r - dr, c - dc
+
+            if len(line) >= self.k:
+                self.winning_line = line
+                return True
 
         return False
 
     def _check_draw(self):
-        for row in self.board:
-            if '' in row:
-                return False
-        return True
\ No newline at end of file
+        return self.empty_cells == 0
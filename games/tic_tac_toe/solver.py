@@ -0,0 +1,335 @@
+import os
+import random
+import time
+
+from core.resources import resource_path
+
+# Таблица исходов 3x3: индекс - позиция в троичной записи (клетка i -> 3^i, 0 пусто, 1 X, 2 O),
+# значение (2 бита) - исход для того, чей ход: 0 недостижимо, 1 проигрыш, 2 ничья, 3 победа
+LOSS, DRAW, WIN = 1, 2, 3
+STATES = 3 ** 9
+TABLE_MAGIC = b"TTT3"
+TABLE_FILE = os.path.join("assets", "ttt_outcomes.bin")
+
+POW3 = [3 ** i for i in range(9)]
+LINES_3 = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+
+# 8 симметрий квадрата: перестановки клеток 0..8
+_ROT = [6, 3, 0, 7, 4, 1, 8, 5, 2]
+_MIRROR = [2, 1, 0, 5, 4, 3, 8, 7, 6]
+
+
+def _symmetries():
+    perms = []
+    p = list(range(9))
+    for _ in range(4):
+        perms.append(p)
+        perms.append([p[i] for i in _MIRROR])
+        p = [p[i] for i in _ROT]
+    return perms
+
+
+SYMMETRIES = _symmetries()
+
+
+def canonical(cells):
+    """Минимальный индекс среди 8 симметричных позиций (ключ мемо-таблицы)"""
+    return min(sum(cells[perm[i]] * POW3[i] for i in range(9)) for perm in SYMMETRIES)
+
+
+def _winner(cells):
+    for a, b, c in LINES_3:
+        if cells[a] and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return 0
+
+
+def solve_table():
+    """Полный перебор минимаксом с мемоизацией по каноническим позициям"""
+    memo = {}
+    table = bytearray(STATES)
+
+    def solve(cells, index, to_move):
+        key = canonical(cells)
+        if key in memo:
+            value = memo[key]
+        elif _winner(cells):
+            value = memo[key] = LOSS  # Предыдущий игрок только что собрал линию
+        elif 0 not in cells:
+            value = memo[key] = DRAW
+        else:
+            value = LOSS
+            for i in range(9):
+                if cells[i] == 0:
+                    cells[i] = to_move
+                    child = solve(cells, index + to_move * POW3[i], 3 - to_move)
+                    cells[i] = 0
+                    value = max(value, 4 - child)  # Проигрыш соперника - наша победа
+                    if value == WIN:
+                        break
+            memo[key] = value
+        table[index] = value
+
+        if not _winner(cells):
+            # Заполняем таблицу для всех достижимых позиций, а не только канонических
+            for i in range(9):
+                if cells[i] == 0 and not table[index + to_move * POW3[i]]:
+                    cells[i] = to_move
+                    solve(cells, index + to_move * POW3[i], 3 - to_move)
+                    cells[i] = 0
+        return value
+
+    solve([0] * 9, 0, 1)
+    return table
+
+
+def pack_table(table):
+    packed = bytearray((len(table) + 3) // 4)
+    for i, value in enumerate(table):
+        packed[i >> 2] |= value << ((i & 3) * 2)
+    return TABLE_MAGIC + bytes(packed)
+
+
+def unpack_value(packed, index):
+    return (packed[index >> 2] >> ((index & 3) * 2)) & 3
+
+
+class OutcomeTable:
+    """Предрасчитанные исходы 3x3 (~5 КБ), поиск хода - O(1) на клетку"""
+    _packed = None
+
+    @classmethod
+    def load(cls):
+        if cls._packed is None:
+            try:
+                with open(resource_path(TABLE_FILE), "rb") as f:
+                    data = f.read()
+                if data[:4] != TABLE_MAGIC:
+                    raise ValueError("bad table")
+                cls._packed = data[4:]
+            except (OSError, ValueError):
+                # Нет ассета - считаем таблицу на лету (доли секунды)
+                cls._packed = pack_table(solve_table())[4:]
+        return cls._packed
+
+    @classmethod
+    def value(cls, index):
+        return unpack_value(cls.load(), index)
+
+
+def board_index(board):
+    index = 0
+    for i in range(9):
+        mark = board[i // 3][i % 3]
+        if mark:
+            index += (1 if mark == 'X' else 2) * POW3[i]
+    return index
+
+
+class TicTacToeAI:
+    """
+    Компьютерный соперник.
+    strength: 1.0 - идеальная игра, 0.0 - случайные ходы.
+    Для 3x3 (k=3) ходы берутся из таблицы исходов, для больших полей m,n,k -
+    поиск с ограничением глубины и оценкой угроз в рамках time_budget секунд.
+    Общий MCTS (core.mcts) не используется: 3x3 таблица решает точно, а на
+    гомоку случайные доигрывания проигрывают поиску угроз при равном времени.
+    """
+
+    def __init__(self, strength=1.0, time_budget=0.5, rng=None):
+        self.strength = strength
+        self.time_budget = time_budget
+        self.rng = rng or random.Random()
+
+    def choose_move(self, logic):
+        empty = [(r, c) for r in range(logic.rows) for c in range(logic.cols) if logic.board[r][c] == '']
+        if not empty or logic.game_over:
+            return None
+
+        if self.rng.random() >= self.strength:
+            return self.rng.choice(empty)
+
+        if (logic.rows, logic.cols, logic.k) == (3, 3, 3):
+            return self._table_move(logic, empty)
+        return ThreatSearch(logic, self.time_budget).best_move()
+
+    def _table_move(self, logic, empty):
+        index = board_index(logic.board)
+        mark = 1 if logic.turn == 'X' else 2
+
+        best_value, best_moves = 0, []
+        for r, c in empty:
+            child = OutcomeTable.value(index + mark * POW3[r * 3 + c])
+            value = 4 - child
+            if value > best_value:
+                best_value, best_moves = value, [(r, c)]
+            elif value == best_value:
+                best_moves.append((r, c))
+        return self.rng.choice(best_moves)
+
+
+# Вес окна длины k в зависимости от числа своих камней в нем
+def _window_weights(k):
+    return [0] + [10 ** i for i in range(k)]
+
+
+class ThreatSearch:
+    """Негамакс с альфа-бета отсечением и итеративным углублением для m,n,k"""
+    WIN_SCORE = 10 ** 9
+
+    def __init__(self, logic, time_budget):
+        self.rows, self.cols, self.k = logic.rows, logic.cols, logic.k
+        self.board = [row[:] for row in logic.board]
+        self.me = logic.turn
+        self.weights = _window_weights(self.k)
+        self.deadline = time.perf_counter() + time_budget
+        self.nodes = 0
+
+    def best_move(self):
+        moves = self._candidates(self.me)
+        if not moves:
+            return None
+
+        # Угрозы: сначала своя немедленная победа, потом обязательная защита
+        opponent = self._other(self.me)
+        for move in moves:
+            if self._wins(move, self.me):
+                return move
+        blocks = [m for m in moves if self._wins(m, opponent)]
+        if blocks:
+            return blocks[0]
+
+        best = moves[0]
+        depth = 1
+        try:
+            while depth <= len(moves):
+                score, move = self._root(depth, moves)
+                if move is not None:
+                    best = move
+                    # Лучший ход предыдущей итерации проверяем первым
+                    moves.remove(move)
+                    moves.insert(0, move)
+                if score >= self.WIN_SCORE:
+                    break
+                depth += 1
+        except TimeoutError:
+            pass
+        return best
+
+    def _root(self, depth, moves):
+        alpha, best_move = -self.WIN_SCORE * 2, None
+        for move in moves:
+            score = -self._negamax(move, self.me, depth - 1, -self.WIN_SCORE * 2, -alpha, 0)
+            if score > alpha:
+                alpha, best_move = score, move
+        return alpha, best_move
+
+    def _negamax(self, move, mark, depth, alpha, beta, score):
+        """Ставит mark в move и оценивает позицию с точки зрения соперника"""
+        self.nodes += 1
+        if self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise TimeoutError
+
+        r, c = move
+        gain = self._gain(r, c, mark)
+        self.board[r][c] = mark
+        try:
+            if self._line_through(r, c, mark):
+                return -self.WIN_SCORE
+            total = score + gain
+            if depth == 0:
+                return -total
+
+            opponent = self._other(mark)
+            children = self._candidates(opponent)
+            if not children:
+                return 0
+
+            best = -self.WIN_SCORE * 2
+            for child in children:
+                value = -self._negamax(child, opponent, depth - 1, -beta, -alpha, -total)
+                if value > best:
+                    best = value
+                if best > alpha:
+                    alpha = best
+                if alpha >= beta:
+                    break
+            return best
+        finally:
+            self.board[r][c] = ''
+
+    def _candidates(self, mark, limit=12):
+        """Пустые клетки рядом с камнями, упорядоченные по оценке угроз"""
+        stones = [(r, c) for r in range(self.rows) for c in range(self.cols) if self.board[r][c]]
+        if not stones:
+            return [(self.rows // 2, self.cols // 2)]
+
+        cells = set()
+        for r, c in stones:
+            for dr in (-2, -1, 0, 1, 2):
+                for dc in (-2, -1, 0, 1, 2):
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < self.rows and 0 <= nc < self.cols and self.board[nr][nc] == '':
+                        cells.add((nr, nc))
+
+        opponent = self._other(mark)
+        scored = sorted(cells, key=lambda m: -(self._gain(m[0], m[1], mark) + self._gain(m[0], m[1], opponent)))
+        return scored[:limit]
+
+    def _gain(self, r, c, mark):
+        """Изменение оценки от постановки mark в (r, c): развитие своих окон и разрушение чужих"""
+        opponent = self._other(mark)
+        b, k, w = self.board, self.k, self.weights
+        gain = 0
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for shift in range(k):
+                sr, sc = r - dr * shift, c - dc * shift
+                er, ec = sr + dr * (k - 1), sc + dc * (k - 1)
+                if not (0 <= sr < self.rows and 0 <= sc < self.cols and 0 <= er < self.rows and 0 <= ec < self.cols):
+                    continue
+                own = opp = 0
+                for i in range(k):
+                    cell = b[sr + dr * i][sc + dc * i]
+                    if cell == mark:
+                        own += 1
+                    elif cell == opponent:
+                        opp += 1
+                if opp == 0:
+                    gain += w[own + 1] - w[own]
+                elif own == 0:
+                    gain += w[opp]
+        return gain
+
+    def _wins(self, move, mark):
+        r, c = move
+        self.board[r][c] = mark
+        result = self._line_through(r, c, mark)
+        self.board[r][c] = ''
+        return result
+
+    def _line_through(self, r, c, mark):
+        b = self.board
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            count = 1
+            nr, nc = r + dr, c + dc
+            while 0 <= nr < self.rows and 0 <= nc < self.cols and b[nr][nc] == mark:
+                count += 1
+                nr, nc = nr + dr, nc + dc
+            nr, nc = r - dr, c - dc
+            while 0 <= nr < self.rows and 0 <= nc < self.cols and b[nr][nc] == mark:
+                count += 1
+                nr, nc = nr - dr, nc - dc
+            if count >= self.k:
+                return True
+        return False
+
+    @staticmethod
+    def _other(mark):
+        return 'O' if mark == 'X' else 'X'
+
+
+if __name__ == "__main__":
+    # Пересборка ассета: python -m games.tic_tac_toe.solver
+    with open(TABLE_FILE, "wb") as f:
+        f.write(pack_table(solve_table()))
+    print(f"Таблица записана в {TABLE_FILE}")
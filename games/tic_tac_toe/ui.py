@@ -1,8 +1,11 @@
-from PyQt6.QtWidgets import QWidget, QLabel, QGridLayout, QVBoxLayout, QHBoxLayout
-from PyQt6.QtGui import QPixmap, QPainter, QPen, QColor, QFont
+from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout
+from PyQt6.QtGui import QPainter, QPen, QColor, QFont
 from PyQt6.QtCore import Qt, QTimer, QRect
 from core.base_window import OverlayWindow
+from core.moves import message_move, move_message
+from core.settings import SettingsManager
 from games.tic_tac_toe.logic import TicTacToeLogic
+from games.tic_tac_toe.solver import TicTacToeAI
 
 
 class DrawingAnimation(QWidget):
@@ -75,11 +78,106 @@ class DrawingAnimation(QWidget):
             painter.drawArc(rect, 90 * 16, -span_angle)  # Начинаем сверху (90 град)
 
 
+class BoardWidget(QWidget):
+    """Все поле рисуется одним виджетом (без QLabel на клетку) - годится и для 15x15"""
+
+    def __init__(self, game):
+        super().__init__()
+        self.game = game
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+
+    def cell_rect(self, row, col):
+        logic = self.game.logic
+        cell_w = self.width() / logic.cols
+        cell_h = self.height() / logic.rows
+        x1, y1 = int(col * cell_w), int(row * cell_h)
+        x2, y2 = int((col + 1) * cell_w), int((row + 1) * cell_h)
+        return QRect(x1, y1, x2 - x1, y2 - y1)
+
+    def cell_at(self, pos):
+        logic = self.game.logic
+        if self.width() < 1 or self.height() < 1:
+            return None
+        col = int(pos.x() // (self.width() / logic.cols))
+        row = int(pos.y() // (self.height() / logic.rows))
+        if 0 <= row < logic.rows and 0 <= col < logic.cols:
+            return row, col
+        return None
+
+    def paintEvent(self, event):
+        logic = self.game.logic
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Фон полупрозрачный черный, чтобы видеть границы
+        painter.fillRect(self.rect(), QColor(0, 0, 0, 50))
+
+        winning = set(logic.winning_line)
+        cell_w = self.width() / logic.cols
+        cell_h = self.height() / logic.rows
+        # Толщина линий зависит от размера клетки
+        pen_width = max(2, int(min(cell_w, cell_h)) // 15)
+
+        for row in range(logic.rows):
+            for col in range(logic.cols):
+                rect = self.cell_rect(row, col)
+
+                # Если эта клетка часть победной линии - подсветим фон
+                if (row, col) in winning:
+                    painter.fillRect(rect, QColor(0, 255, 0, 50))
+
+                if self.game.hidden_cell == (row, col):
+                    continue
+
+                symbol = logic.board[row][col]
+                if symbol:
+                    draw_symbol(painter, rect, symbol, pen_width)
+
+        # Сетка
+        grid_pen = QPen(QColor(255, 255, 255, 100))
+        grid_pen.setWidth(2 if logic.rows <= 5 else 1)
+        painter.setPen(grid_pen)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        for i in range(logic.rows + 1):
+            y = int(i * cell_h)
+            painter.drawLine(0, y, self.width(), y)
+        for i in range(logic.cols + 1):
+            x = int(i * cell_w)
+            painter.drawLine(x, 0, x, self.height())
+
+        painter.end()
+
+
+def draw_symbol(painter, rect, symbol, pen_width):
+    margin = int(min(rect.width(), rect.height()) * 0.25)
+    inner = rect.adjusted(margin, margin, -margin, -margin)
+
+    if symbol == 'X':
+        pen = QPen(QColor("#4FC3F7"))  # Голубой цвет для X
+        pen.setWidth(pen_width)
+        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+        painter.setPen(pen)
+        painter.drawLine(inner.topLeft(), inner.bottomRight())
+        painter.drawLine(inner.topRight(), inner.bottomLeft())
+
+    elif symbol == 'O':
+        pen = QPen(QColor("#FF5252"))  # Красный цвет для O
+        pen.setWidth(pen_width)
+        painter.setPen(pen)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawEllipse(inner)
+
+
 class TicTacToeGame(OverlayWindow):
+    # Размер поля и длина победной линии (m,n,k)
+    GAME_ID = "tic_tac_toe"
+    ROWS, COLS, K = 3, 3, 3
+    WINDOW_SIZE = (400, 450)  # Компактный размер
+
     def __init__(self, is_online=False, is_host=True, network_client=None):
         super().__init__()
-        self.logic = TicTacToeLogic()
-        self.resize(400, 450)  # Компактный размер
+        self.logic = TicTacToeLogic(self.ROWS, self.COLS, self.K)
+        self.resize(*self.WINDOW_SIZE)
 
         self.is_online = is_online
         self.network = network_client
@@ -89,6 +187,12 @@ class TicTacToeGame(OverlayWindow):
 
         self.hidden_cell = None
 
+        # Оффлайн против компьютера: человек - крестики, компьютер - нолики
+        self.ai = None
+        self.ai_mark = 'O'
+        if not self.is_online and SettingsManager().get("vs_computer"):
+            self.ai = TicTacToeAI(strength=float(SettingsManager().get("ai_strength")))
+
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         self.main_layout = QVBoxLayout(self.central_widget)
@@ -111,27 +215,9 @@ class TicTacToeGame(OverlayWindow):
 
         self.main_layout.addLayout(header_layout)
 
-        # Контейнер для поля
-        self.board_container = QWidget()
-        self.main_layout.addWidget(self.board_container)
-
-        self.grid_layout = QGridLayout(self.board_container)
-        self.grid_layout.setSpacing(0)
-        self.grid_layout.setContentsMargins(0, 0, 0, 0)
-
-        self.cells = {}
-        self._init_board_ui()
-
-    def _init_board_ui(self):
-        for row in range(3):
-            for col in range(3):
-                label = QLabel()
-                label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                label.setScaledContents(True)
-                # Делаем фон полупрозрачным черным, чтобы видеть границы
-                label.setStyleSheet("background-color: rgba(0, 0, 0, 50); border: 2px solid rgba(255, 255, 255, 100);")
-                self.grid_layout.addWidget(label, row, col)
-                self.cells[(row, col)] = label
+        # Поле
+        self.board_widget = BoardWidget(self)
+        self.main_layout.addWidget(self.board_widget)
 
     def showEvent(self, event):
         super().showEvent(event)
@@ -169,29 +255,25 @@ class TicTacToeGame(OverlayWindow):
             # 2. ПРОВЕРКА ОЧЕРЕДИ ХОДА (Для онлайн)
             if self.is_online and self.logic.turn != self.my_mark:
                 return  # Ждем соперника
+            if self.ai and (self.logic.turn == self.ai_mark or self.hidden_cell):
+                return  # Ходит компьютер
 
             # 3. ВЫЧИСЛЕНИЕ КООРДИНАТ
-            board_pos = self.board_container.mapFrom(self, event.position().toPoint())
-            w = self.board_container.width()
-            h = self.board_container.height()
-
-            if board_pos.x() < 0 or board_pos.y() < 0 or board_pos.x() > w or board_pos.y() > h:
+            board_pos = self.board_widget.mapFrom(self, event.position().toPoint())
+            cell = self.board_widget.cell_at(board_pos)
+            if cell is None:
                 return
-
-            col = int(board_pos.x() // (w / 3))
-            row = int(board_pos.y() // (h / 3))
+            row, col = cell
 
             # 4. СОВЕРШЕНИЕ ХОДА
-            if 0 <= row < 3 and 0 <= col < 3:
-                symbol = self.logic.turn
+            symbol = self.logic.turn
 
-                if self.logic.make_move(row, col):
-                    # Отправка хода
-                    if self.is_online and self.network:
-                        # Формат: "r,c" (так как это строка data)
-                        self.network.send_json({"type": "game_move", "data": f"{row},{col}"})
+            if self.logic.make_move(row, col):
+                # Отправка хода
+                if self.is_online and self.network:
+                    self.network.send_json(move_message(self.GAME_ID, (row, col)))
 
-                    self.start_animation(row, col, symbol)
+                self.start_animation(row, col, symbol)
 
     def _update_ui(self):
         # 1. Текст статуса
@@ -217,70 +299,19 @@ class TicTacToeGame(OverlayWindow):
                     "color: #76FF03; background-color: rgba(0, 0, 0, 180); border-radius: 10px;")
 
         # 2. Отрисовка поля
-        cell_w = self.board_container.width() // 3
-        cell_h = self.board_container.height() // 3
-        if cell_w < 1: cell_w = 1
-        if cell_h < 1: cell_h = 1
-
-        for row in range(3):
-            for col in range(3):
-                label = self.cells[(row, col)]
-                symbol = self.logic.board[row][col]
-
-                pixmap = QPixmap(cell_w, cell_h)
-                pixmap.fill(Qt.GlobalColor.transparent)
-
-                painter = QPainter(pixmap)
-                painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-                # Если эта клетка часть победной линии - подсветим фон
-                if (row, col) in self.logic.winning_line:
-                    painter.fillRect(0, 0, cell_w, cell_h, QColor(0, 255, 0, 50))
-
-                # Настройка линий (толщина зависит от размера окна)
-                pen_width = max(3, min(cell_w, cell_h) // 15)
-
-                should_draw = True
-                if self.hidden_cell == (row, col):
-                    should_draw = False
-
-                if should_draw:
-                    if symbol == 'X':
-                        pen = QPen(QColor("#4FC3F7"))  # Голубой цвет для X
-                        pen.setWidth(pen_width)
-                        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-                        painter.setPen(pen)
-
-                        margin = int(min(cell_w, cell_h) * 0.25)
-                        painter.drawLine(margin, margin, cell_w - margin, cell_h - margin)
-                        painter.drawLine(cell_w - margin, margin, margin, cell_h - margin)
-
-                    elif symbol == 'O':
-                        pen = QPen(QColor("#FF5252"))  # Красный цвет для O
-                        pen.setWidth(pen_width)
-                        painter.setPen(pen)
-                        painter.setBrush(Qt.BrushStyle.NoBrush)
-
-                        margin = int(min(cell_w, cell_h) * 0.25)
-                        painter.drawEllipse(margin, margin, cell_w - margin * 2, cell_h - margin * 2)
-
-                painter.end()
-                label.setPixmap(pixmap)
-
-    def on_network_message(self, message):
-        # message: "move:1,2"
-        if message.startswith("move:"):
-            try:
-                data = message.split(":")[1]  # "1,2"
-                r, c = map(int, data.split(","))
+        self.board_widget.update()
 
-                symbol = self.logic.turn
-                self.logic.make_move(r, c)
+    def on_network_message(self, data):
+        if data.get("type") == "game_move":
+            move = message_move(self.GAME_ID, data)
+            if move is None or move[0] >= self.logic.rows or move[1] >= self.logic.cols:
+                return
 
+            r, c = move
+            symbol = self.logic.turn
+            if self.logic.make_move(r, c):
                 self.start_animation(r, c, symbol)
-            except:
-                pass
-        elif message == "restart_cmd":
+        elif data.get("type") == "restart_cmd":
             self.logic.reset_game()
             self._update_ui()
 
@@ -295,11 +326,9 @@ class TicTacToeGame(OverlayWindow):
         self.hidden_cell = (r, c)
         self._update_ui()
 
-        # 2. Находим координаты виджета
-        label = self.cells[(r, c)]
-        rect = label.geometry()
-        offset = self.board_container.pos()
-        final_rect = QRect(rect.topLeft() + offset, rect.size())
+        # 2. Находим координаты клетки в окне
+        rect = self.board_widget.cell_rect(r, c)
+        final_rect = QRect(self.board_widget.mapTo(self, rect.topLeft()), rect.size())
 
         # 3. Создаем аниматор
         DrawingAnimation(self, final_rect, symbol, self.finish_animation)
@@ -307,3 +336,24 @@ class TicTacToeGame(OverlayWindow):
     def finish_animation(self):
         self.hidden_cell = None
         self._update_ui()
+
+        if self.ai and not self.logic.game_over and self.logic.turn == self.ai_mark:
+            QTimer.singleShot(250, self.ai_move)
+
+    def ai_move(self):
+        if not self.ai or self.logic.game_over or self.logic.turn != self.ai_mark:
+            return
+        move = self.ai.choose_move(self.logic)
+        if move is None:
+            return
+
+        symbol = self.logic.turn
+        if self.logic.make_move(*move):
+            self.start_animation(move[0], move[1], symbol)
+
+
+class GomokuGame(TicTacToeGame):
+    """Гомоку: поле 15x15, пять в ряд"""
+    GAME_ID = "gomoku"
+    ROWS, COLS, K = 15, 15, 5
+    WINDOW_SIZE = (600, 650)
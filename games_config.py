@@ -1,6 +1,6 @@
 # Импортируем классы игр, чтобы передать их в конфиг
 from games.checkers.ui import CheckersGame
-from games.tic_tac_toe.ui import TicTacToeGame
+from games.tic_tac_toe.ui import TicTacToeGame, GomokuGame
 from games.chess.ui import ChessGame
 from games.battleship.ui import BattleshipGame
 
@@ -29,6 +29,14 @@ GAMES_CONFIG = [
         "tags": ["all", "2_players", "online"],
         "color": "#607D8B"  # Серо-синий цвет
     },
+    {
+        "id": "gomoku",
+        "title": "Гомоку",
+        "class": GomokuGame,
+        "image": "assets/gomoku.jpg",
+        "tags": ["all", "2_players", "online"],
+        "color": "#5D4037"
+    },
     {
         "id": "battleship",
         "title": "Морской бой",
@@ -1,6 +1,7 @@
 import sys
 import os
 import json
+import base64
 import urllib.request
 import threading
 import ssl
@@ -18,6 +19,9 @@ from PyQt6.QtCore import Qt, QTimer, QDateTime, pyqtSignal, QPropertyAnimation,
 
 from core.base_window import OverlayWindow
 from core.network import NetworkClient
+from core.moves import message_move
+from core.game_clock import ClockSync, format_clock
+from core.latency import LatencyTracer
 from core.coin_dialog import CoinFlipDialog
 from core.lobby_dialogs import CreateLobbyDialog, PasswordDialog
 from core.notifications import NotificationManager
@@ -28,6 +32,13 @@ from core.sound_manager import SoundManager
 
 
 CURRENT_VERSION = "0.71"
+# Обрыв в комнате или партии: столько попыток переподключиться с токеном сессии, интервал в мс
+RECONNECT_ATTEMPTS = 10
+RECONNECT_DELAY = 2000
+# Строк в логе комнаты (чат и ходы): старые удаляются
+ROOM_LOG_LIMIT = 300
+# Задержка до сервера (по его пингу), с которой индикатор подключения желтеет, сек
+SLOW_RTT = 0.3
 
 
 # --- ВИДЖЕТ АКТИВНОЙ ИГРЫ (Снизу слева) ---
@@ -182,6 +193,8 @@ class Launcher(OverlayWindow):
         self.network.connected.connect(self.on_connected)
         self.network.disconnected.connect(self.on_disconnected)
         self.network.error_occurred.connect(self.on_net_error)
+        self.latency_tracer = None
+        self.set_latency_trace(SettingsManager().get("latency_trace"))
         self.servers_loaded.connect(self.finish_loading_servers)
         self.update_progress_signal.connect(self.on_update_progress)
         self.update_finished_signal.connect(self.finish_update)
@@ -195,6 +208,18 @@ class Launcher(OverlayWindow):
         self.active_game_id = None
         self.game_cards = {}  # {game_id: card_widget}
 
+        # Часы онлайн-партии: сдвиг до сервера и последнее состояние от него
+        self.clock_sync = ClockSync()
+        self.my_color = None
+        self.is_spectating = False
+
+        # Токен сессии от сервера: с ним после перезапуска сервера возвращаемся на свое место
+        self.session_token = None
+        self.reconnect_attempts = 0
+
+        # Последнее показанное сообщение чата: (лобби, номер) - история после переподключения без повторов
+        self.chat_seen = (None, 0)
+
         sm = SettingsManager()
         snd = SoundManager()
         snd.set_volume(sm.get("volume"))
@@ -206,6 +231,10 @@ class Launcher(OverlayWindow):
 
         self.init_ui()
 
+        self.clock_timer = QTimer(self)
+        self.clock_timer.timeout.connect(self.update_clock_label)
+        self.clock_timer.start(250)
+
         # Автоподключение
         self.fetch_server_list_and_connect()
 
@@ -451,8 +480,12 @@ class Launcher(OverlayWindow):
         lbl_status.setStyleSheet("color: #6b7280; font-size: 10px; font-weight: bold; border: none;")
         self.lbl_running_name = QLabel("Название игры")
         self.lbl_running_name.setStyleSheet("color: white; font-size: 16px; font-weight: bold; border: none;")
+        self.lbl_clock = QLabel("")
+        self.lbl_clock.setStyleSheet("color: #9ca3af; font-size: 12px; font-weight: bold; border: none;")
+        self.lbl_clock.hide()
         text_layout.addWidget(lbl_status)
         text_layout.addWidget(self.lbl_running_name)
+        text_layout.addWidget(self.lbl_clock)
 
         pr_layout.addWidget(dot_run)
         pr_layout.addLayout(text_layout)
@@ -547,6 +580,12 @@ class Launcher(OverlayWindow):
                     border-radius: 5px;
                     border: 1px solid #15803d;
                 """
+        # Стиль для "Подключено, но с задержкой" (amber-500)
+        self.style_slow = """
+                    background-color: #f59e0b;
+                    border-radius: 5px;
+                    border: 1px solid #b45309;
+                """
         self.conn_indicator.setStyleSheet(self.style_disconnected)
         self.conn_indicator.setToolTip("Не подключено")
         h_layout.addWidget(self.conn_indicator)
@@ -679,6 +718,37 @@ class Launcher(OverlayWindow):
         btn_logout.clicked.connect(self.do_logout)
         btn_logout.setStyleSheet("color: #6b7280; border: none; font-size: 11px; margin-top: 5px;")
 
+        # Быстрая игра: сервер сам подбирает соперника по выбранной игре
+        quick_row = QHBoxLayout()
+        self.combo_quick_game = QComboBox()
+        for g in GAMES_CONFIG:
+            if "online" in g["tags"]:
+                self.combo_quick_game.addItem(g["title"], g["id"])
+        self.combo_quick_game.setStyleSheet("""
+                    QComboBox { padding: 8px; background: #1a1a3a; color: white; border: 1px solid #2a2a4a; border-radius: 12px; font-size: 13px; }
+                    QComboBox::drop-down { border: none; }
+                    QComboBox QAbstractItemView { background: #1a1a3a; color: white; selection-background-color: #6366f1; }
+                """)
+        self.btn_quick_match = QPushButton("⚡ Быстрая игра")
+        self.btn_quick_match.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.btn_quick_match.clicked.connect(self.toggle_quick_match)
+        self.btn_quick_match.setStyleSheet("""
+                    QPushButton {
+                        background-color: #6366f1;
+                        color: white;
+                        border-radius: 12px;
+                        padding: 10px;
+                        font-weight: bold;
+                        font-size: 13px;
+                        border: none;
+                    }
+                    QPushButton:hover { background-color: #4f46e5; }
+                """)
+        quick_row.addWidget(self.combo_quick_game, 1)
+        quick_row.addWidget(self.btn_quick_match, 1)
+        self.is_searching = False
+
+        bb_layout.addLayout(quick_row)
         bb_layout.addWidget(btn_create)
         bb_layout.addWidget(btn_logout, alignment=Qt.AlignmentFlag.AlignHCenter)
         pl_layout.addWidget(bottom_box)
@@ -889,6 +959,12 @@ class Launcher(OverlayWindow):
                         lock.setStyleSheet("border: none; background: transparent; color: #fbbf24;")
                         h_layout.addWidget(lock)
 
+                    # Идущая партия: можно смотреть
+                    if l.get("started"):
+                        watch = QLabel(f"👁 {l.get('spectators', 0)}")
+                        watch.setStyleSheet("border: none; background: transparent; color: #9ca3af;")
+                        h_layout.addWidget(watch)
+
                     count_lbl = QLabel(f"{l['players']}/{l['max']}")
                     count_lbl.setStyleSheet("""
                                 background-color: #12122a; color: #a5b4fc; border: 1px solid rgba(99, 102, 241, 0.2);
@@ -919,7 +995,9 @@ class Launcher(OverlayWindow):
             else:
                 return  # Отмена
 
-        self.network.send_json({"type": "join_lobby", "lobby_id": lid, "password": pwd})
+        # В идущую партию входим зрителем
+        ctype = "watch_lobby" if l_data.get("started") else "join_lobby"
+        self.network.send_json({"type": ctype, "lobby_id": lid, "password": pwd})
 
     # Метод выхода (Disconnect)
     def do_logout(self):
@@ -1160,6 +1238,26 @@ class Launcher(OverlayWindow):
 
         content_layout.addWidget(sec_app)
 
+        # === СЕКЦИЯ: КОМПЬЮТЕР ===
+        sec_ai = self.create_settings_section("КОМПЬЮТЕР")
+        sec_ai_layout = sec_ai.layout()
+
+        self.check_vs_ai = QCheckBox("Оффлайн-игры против компьютера")
+        self.check_vs_ai.setChecked(SettingsManager().get("vs_computer"))
+        self.check_vs_ai.toggled.connect(lambda checked: SettingsManager().set("vs_computer", checked))
+        self.check_vs_ai.setStyleSheet(self.check_mute.styleSheet())
+        sec_ai_layout.addWidget(self.check_vs_ai)
+
+        sec_ai_layout.addWidget(QLabel("Сила компьютера", styleSheet="color: #ccc; font-size: 14px;"))
+        self.slider_ai = QSlider(Qt.Orientation.Horizontal)
+        self.slider_ai.setRange(0, 100)
+        self.slider_ai.setValue(int(SettingsManager().get("ai_strength") * 100))
+        self.slider_ai.valueChanged.connect(lambda val: SettingsManager().set("ai_strength", val / 100.0))
+        self.slider_ai.setStyleSheet(self.slider_vol.styleSheet())
+        sec_ai_layout.addWidget(self.slider_ai)
+
+        content_layout.addWidget(sec_ai)
+
         # === СЕКЦИЯ 2: СЕТЬ ===
         sec_net = self.create_settings_section("СЕТЬ И СЕРВЕРЫ")
         net_layout = sec_net.layout()
@@ -1206,6 +1304,13 @@ class Launcher(OverlayWindow):
         btn_box.addWidget(btn_apply_server)
         net_layout.addLayout(btn_box)
 
+        self.check_latency = QCheckBox("Записывать задержку ходов соперника (latency.jsonl)")
+        self.check_latency.setChecked(SettingsManager().get("latency_trace"))
+        self.check_latency.toggled.connect(lambda checked: SettingsManager().set("latency_trace", checked))
+        self.check_latency.toggled.connect(self.set_latency_trace)
+        self.check_latency.setStyleSheet(self.check_mute.styleSheet())
+        net_layout.addWidget(self.check_latency)
+
         content_layout.addWidget(sec_net)
 
         scroll.setWidget(content)
@@ -1413,7 +1518,10 @@ class Launcher(OverlayWindow):
 
     def on_connected(self):
         self.is_connecting = False
-        self.network.send_json({"type": "login", "name": self.inp_name.text()})
+        login = {"type": "login", "name": self.inp_name.text()}
+        if self.session_token:
+            login["session"] = self.session_token
+        self.network.send_json(login)
         self.notifications.show("Сервер", "Подключено успешно!", "success")
         self.conn_indicator.setStyleSheet(self.style_connected)
         self.conn_indicator.setToolTip("Подключено")
@@ -1421,9 +1529,22 @@ class Launcher(OverlayWindow):
     def on_disconnected(self):
         if self.is_connecting:
             return
+        if self.current_lobby_id and self.session_token and self.reconnect_attempts < RECONNECT_ATTEMPTS:
+            # Сервер мог перезапуститься: комната и партия ждут нас по токену сессии
+            if not self.reconnect_attempts:
+                self.notifications.show("Сервер", "Соединение разорвано, переподключение...", "warning")
+            self.reconnect_attempts += 1
+            self.conn_indicator.setStyleSheet(self.style_disconnected)
+            self.conn_indicator.setToolTip("Переподключение")
+            QTimer.singleShot(RECONNECT_DELAY, lambda: self.network.connect_to(
+                self.network.target_ip, self.network.target_port))
+            return
+        self.reconnect_attempts = 0
+        self.current_lobby_id = None
         self.notifications.show("Сервер", "Соединение разорвано", "error")
         self.net_stack.setCurrentIndex(0)
         self.lobby_list_widget.clear()
+        self.set_searching(False)
         self.conn_indicator.setStyleSheet(self.style_disconnected)
         self.conn_indicator.setToolTip("Не подключено")
 
@@ -1436,10 +1557,28 @@ class Launcher(OverlayWindow):
         if dtype == "lobby_list":
             self.update_lobby_list(data["lobbies"])
 
+        elif dtype == "session":
+            # Тот же токен - сервер вернул нас на место, новый - место не сохранилось
+            resumed = data["token"] == self.session_token
+            self.session_token = data["token"]
+            if self.reconnect_attempts and not resumed:
+                self.on_server_data({"type": "kicked", "msg": "Комната не сохранилась"})
+            self.reconnect_attempts = 0
+
         elif dtype == "lobby_state":
+            self.set_searching(False)  # Быстрая игра нашла соперника
             self.update_room_ui(data)
 
+        elif dtype == "match_queued":
+            self.set_searching(True)
+
+        elif dtype == "match_cancelled":
+            self.set_searching(False)
+            if data.get("msg"):
+                self.notifications.show("Быстрая игра", data["msg"], "warning")
+
         elif dtype == "kicked":
+            self.is_spectating = False
             self.notifications.show("Лобби", data["msg"], "warning")
             self.net_stack.setCurrentIndex(0)
             self.current_lobby_id = None
@@ -1483,17 +1622,69 @@ class Launcher(OverlayWindow):
                 self.active_game.close()
                 self.active_game = None
 
-            self.notifications.show("Игра", "Игра начинается!", "success")
+            if data.get("resumed"):
+                self.notifications.show("Игра", "Партия продолжается", "success")
+            else:
+                self.notifications.show("Игра", "Игра начинается!", "success")
             self.launch_online_game(data["game"], data["color"])
+            self.start_clock_sync(data["color"])
+            if data.get("state") and self.active_game:
+                self.restore_game_state(data)  # Возвращение в партию после перезапуска сервера
 
-        elif dtype == "game_move" and self.active_game:
-            if "data" in data:
-                self.active_game.on_network_message(f"move:{data['data']}")
-            else:
-                # Если это сложный объект (Морской бой) - передаем весь словарь
-                self.active_game.on_network_message(data)
+            if data.get("server_shots") and hasattr(self.active_game, "server_resolved"):
+                self.active_game.server_resolved = True
 
-            self.process_log_entry(data, "Соперник")
+        elif dtype == "game_move" and self.active_game:
+            tr = data.get("tr") if self.latency_tracer else None
+            if isinstance(tr, dict):
+                self.network._stamp(tr, "pd")
+            self.active_game.on_network_message(data)
+            if isinstance(tr, dict):
+                # Трасса заканчивается отрисовкой хода, а не постановкой ее в очередь
+                self.active_game.repaint()
+                self.network._stamp(tr, "pp")
+                self.latency_tracer.write(tr, self.active_game_id, self.current_lobby_id)
+
+            self.process_log_entry(data, "Ход" if self.is_spectating else "Соперник")
+
+        elif dtype == "resync" and self.active_game:
+            # Судья на сервере отклонил наш ход - берем его состояние партии
+            if self.restore_game_state(data):
+                self.add_to_log("Сервер отклонил ход, позиция восстановлена")
+
+        # ЗРИТЕЛЬ
+        elif dtype == "spectate_start":
+            self.start_spectating(data)
+
+        elif dtype == "spectate_sync" and self.is_spectating and self.active_game:
+            # Новая партия или мы отстали - позиция целиком
+            self.restore_game_state(data)
+
+        elif dtype == "clock":
+            self.clock_sync.on_clock(data)
+            self.update_clock_label()
+
+        elif dtype == "clock_sync":
+            self.clock_sync.on_reply(data)
+
+        elif dtype == "ping":
+            # На пинг уже ответил поток сети; rtt - задержка, которую намерил сервер
+            rtt = data.get("rtt")
+            if isinstance(rtt, (int, float)):
+                self.conn_indicator.setStyleSheet(self.style_slow if rtt > SLOW_RTT else self.style_connected)
+                self.conn_indicator.setToolTip(f"Подключено, задержка {rtt * 1000:.0f} мс")
+
+        elif dtype == "game_over":
+            results = {"win": ("Победа!", "success"), "loss": ("Поражение", "info"), "draw": ("Ничья", "info")}
+            text, kind = results.get(data.get("result"), ("Игра окончена", "info"))
+            if "winner" in data:
+                # Зрителю - кто победил, а не наш результат
+                winners = {"white": "Победили белые", "black": "Победили черные", "draw": "Ничья"}
+                text, kind = winners.get(data["winner"], "Игра окончена"), "info"
+            if data.get("reason") == "timeout":
+                text += " (время вышло)"
+            self.notifications.show("Игра", text, kind)
+            self.add_to_log(f"Итог партии: {text}")
 
         elif dtype == "restart_cmd" and self.active_game:
             self.active_game.logic.reset_game()
@@ -1502,6 +1693,8 @@ class Launcher(OverlayWindow):
 
         elif dtype == "restart_swap" and self.active_game:
             new_color = data["color"]
+            self.my_color = new_color
+            self.clock_sync.state = None
             # Вызываем метод смены сторон в игре
             if hasattr(self.active_game, "swap_sides"):
                 self.active_game.swap_sides(new_color)
@@ -1516,6 +1709,19 @@ class Launcher(OverlayWindow):
             sender = data.get("sender", "Неизвестный")
             text = data.get("text", "")
             self.add_to_log(f"{sender}: {text}")
+            self.chat_seen = (self.current_lobby_id, data.get("seq", 0))
+
+        elif dtype == "chat_history":
+            # Чат до нашего входа или пока нас не было; уже показанное пропускаем
+            lobby_id, seen = self.chat_seen
+            returning = lobby_id == data["lobby_id"]
+            for msg in data["messages"]:
+                if returning and (msg["seq"] <= seen or msg.get("mine")):
+                    continue
+                author = "Вы" if msg.get("mine") else msg["sender"]
+                self.add_to_log(f"{author}: {msg['text']}", msg.get("ts"))
+            if data["messages"]:
+                self.chat_seen = (data["lobby_id"], max(seen if returning else 0, data["messages"][-1]["seq"]))
 
     def on_client_data(self, data):
         if data.get("type") == "game_move" and self.active_game:
@@ -1542,6 +1748,17 @@ class Launcher(OverlayWindow):
 
         self.network.send_json({"type": "join_lobby", "lobby_id": lid, "password": pwd})
 
+    def toggle_quick_match(self):
+        if self.is_searching:
+            self.network.send_json({"type": "cancel_match"})
+        else:
+            self.network.send_json({"type": "quick_match", "game_id": self.combo_quick_game.currentData()})
+
+    def set_searching(self, searching):
+        self.is_searching = searching
+        self.btn_quick_match.setText("Отменить поиск" if searching else "⚡ Быстрая игра")
+        self.combo_quick_game.setEnabled(not searching)
+
     def open_create_dialog(self):
         dlg = CreateLobbyDialog(self)
         if dlg.exec():
@@ -1644,6 +1861,71 @@ class Launcher(OverlayWindow):
             traceback.print_exc()
             self.notifications.show("Ошибка запуска", str(e), "error")
 
+    def restore_game_state(self, data):
+        """Позиция из снимка сервера (base64 от to_bytes логики). True, если получилось"""
+        try:
+            state = base64.b64decode(data["state"])
+            self.active_game.logic = type(self.active_game.logic).from_bytes(state)
+        except (KeyError, ValueError):
+            return False
+        self.active_game._update_ui()
+        return True
+
+    def start_spectating(self, data):
+        """Окно партии только для просмотра: своего цвета нет, ходы приходят от сервера"""
+        if self.active_game:
+            self.active_game.close()
+            self.active_game = None
+
+        self.launch_online_game(data["game"], "white")
+        if not self.active_game:
+            return
+        for attr in ("my_color", "my_mark"):
+            if hasattr(self.active_game, attr):
+                setattr(self.active_game, attr, None)  # Ни одна сторона не наша - клики игнорируются
+        self.is_spectating = True
+        self.restore_game_state(data)
+        self.start_clock_sync(None)
+
+        names = data.get("players", {})
+        self.add_to_log(f"Вы смотрите: {names.get('white', '?')} (белые) - {names.get('black', '?')} (черные)")
+
+    def set_latency_trace(self, enabled):
+        """Трассировка задержки ходов (core.latency): время ввода, метки в ходах, запись в файл"""
+        app = QApplication.instance()
+        if enabled and self.latency_tracer is None:
+            self.latency_tracer = LatencyTracer()
+            app.installEventFilter(self.latency_tracer)
+        elif not enabled and self.latency_tracer is not None:
+            app.removeEventFilter(self.latency_tracer)
+            self.latency_tracer = None
+        self.network.tracer = self.latency_tracer
+
+    def start_clock_sync(self, my_color):
+        """Новая партия: часы сбрасываются, сдвиг до сервера меряем парой запросов"""
+        self.my_color = my_color
+        self.clock_sync.state = None
+        self.network.send_json(self.clock_sync.request())
+        QTimer.singleShot(1000, lambda: self.network.send_json(self.clock_sync.request()))
+
+    def update_clock_label(self):
+        state = self.clock_sync.state
+        if not state or not self.active_game or (self.my_color is None and not self.is_spectating):
+            self.lbl_clock.hide()
+            return
+
+        if self.is_spectating:
+            sides = (("Белые", "white"), ("Черные", "black"))
+        else:
+            opponent = "black" if self.my_color == "white" else "white"
+            sides = (("Вы", self.my_color), ("Соперник", opponent))
+        parts = []
+        for title, color in sides:
+            mark = "▶ " if state.get("turn") == color else ""
+            parts.append(f"{mark}{title} {format_clock(self.clock_sync.left(color))}")
+        self.lbl_clock.setText("   ".join(parts))
+        self.lbl_clock.show()
+
     def add_active_game_widget(self, game_window, title):
         if self.active_game and self.active_game != game_window:
             try:
@@ -1673,6 +1955,11 @@ class Launcher(OverlayWindow):
             self.active_game_id = None
             self.is_game_running = False
 
+            if self.is_spectating:
+                # Закрыли окно просмотра - уходим из зрителей
+                self.is_spectating = False
+                self.network.send_json({"type": "leave_lobby"})
+
             # Сбрасываем статус внизу (Серая точка)
             self.set_game_status(False)
 
@@ -1682,10 +1969,12 @@ class Launcher(OverlayWindow):
                 self.notifications.show("Лобби", "Игра завершена. Статус: Не готов", "info")
                 self.add_to_log("Игра завершена")
 
-    def add_to_log(self, message):
-        time_str = QDateTime.currentDateTime().toString("HH:mm:ss")
-        item = QListWidgetItem(f"[{time_str}] {message}")
+    def add_to_log(self, message, ts=None):
+        when = QDateTime.fromSecsSinceEpoch(int(ts)) if ts else QDateTime.currentDateTime()
+        item = QListWidgetItem(f"[{when.toString('HH:mm:ss')}] {message}")
         self.room_log.addItem(item)
+        while self.room_log.count() > ROOM_LOG_LIMIT:
+            self.room_log.takeItem(0)
 
     def format_coord(self, r, c, game_type):
         """Конвертирует (row, col) в строку для лога"""
@@ -1697,8 +1986,8 @@ class Launcher(OverlayWindow):
                 letters = "ABCDEFGH"
                 return f"{letters[c]}{8 - r}"
 
-            elif game_type == "tic_tac_toe":
-                # Крестики: Ряд 1..3, Стлб 1..3
+            elif game_type in ["tic_tac_toe", "gomoku"]:
+                # Крестики и гомоку: Ряд 1..N, Стлб 1..N
                 return f"Ряд {r + 1}, Стлб {c + 1}"
 
             elif game_type == "battleship":
@@ -1719,37 +2008,34 @@ class Launcher(OverlayWindow):
 
         # --- ШАШКИ И ШАХМАТЫ ---
         if self.active_game_id in ["chess", "checkers"]:
-            if "data" in data and ":" in data["data"]:
-                try:
-                    # data="r1,c1:r2,c2"
-                    start, end = data["data"].split(":")
-                    r1, c1 = start.split(",")
-                    r2, c2 = end.split(",")
-
-                    p1 = self.format_coord(r1, c1, self.active_game_id)
-                    p2 = self.format_coord(r2, c2, self.active_game_id)
-                    self.add_to_log(f"{source}: {p1} -> {p2}")
-                except:
-                    pass
+            move = message_move(self.active_game_id, data)
+            if move:
+                (r1, c1), (r2, c2) = move
+                p1 = self.format_coord(r1, c1, self.active_game_id)
+                p2 = self.format_coord(r2, c2, self.active_game_id)
+                self.add_to_log(f"{source}: {p1} -> {p2}")
 
         # --- КРЕСТИКИ-НОЛИКИ ---
-        elif self.active_game_id == "tic_tac_toe":
-            if "data" in data:
-                try:
-                    r, c = data["data"].split(",")
-                    pos = self.format_coord(r, c, self.active_game_id)
-                    self.add_to_log(f"{source}: {pos}")
-                except:
-                    pass
+        elif self.active_game_id in ["tic_tac_toe", "gomoku"]:
+            move = message_move(self.active_game_id, data)
+            if move:
+                pos = self.format_coord(move[0], move[1], self.active_game_id)
+                self.add_to_log(f"{source}: {pos}")
 
         # --- МОРСКОЙ БОЙ ---
         elif self.active_game_id == "battleship":
             subtype = data.get("sub_type")
+            if subtype == "shot_result" and data.get("incoming"):
+                # Сервер сам разрешил выстрел соперника: ход и результат в одном пакете
+                pos = self.format_coord(data.get("r"), data.get("c"), self.active_game_id)
+                self.add_to_log(f"{source}: стреляет в {pos}")
+
             if subtype == "shot":
-                r, c = data.get("r"), data.get("c")
-                pos = self.format_coord(r, c, self.active_game_id)
-                action = "стреляет в" if source == "Соперник" else "выстрел в"
-                self.add_to_log(f"{source}: {action} {pos}")
+                shot = message_move(self.active_game_id, data)
+                if shot:
+                    pos = self.format_coord(shot[0], shot[1], self.active_game_id)
+                    action = "стреляет в" if source == "Соперник" else "выстрел в"
+                    self.add_to_log(f"{source}: {action} {pos}")
 
             elif subtype == "shot_result":
                 # Результат логируем, только если это ответ на НАШ выстрел (или наоборот, по желанию)
@@ -1763,7 +2049,7 @@ class Launcher(OverlayWindow):
                 # Если data пришла от сервера -> Соперник сообщает результат МОЕГО выстрела.
                 # Если data отправлена мной -> Я сообщаю результат ЕГО выстрела.
 
-                if source == "Соперник":
+                if source == "Соперник" and not data.get("incoming"):
                     self.add_to_log(f"Результат вашего выстрела: {ru_status}")
                 else:
                     self.add_to_log(f"Результат выстрела соперника: {ru_status}")
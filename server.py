@@ -1,28 +1,132 @@
 #!/usr/bin/env python3
+import argparse
 import asyncio
-import json
+import base64
+import os
 import uuid
 import random
+import signal
+import socket
+import struct
+import time
+
+from core.moves import decode_move, encode_move, legacy_message, message_move
+from core.wire import (PROTO_VERSION, CAP_STRUCT, CAP_HEARTBEAT, CAP_SHOTS, CAP_MOVES, HEADER, negotiate, encode_line, encode_frame, decode_json,
+                       decode_body, read_frame_raw)
+from games.battleship.fleet import FleetMask
+from server_core import handoff
+from server_core.actor import Actor
+from server_core.auth import hash_password, check_password, session_key, as_session_key
+from server_core import capture
+from server_core.chat import ChatHistory
+from server_core.clock import GameClock
+from server_core import log as server_log
+from server_core.journal import Journal
+from server_core.loop_monitor import LoopMonitor
+from server_core.matchmaking import Matchmaker
+from server_core.metrics import REGISTRY, serve_metrics
+from server_core.ratelimit import RateLimiter
+from server_core.recovery import Detached, new_image, rebuild
+from server_core.spectators import Audience
+from server_core.referee import Referee, warm_up, shutdown as shutdown_referee
+from server_core.timer_wheel import TimerWheel
 
 HOST = '0.0.0.0'
 PORT = 5555
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 5556
+
+# Морской бой: если оба игрока заявили CAP_SHOTS, клиенты присылают флот при готовности и выстрелы
+# разрешает сервер; со старым клиентом в лобби выстрелы и результаты пересылаются как есть
+SERVER_RESOLVED_SHOTS = True
+# Шахматы, шашки, крестики-нолики: сервер проверяет ходы по правилам и сам видит конец партии
+REFEREE_MODE = True
+# Быстрая игра: игры с очередью и как часто пересматривать очереди (окна рейтинга растут), сек
+QUICK_MATCH_GAMES = {"chess", "checkers", "tic_tac_toe", "gomoku", "battleship"}
+QUICK_MATCH_SWEEP = 1.0
+# Зрители: только партии под судьей (у сервера есть снимок), не больше стольких на лобби
+SPECTATOR_LIMIT = 500
+# Защита от флуда: самое длинное сообщение клиента (байт) и ведра токенов соединения
+# {тип: (в секунду, подряд)}; "*" - все сообщения вместе, проверяется до разбора
+MAX_MESSAGE = 16 * 1024
+RATE_LIMITS = {
+    "*": (30, 60),
+    "login": (0.2, 3),
+    "create_lobby": (0.5, 3),
+    "join_lobby": (1, 5),
+    "watch_lobby": (1, 5),
+    "select_game": (2, 5),
+    "toggle_ready": (2, 3),
+    "restart_game": (0.5, 2),
+    "quick_match": (1, 3),
+    "cancel_match": (1, 3),
+    "clock_sync": (2, 6),
+    "pong": (1, 3),
+    "chat_msg": (1, 5),
+    "game_emote": (1, 3),
+}
+# Сверх лимита типа эти сообщения отбрасываются (с одним предупреждением на серию), toggle_ready
+# схлопывается до последнего статуса, а остальные - запросы, на которые клиент ждет ответа, - ждут токена
+RATE_DROPPED = {"chat_msg", "game_emote", "pong"}
+# Пинг клиентов с CAP_HEARTBEAT: раз в столько секунд; столько пингов подряд без ответа - отключаем
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT_MISSES = 4
+# Журнал лобби для восстановления после падения: где лежит, сколько ждать вернувшихся игроков (сек)
+# и после скольких закрытых лобби и законченных партий сжимать его до снимка
+JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "journal")
+RESUME_GRACE = 120
+COMPACT_AFTER = 100
+# Передача новому процессу (server.py --takeover): сколько ждать подтверждения и опустошения буферов записи, сек
+HANDOFF_TIMEOUT = 10
+HANDOFF_FLUSH = 2.0
+# Монитор цикла событий: файл с зависаниями цикла и их стеками (ротируется)
+LOOP_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "loop.log")
+# Лог сервера (JSON по строкам, ротируется); уровень и доли trace-событий меняются флагами запуска
+SERVER_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "server.log")
+
+
+log = server_log.get_logger("server")
 
 
 # --- СТРУКТУРЫ ДАННЫХ ---
 
 class Lobby:
-    def __init__(self, lobby_id, name, host_writer, is_private=False, password=""):
+    def __init__(self, lobby_id, name, host_writer, is_private=False, password="", seed=None, rng=None):
         self.id = lobby_id
         self.name = name
         self.host = host_writer  # Используем writer как идентификатор соединения
         self.is_private = is_private
-        self.password = password
+        self.password = password  # Соленый хеш (auth.hash_password), пустой - без пароля
         self.selected_game_id = None
         self.game_started = False
 
+        # Все случайные решения лобби (монетка, кто ее бросает) - из своего генератора: seed
+        # берется у генератора сервера и пишется в журнал; rng можно подставить свой
+        self.seed = rng_seed() if seed is None else seed
+        self.rng = random.Random(self.seed) if rng is None else rng
+
+        # Морской бой в режиме сервера: {writer: FleetMask} и чей сейчас выстрел
+        self.server_shots = False
+        self.fleets = {}
+        self.shot_turn = None
+
+        # Режим судьи: логика партии на сервере и цвета игроков {writer: 'white'/'black'}
+        self.referee = None
+        self.colors = {}
+
+        # Часы партии (GameClock) - только там, где сервер знает, чей ход
+        self.clock = None
+
         # {writer: {"name": "...", "ready": False, "id": 1}}
         self.players = {}
 
+        # Последние сообщения чата - для тех, кто войдет позже
+        self.chat = ChatHistory()
+
+        # Зрители партии (только чтение) и задача, которая владеет лобби (open_lobby)
+        self.audience = Audience()
+        self.actor = None
+
     def add_player(self, writer, name):
         pid = 1 if writer == self.host else len(self.players) + 1
         self.players[writer] = {
@@ -43,9 +147,15 @@ class Lobby:
             "name": self.name,
             "private": self.is_private,
             "players": len(self.players),
-            "max": 2
+            "max": 2,
+            "started": self.game_started,
+            "spectators": len(self.audience)
         }
 
+    def watchable(self):
+        """Партию можно смотреть: она идет, и у сервера есть ее состояние"""
+        return self.game_started and self.referee is not None
+
     def get_full_state(self):
         pl_list = []
         for w, p in self.players.items():
@@ -67,28 +177,186 @@ class Lobby:
 
 # Глобальные переменные
 lobbies = {}  # {lobby_id: Lobby}
-clients = {}  # {writer: {"name": "...", "current_lobby": id}}
+clients = {}  # {writer: {"name": "...", "current_lobby": id, "session": токен, "shots": заявил CAP_SHOTS, "moves": заявил CAP_MOVES}}
+framed = {}  # Клиенты на кадрах (протокол 2): {writer: можно ли компактные тела}
+timers = TimerWheel()  # Все часы партий; колесо двигает одна задача из main()
+matchmaker = Matchmaker()  # Очереди быстрой игры
+journal = None  # Journal (открывает main)
+monitor = None  # LoopMonitor (запускает main)
+detached = {}  # Места, которые ждут игроков после перезапуска: {сессия: (lobby_id, Detached)}
+finished_since_compaction = 0
+beats = {}  # Клиенты, отвечающие на пинг: {writer: {"missed": пингов без ответа, "rtt": сглаженное, сек}}
+# Все соединения: {writer: {"reader", "header": начало недочитанного кадра, "busy": разбирает сообщение,
+#                           "limits": RateLimiter, "warned": предупрежден о лимите, "ready": отложенный toggle_ready,
+#                           "cid": номер в записи трафика, "raw": последнее сообщение как пришло (строка или
+#                           (вид, тело) кадра), "held": оно же, пока ждет токена типа (admit)}}
+connections = {}
+# Генератор сервера: номера лобби и seed генераторов лобби (Lobby.rng). Seed задает main, и запись
+# трафика с тем же seed воспроизводится так же. Токены сессий - не отсюда, они секрет.
+# При --takeover seed и состояние генератора приходят от старого процесса (take_over)
+rng = random.Random()
+server_seed = None
+recorder = None  # capture.Capture (server.py --record)
+reading = asyncio.Event()  # Сброшен, пока сервер передается новому процессу
+reading.set()
+listener = None  # asyncio.Server на PORT
+background = []  # Задачи колеса таймеров и журнала
+adopted = set()  # Обработчики соединений, полученных от старого процесса
 
 
 # --- ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ---
 
 async def send_json(writer, data):
-    """Асинхронная отправка JSON"""
+    """Асинхронная отправка сообщения в формате, который выбрал клиент"""
     try:
         if writer.is_closing(): return
-        msg = json.dumps(data) + "\n"
-        writer.write(msg.encode('utf-8'))
+        if writer in framed:
+            writer.write(encode_frame(data, framed[writer]))
+        else:
+            writer.write(encode_line(data))
         await writer.drain()  # Ждем, пока данные уйдут в буфер
     except Exception:
         pass
 
 
+async def read_message(reader, writer):
+    """Следующее сообщение клиента: dict или None (битое или длиннее MAX_MESSAGE). При разрыве - EOFError"""
+    conn = connections[writer]
+    conn["busy"] = False
+    limits = conn["limits"]
+    while not limits.allow():
+        # Сверх общего лимита: следующее сообщение не читаем, пока не накопится токен -
+        # оно ждет в буфере сокета, и флудер сам упирается в TCP
+        await asyncio.sleep(limits.wait())
+    await reading.wait()  # На время передачи процесса новые сообщения не разбираем
+    if writer.is_closing():
+        raise EOFError  # Соединение передано новому процессу
+    try:
+        if writer in framed:
+            frame = await read_frame_raw(reader, conn["header"], MAX_MESSAGE)
+        else:
+            raw = await reader.readline()
+            if not raw:
+                raise EOFError
+    except ValueError:
+        # Длиннее MAX_MESSAGE. Строку StreamReader уже выбросил, длинный кадр - конец соединения
+        REGISTRY.counter("oversized_messages_total").inc()
+        if writer in framed:
+            raise
+        return None
+    conn["raw"] = frame if writer in framed else raw
+    if recorder:
+        recorder.received(conn["cid"], wire_bytes(conn["raw"]))
+    conn["busy"] = True
+    return decode_body(*frame) if writer in framed else decode_json(raw)
+
+
+def wire_bytes(message):
+    """Сообщение в том виде, в каком пришло по сети: строка или (вид, тело) кадра"""
+    if message is None:
+        return b""
+    if isinstance(message, tuple):
+        kind, body = message
+        return HEADER.pack(len(body), kind) + body
+    return message
+
+
+async def admit(writer, ctype, data):
+    """Лимит по типу сообщения: True - обрабатываем сейчас (возможно, дождавшись токена), см. RATE_DROPPED"""
+    conn = connections[writer]
+    if ctype == "toggle_ready" and conn["ready"] is not None:
+        defer_ready(writer, data.get("status"))  # Уже ждет отложенный статус - новый его заменяет
+        return False
+    if conn["limits"].allow(ctype):
+        conn["warned"] = False
+        return True
+    if ctype == "toggle_ready":
+        defer_ready(writer, data.get("status"))
+        return False
+    if ctype not in RATE_DROPPED:
+        return await hold(writer, ctype)
+    if not conn["warned"]:
+        conn["warned"] = True  # Одно предупреждение на серию, иначе ответы сами станут флудом
+        await send_json(writer, {"type": "error", "msg": "Слишком много сообщений, подождите"})
+    return False
+
+
+async def hold(writer, ctype):
+    """
+    Запрос сверх лимита ждет токена, а соединение пока не читается. Пока ждет,
+    сообщение не считается разбираемым: передача процесса его не ждет, а
+    отдает новому процессу вместе с непрочитанным (handoff_state).
+    """
+    conn = connections[writer]
+    conn["held"], conn["busy"] = conn["raw"], False
+    while True:
+        await asyncio.sleep(conn["limits"].wait(ctype))
+        await reading.wait()
+        if writer.is_closing():
+            return False  # Передано новому процессу или закрыто
+        if conn["limits"].allow(ctype):
+            break
+    conn["held"], conn["busy"] = None, True
+    return True
+
+
+def defer_ready(writer, status):
+    """Частые toggle_ready схлопываются: актору уйдет последний статус, когда появится токен"""
+    conn = connections[writer]
+    if conn["ready"] is None:
+        timers.schedule(conn["limits"].wait("toggle_ready"), flush_ready, writer)
+    conn["ready"] = bool(status)
+    REGISTRY.counter("ready_coalesced_total").inc()
+
+
+def flush_ready(writer):
+    conn = connections.get(writer)
+    if conn is None or conn["ready"] is None:
+        return
+    status, conn["ready"] = conn["ready"], None
+    if conn["limits"].allow("toggle_ready"):
+        route_to_lobby(writer, {"type": "toggle_ready", "status": status})
+    else:
+        defer_ready(writer, status)
+
+
+def sweep_heartbeats():
+    """Одна задача на всех: пинг каждому клиенту с CAP_HEARTBEAT, молчащих - отключаем"""
+    now = time.monotonic()
+    for writer, beat in list(beats.items()):
+        if writer.is_closing():
+            continue
+        if beat["missed"] >= HEARTBEAT_MISSES:
+            # Полуоткрытое соединение: сама ОС заметит его через часы
+            REGISTRY.counter("heartbeat_reaped_total").inc()
+            writer.transport.abort()
+            continue
+        beat["missed"] += 1
+        data = {"type": "ping", "t": now, "rtt": beat["rtt"]}
+        writer.write(encode_frame(data, framed[writer]) if writer in framed else encode_line(data))
+    timers.schedule(HEARTBEAT_INTERVAL, sweep_heartbeats)
+
+
+def on_pong(writer, data):
+    beat = beats.get(writer)
+    sent = data.get("t")
+    if beat is None or not isinstance(sent, (int, float)):
+        return
+    rtt = time.monotonic() - sent
+    if not 0 <= rtt <= HEARTBEAT_INTERVAL * HEARTBEAT_MISSES:
+        return  # Чужое t
+    beat["missed"] = 0
+    # Сглаживание как у SRTT в TCP: один медленный ответ не дергает индикатор клиента
+    beat["rtt"] = rtt if beat["rtt"] is None else beat["rtt"] * 0.875 + rtt * 0.125
+    REGISTRY.histogram("heartbeat_rtt_seconds").observe(rtt)
+
+
 async def broadcast_lobby_list():
     """Рассылает список комнат всем свободным игрокам"""
-    lobby_list = [l.to_dict() for l in lobbies.values() if not l.game_started]
+    lobby_list = [l.to_dict() for l in lobbies.values() if not l.game_started or l.watchable()]
     msg = {"type": "lobby_list", "lobbies": lobby_list}
 
-    for writer, data in clients.items():
+    for writer, data in list(clients.items()):  # На await клиенты могут отключиться
         if data["current_lobby"] is None:
             await send_json(writer, msg)
 
@@ -102,29 +370,66 @@ async def broadcast_lobby_state(lobby):
         await send_json(writer, state)
 
 
-async def leave_current_lobby(writer):
-    """Логика выхода из лобби"""
-    if writer not in clients: return
-    lid = clients[writer]["current_lobby"]
+def open_lobby(lobby):
+    """Регистрирует лобби и запускает задачу-актора, которая им владеет"""
+    lobbies[lobby.id] = lobby
+    lobby.actor = Actor(lobby.id, lambda writer, data: handle_lobby_command(lobby, writer, data))
+    REGISTRY.gauge("lobbies_open").set(len(lobbies))
 
-    if lid and lid in lobbies:
-        lobby = lobbies[lid]
-        should_close = lobby.remove_player(writer)
+
+def close_lobby(lobby):
+    """Вызывается из актора лобби: новые команды больше не принимаются"""
+    lobbies.pop(lobby.id, None)
+    lobby.actor.close()
+    lobby.chat.clear()
+    REGISTRY.gauge("lobbies_open").set(len(lobbies))
+
+
+def route_to_lobby(writer, data):
+    """Команду для лобби кладем в очередь его актора; False - такого лобби нет"""
+    if data.get("type") in ("join_lobby", "watch_lobby"):
+        lid = data.get("lobby_id")
+    else:
+        lid = clients[writer]["current_lobby"] if writer in clients else None
+    lobby = lobbies.get(lid) if isinstance(lid, str) else None
+    return lobby is not None and lobby.actor.post(writer, data)
+
+
+async def leave_lobby(lobby, writer):
+    """Логика выхода из лобби (выполняется актором лобби)"""
+    if writer not in lobby.players: return
+    record("leave", lobby, session=journal_session(writer))
+    should_close = lobby.remove_player(writer)
+    if lobby.clock:
+        lobby.clock.stop()
+    if writer in clients and clients[writer]["current_lobby"] == lobby.id:
         clients[writer]["current_lobby"] = None
 
-        if should_close:
-            del lobbies[lid]
-            # Выкидываем остальных, если хост ушел
-            for w in list(lobby.players.keys()):
-                clients[w]["current_lobby"] = None
-                await send_json(w, {"type": "kicked", "msg": "Хост покинул лобби"})
-                # Удаляем из списка игроков, чтобы цикл не сломался
-                if w in lobby.players: del lobby.players[w]
-        else:
-            await broadcast_lobby_state(lobby)
+    if should_close:
+        close_lobby(lobby)
+        record_finished("close", lobby)
+        # Выкидываем остальных, если хост ушел
+        for w in list(lobby.players.keys()):
+            if w in clients: clients[w]["current_lobby"] = None
+            await send_json(w, {"type": "kicked", "msg": "Хост покинул лобби"})
+            # Удаляем из списка игроков, чтобы цикл не сломался
+            if w in lobby.players: del lobby.players[w]
+        for w in list(lobby.audience.watchers):
+            if w in clients: clients[w]["current_lobby"] = None
+            await send_json(w, {"type": "kicked", "msg": "Игра закончилась"})
+        lobby.audience.clear()
+    else:
+        await broadcast_lobby_state(lobby)
 
-        await broadcast_lobby_list()
-        await send_json(writer, {"type": "left_lobby_success"})
+    await broadcast_lobby_list()
+    await send_json(writer, {"type": "left_lobby_success"})
+
+
+async def send_chat_history(lobby, writer):
+    """Недавний чат тому, кто вошел в комнату или вернулся в нее"""
+    if lobby.chat.entries:
+        await send_json(writer, {"type": "chat_history", "lobby_id": lobby.id,
+                                 "messages": lobby.chat.history(session_of(writer))})
 
 
 async def start_game_sequence(lobby):
@@ -135,13 +440,75 @@ async def start_game_sequence(lobby):
     players = list(lobby.players.keys())
     if len(players) < 2: return  # Защита
 
-    picker = random.choice(players)
+    picker = lobby.rng.choice(players)
     waiter = players[0] if players[1] == picker else players[1]
 
     await send_json(picker, {"type": "match_found", "role": "picker"})
     await send_json(waiter, {"type": "match_found", "role": "waiter"})
 
 
+def start_quick_match(game_id, host, guest):
+    """Пара из очереди: новое лобби, обоих игроков добавит и запустит его актор"""
+    lobby = Lobby(new_lobby_id(), "Быстрая игра", host)
+    lobby.selected_game_id = game_id
+    lobby.game_started = True  # В списке комнат не показываем
+    for w in (host, guest):
+        clients[w]["current_lobby"] = lobby.id
+    open_lobby(lobby)
+    lobby.actor.post(None, {"type": "quick_match_start", "players": [host, guest]})
+
+
+def new_lobby_id():
+    while True:
+        lid = f"{rng.getrandbits(32):08x}"
+        if lid not in lobbies:
+            return lid
+
+
+def rng_seed():
+    return rng.getrandbits(64)
+
+
+def dump_rng(generator):
+    """Состояние random.Random для передачи новому процессу (624 слова и позиция)"""
+    _, words, _ = generator.getstate()
+    return base64.b64encode(struct.pack(f"<{len(words)}I", *words)).decode("ascii")
+
+
+def load_rng(generator, data):
+    raw = base64.b64decode(data)
+    generator.setstate((random.Random.VERSION, struct.unpack(f"<{len(raw) // 4}I", raw), None))
+
+
+def sweep_matches():
+    """Периодически (через колесо таймеров) ищем пары с расширившимися окнами"""
+    for host, guest in matchmaker.sweep():
+        start_quick_match(host.game_id, host.writer, guest.writer)
+    timers.schedule(QUICK_MATCH_SWEEP, sweep_matches)
+
+
+async def begin_quick_match(lobby, players):
+    """Выполняется актором лобби: готовность не нужна, сразу монетка"""
+    present = [w for w in players if w in clients and clients[w]["current_lobby"] == lobby.id]
+    if len(present) < 2:
+        # Кто-то отключился, пока лобби открывалось
+        close_lobby(lobby)
+        for w in present:
+            clients[w]["current_lobby"] = None
+            await send_json(w, {"type": "match_cancelled", "msg": "Соперник отключился"})
+        return
+
+    record("open", lobby, name=lobby.name, host=journal_session(lobby.host), private=False, password="",
+           seed=lobby.seed)
+    for w in present:
+        lobby.add_player(w, clients[w]["name"])
+        lobby.players[w]["ready"] = True
+        record("join", lobby, session=journal_session(w), name=clients[w]["name"], id=lobby.players[w]["id"])
+    record("select", lobby, game=lobby.selected_game_id)
+    await broadcast_lobby_state(lobby)
+    await start_game_sequence(lobby)
+
+
 async def pass_to_opponent(sender_writer, lobby, data):
     """Пересылка данных сопернику"""
     for w in lobby.players:
@@ -149,198 +516,1077 @@ async def pass_to_opponent(sender_writer, lobby, data):
             await send_json(w, data)
 
 
+async def pass_move(sender_writer, lobby, data):
+    """Ход сопернику: с полем "m" тем, кто заявил CAP_MOVES, остальным - в старом виде"""
+    for w in lobby.players:
+        if w != sender_writer:
+            moves = w in clients and clients[w]["moves"]
+            await send_json(w, data if moves or "m" not in data else legacy_message(lobby.selected_game_id, data))
+
+
+def trace_received(data):
+    """Трасса задержки хода (core.latency): от tr клиента только id и его метки, плюс наша sr"""
+    tr = data.pop("tr")
+    if not isinstance(tr, dict):
+        return
+    clean = {"sr": time.monotonic()}
+    if isinstance(tr.get("id"), str):
+        clean["id"] = tr["id"][:16]
+    for hop in ("ci", "cs"):
+        if type(tr.get(hop)) in (int, float):
+            clean[hop] = tr[hop]
+    data["tr"] = clean
+
+
+def traced(message, data):
+    """Сообщение сопернику с трассой хода data и меткой отправки ss"""
+    if "tr" not in data:
+        return message
+    return {**message, "tr": {**data["tr"], "ss": time.monotonic()}}
+
+
+async def relay_move(writer, lobby, data):
+    """Ход проверяется кодеком и уходит сопернику в каноническом виде {"m": int} (или старом, см. pass_move)"""
+    game_id = lobby.selected_game_id
+    if game_id == "battleship":
+        # Выстрелы и результаты разрешают клиенты - пересылаем как есть
+        await pass_move(writer, lobby, traced(data, data))
+        return
+
+    move = message_move(game_id, data)
+    if move is None:
+        return
+
+    referee = lobby.referee
+    if referee and not await referee.play(lobby.colors.get(writer), move):
+        # Ход не прошел проверку - возвращаем отправителю верное состояние
+        await send_json(writer, {"type": "resync", "game": game_id,
+                                 "state": base64.b64encode(referee.state).decode("ascii")})
+        return
+
+    move_msg = {"type": "game_move", "m": encode_move(game_id, move)}
+    await pass_move(writer, lobby, traced(move_msg, data))
+    spectate(lobby, move_msg)
+
+    if referee and referee.game_over:
+        record("move", lobby, m=move_msg["m"])
+        await send_game_over(lobby, referee.winner, "rules")
+    elif referee:
+        if lobby.clock:
+            lobby.clock.moved(referee.turn)
+            await send_clock(lobby)
+        record("move", lobby, m=move_msg["m"], clock=clock_left(lobby))
+
+
+async def send_game_over(lobby, winner, reason):
+    """Итог партии каждому игроку: winner - цвет победителя или 'draw'"""
+    if lobby.clock:
+        lobby.clock.stop()
+        await send_clock(lobby)
+    for w, color in lobby.colors.items():
+        if winner == 'draw':
+            result = "draw"
+        else:
+            result = "win" if winner == color else "loss"
+        await send_json(w, {"type": "game_over", "result": result, "reason": reason})
+    spectate(lobby, {"type": "game_over", "winner": winner, "reason": reason})
+    record_finished("end", lobby)
+
+
+def reset_referee(lobby, first_writer):
+    """Новая партия под судьей: цвета по тому, кто ходит первым"""
+    lobby.colors = {w: "white" if w == first_writer else "black" for w in lobby.players}
+    game_id = lobby.selected_game_id
+    lobby.referee = Referee(game_id) if REFEREE_MODE and Referee.supports(game_id) else None
+
+
+def reset_clock(lobby):
+    """
+    Часы новой партии (после reset_referee и reset_battleship). Для игр под
+    судьей белые начинают сразу, в морском бою - когда оба выставят флот.
+    """
+    if lobby.clock:
+        lobby.clock.stop()
+    lobby.clock = None
+    if not (lobby.referee or lobby.server_shots):
+        return  # Без сервера-судьи неизвестно, чей ход
+
+    lobby.clock = make_clock(lobby)
+    if lobby.clock and lobby.referee:
+        lobby.clock.start("white")
+
+
+def make_clock(lobby):
+    """Часы по игре лобби (еще не идут); о флаге колесо сообщает актору командой сервера"""
+    def on_flag(color):
+        lobby.actor.post(None, {"type": "clock_flag", "color": color})
+
+    return GameClock.for_game(lobby.selected_game_id, timers, on_flag)
+
+
+async def send_clock(lobby):
+    msg = lobby.clock.to_message()
+    for w in lobby.players:
+        await send_json(w, msg)
+    spectate(lobby, msg)
+
+
+def spectator_snapshot(lobby):
+    """Все, что нужно зрителю, чтобы нарисовать партию с нуля"""
+    names = {color: lobby.players[w]["name"] for w, color in lobby.colors.items() if w in lobby.players}
+    return {"type": "spectate_sync", "game": lobby.selected_game_id, "players": names,
+            "state": base64.b64encode(lobby.referee.state).decode("ascii")}
+
+
+def spectate(lobby, data):
+    """Сообщение партии всем зрителям (кодируется один раз, drain не ждем)"""
+    if lobby.audience and lobby.referee:
+        lobby.audience.broadcast(data, lambda: spectator_snapshot(lobby))
+
+
+async def password_ok(lobby, password):
+    """Пароль закрытой комнаты. Хеш считается в потоке - цикл событий его не ждет"""
+    if not lobby.is_private:
+        return True
+    return await asyncio.get_running_loop().run_in_executor(None, check_password, lobby.password, password)
+
+
+async def watch_lobby(lobby, writer, data):
+    """Зритель входит в идущую партию: снимок сразу, дальше - ходы по мере игры"""
+    # Пароль сверяем первым: пока считается хеш, зритель может отключиться
+    allowed = await password_ok(lobby, data.get("password", ""))
+    if writer not in clients:
+        return
+    if lobby.actor.closed:
+        await send_json(writer, {"type": "error", "msg": "Комната закрыта"})
+    elif clients[writer]["current_lobby"] is not None:
+        await send_json(writer, {"type": "error", "msg": "Сначала выйдите из комнаты"})
+    elif lobby.selected_game_id == "battleship":
+        await send_json(writer, {"type": "error", "msg": "Морской бой нельзя смотреть: флоты скрыты"})
+    elif not lobby.watchable():
+        await send_json(writer, {"type": "error", "msg": "Игра еще не началась"})
+    elif not allowed:
+        await send_json(writer, {"type": "error", "msg": "Неверный пароль"})
+    elif len(lobby.audience) >= SPECTATOR_LIMIT:
+        await send_json(writer, {"type": "error", "msg": "Слишком много зрителей"})
+    else:
+        clients[writer]["current_lobby"] = lobby.id
+        await send_json(writer, {**spectator_snapshot(lobby), "type": "spectate_start"})
+        if lobby.clock:
+            await send_json(writer, lobby.clock.to_message())
+        lobby.audience.add(writer, framed.get(writer))
+        await broadcast_lobby_list()
+
+
+async def restart_spectators(lobby):
+    """Новая партия в лобби: зрителям - начальная позиция, а если ее нельзя смотреть - выход"""
+    if lobby.referee:
+        spectate(lobby, spectator_snapshot(lobby))
+        return
+    for w in list(lobby.audience.watchers):
+        if w in clients and clients[w]["current_lobby"] == lobby.id:
+            clients[w]["current_lobby"] = None
+        await send_json(w, {"type": "kicked", "msg": "Эту игру нельзя смотреть"})
+    lobby.audience.clear()
+
+
+async def unwatch_lobby(lobby, writer):
+    lobby.audience.remove(writer)
+    if writer in clients and clients[writer]["current_lobby"] == lobby.id:
+        clients[writer]["current_lobby"] = None
+    await send_json(writer, {"type": "left_lobby_success"})
+    await broadcast_lobby_list()
+
+
+async def flag_fall(lobby, color):
+    """У color вышло время: партия окончена, победил соперник"""
+    winner = "black" if color == "white" else "white"
+    if lobby.referee:
+        lobby.referee.winner = winner
+    if lobby.server_shots:
+        lobby.fleets = {}
+        lobby.shot_turn = None
+    await send_game_over(lobby, winner, "timeout")
+
+
+def reset_battleship(lobby, first_writer):
+    """Новая партия морского боя: флоты заново, первым стреляет first_writer"""
+    lobby.server_shots = (SERVER_RESOLVED_SHOTS and lobby.selected_game_id == "battleship"
+                          and all(w in clients and clients[w]["shots"] for w in lobby.players))
+    lobby.fleets = {}
+    lobby.shot_turn = first_writer
+
+
+async def handle_battleship_move(writer, lobby, data):
+    """Морской бой, когда выстрелы разрешает сервер"""
+    subtype = data.get("sub_type")
+    opponent = next((w for w in lobby.players if w != writer), None)
+
+    if subtype == "battleship_ready":
+        fleet = FleetMask.from_ships(data.get("fleet"))
+        if fleet is None:
+            await send_json(writer, {"type": "error", "msg": "Неверная расстановка флота"})
+            return
+        lobby.fleets[writer] = fleet
+        # Сопернику - только факт готовности, без расстановки
+        await pass_to_opponent(writer, lobby, {"type": "game_move", "sub_type": "battleship_ready"})
+
+        if lobby.clock and len(lobby.fleets) == 2 and lobby.clock.turn is None:
+            lobby.clock.start(lobby.colors[lobby.shot_turn])
+            await send_clock(lobby)
+
+    elif subtype == "shot":
+        if opponent is None or writer != lobby.shot_turn or opponent not in lobby.fleets:
+            return
+        if writer not in lobby.fleets:
+            return
+
+        shot = message_move("battleship", data)
+        if shot is None:
+            return
+        r, c = shot
+
+        fleet = lobby.fleets[opponent]
+        status, ship_data = fleet.shoot(r, c)
+        if status == "already":
+            return
+        if status == "miss":
+            lobby.shot_turn = opponent
+
+        result = {"type": "game_move", "sub_type": "shot_result",
+                  "r": r, "c": c, "status": status, "ship_data": ship_data}
+        await send_json(writer, result)
+        await send_json(opponent, traced({**result, "incoming": True}, data))
+
+        if fleet.all_sunk:
+            lobby.fleets = {}
+            lobby.shot_turn = None
+            if lobby.clock:
+                lobby.clock.stop()
+                await send_clock(lobby)
+        elif lobby.clock:
+            # Лимит на ход считается на каждый выстрел, в том числе после попадания
+            lobby.clock.moved(lobby.colors[lobby.shot_turn])
+            await send_clock(lobby)
+
+    # shot_result от клиентов в этом режиме не принимаем - результат считает сервер
+
+
+# --- ЖУРНАЛ И ВОССТАНОВЛЕНИЕ ---
+
+def session_of(writer):
+    """Токен сессии игрока, у места Detached - ключ сессии (auth.session_key)"""
+    if isinstance(writer, Detached):
+        return writer.session
+    return clients[writer]["session"] if writer in clients else None
+
+
+def journal_session(writer):
+    """Игрок в журнале: ключ сессии, а не токен - по журналу чужое место не занять"""
+    session = session_of(writer)
+    return as_session_key(session) if session else None
+
+
+def record(event, lobby, **fields):
+    """Событие лобби в журнал (дописывается пакетом из задачи журнала)"""
+    if journal is not None:
+        journal.append({"e": event, "lobby": lobby.id, **fields})
+
+
+def record_finished(event, lobby):
+    """close / end: раз в COMPACT_AFTER таких событий журнал сжимается до снимка живых лобби"""
+    global finished_since_compaction
+    record(event, lobby)
+    finished_since_compaction += 1
+    if finished_since_compaction >= COMPACT_AFTER:
+        compact_journal()
+
+
+def compact_journal():
+    global finished_since_compaction
+    finished_since_compaction = 0
+    if journal is not None:
+        journal.compact([lobby_image(l) for l in lobbies.values()])
+
+
+def clock_left(lobby):
+    if lobby.clock is None:
+        return None
+    return [lobby.clock.left("white"), lobby.clock.left("black")]
+
+
+def lobby_image(lobby, key=journal_session):
+    """
+    Запись-снимок лобби для сжатого журнала (формат - recovery.new_image).
+    key - как записать игрока: в журнал ключ сессии, новому процессу - токен
+    """
+    referee = lobby.referee
+    in_game = lobby.game_started and referee is not None and not referee.game_over
+    image = new_image(lobby.id, lobby.name, key(lobby.host), lobby.is_private, lobby.password)
+    image.update({
+        "e": "lobby",
+        "lobby": lobby.id,
+        "game": lobby.selected_game_id,
+        "seed": lobby.seed,
+        "seats": {key(w): {"name": p["name"], "id": p["id"]} for w, p in lobby.players.items() if key(w)},
+    })
+    if in_game:
+        image.update({
+            "started": True,
+            "colors": {key(w): c for w, c in lobby.colors.items() if key(w)},
+            "state": base64.b64encode(referee.state).decode("ascii"),
+            "clock": clock_left(lobby),
+        })
+    return image
+
+
+def recover_lobbies(images):
+    """
+    Лобби из журнала. Места игроков занимают Detached, пока игроки не
+    вернутся с токеном сессии; через RESUME_GRACE невернувшиеся выходят.
+    Партии под судьей продолжаются с той же позиции, остальные - снова комната.
+    Генератор лобби начинается с нового seed (сколько из старого уже взято,
+    журнал не знает); в журнал он попадет со снимком после восстановления.
+    """
+    for image in images.values():
+        seats = {session: Detached(session) for session in image["seats"]}
+        lobby = Lobby(image["id"], image["name"], seats[image["host"]], image["private"], image["password"])
+        lobby.selected_game_id = image["game"]
+        place_seats(lobby, image, seats)
+
+        game_id = image["game"]
+        colors = image["colors"]
+        if (image["started"] and REFEREE_MODE and Referee.supports(game_id)
+                and len(colors) == 2 and all(s in seats for s in colors)):
+            state = base64.b64decode(image["state"]) if image["state"] else None
+            moves = [decode_move(game_id, m) for m in image["moves"]]
+            lobby.referee = Referee.restore(game_id, state, [m for m in moves if m is not None])
+            if not lobby.referee.game_over:
+                lobby.colors = {seats[s]: c for s, c in colors.items()}
+                lobby.game_started = True
+                # Часы стоят, пока не вернутся оба игрока
+                lobby.clock = make_clock(lobby)
+                if lobby.clock and lobby.clock.base is not None and image["clock"]:
+                    lobby.clock.remaining = dict(zip(("white", "black"), image["clock"]))
+            else:
+                lobby.referee = None
+
+        open_lobby(lobby)
+        timers.schedule(RESUME_GRACE, expire_seats, lobby)
+
+
+def place_seats(lobby, image, seats, ready=None):
+    """Игроки образа на места seats ({сессия: writer или Detached})"""
+    for session, seat in seats.items():
+        info = image["seats"][session]
+        lobby.players[seat] = {"name": info["name"], "ready": bool(ready and ready.get(session)),
+                               "id": info["id"], "writer": seat}
+        if isinstance(seat, Detached):
+            detached[seat.session] = (lobby.id, seat)
+
+
+def expire_seats(lobby):
+    """Прошло RESUME_GRACE: места невернувшихся игроков освобождаются"""
+    for seat in [w for w in lobby.players if isinstance(w, Detached)]:
+        detached.pop(seat.session, None)
+        lobby.actor.post(seat, {"type": "leave_lobby"})
+
+
+async def resume_seat(lobby, writer, seat):
+    """Игрок вернулся после перезапуска сервера: его соединение занимает место seat"""
+    if seat not in lobby.players or writer not in clients:
+        await send_json(writer, {"type": "kicked", "msg": "Комната не сохранилась"})
+        return
+
+    swap = lambda w: writer if w is seat else w
+    lobby.players = {swap(w): p for w, p in lobby.players.items()}
+    lobby.players[writer]["writer"] = writer
+    lobby.colors = {swap(w): c for w, c in lobby.colors.items()}
+    lobby.host = swap(lobby.host)
+    clients[writer]["current_lobby"] = lobby.id
+    await broadcast_lobby_state(lobby)
+    await send_chat_history(lobby, writer)
+
+    referee = lobby.referee
+    if not (lobby.game_started and referee and writer in lobby.colors):
+        return
+    await send_json(writer, {"type": "start_game", "game": lobby.selected_game_id, "color": lobby.colors[writer],
+                             "resumed": True, "state": base64.b64encode(referee.state).decode("ascii")})
+    if lobby.clock:
+        if lobby.clock.turn is None and not any(isinstance(w, Detached) for w in lobby.players):
+            lobby.clock.start(referee.turn)
+        await send_clock(lobby)
+
+
 # --- ОСНОВНАЯ ЛОГИКА ---
 
+# Команды, которые выполняет актор лобби (остальное - обработчик соединения)
+LOBBY_COMMANDS = {"create_lobby", "join_lobby", "watch_lobby", "leave_lobby", "select_game", "toggle_ready",
+                  "coin_choice", "order_choice", "game_move", "game_emote", "restart_game", "chat_msg"}
+
+
+async def handle_lobby_command(lobby, writer, data):
+    """Одна команда лобби. Вызывается только из задачи-актора этого лобби"""
+    ctype = data.get("type")
+    if writer is None:
+        # Команды самого сервера (таймеры), а не игроков
+        if ctype == "clock_flag" and lobby.clock and lobby.clock.flagged(data["color"]):
+            await flag_fall(lobby, data["color"])
+        elif ctype == "quick_match_start":
+            await begin_quick_match(lobby, data["players"])
+        return
+    if ctype == "resume_seat":
+        await resume_seat(lobby, writer, data["seat"])
+        return
+    if writer in lobby.audience:
+        # Зритель может только уйти
+        if ctype == "leave_lobby":
+            await unwatch_lobby(lobby, writer)
+        return
+    if ctype not in ("create_lobby", "join_lobby", "watch_lobby") and writer not in lobby.players:
+        return  # Игрок уже вышел, пока команда ждала в очереди
+
+    # 2. СОЗДАТЬ ЛОББИ (хост добавляется первой командой нового актора)
+    if ctype == "create_lobby":
+        if writer not in clients:
+            close_lobby(lobby)  # Хост отключился раньше, чем лобби открылось
+            return
+        lobby.add_player(writer, clients[writer]["name"])
+        clients[writer]["current_lobby"] = lobby.id
+        record("open", lobby, name=lobby.name, host=journal_session(writer),
+               private=lobby.is_private, password=lobby.password, seed=lobby.seed)
+        record("join", lobby, session=journal_session(writer), name=clients[writer]["name"], id=1)
+
+        await broadcast_lobby_list()
+        await broadcast_lobby_state(lobby)
+
+    # 3. ВОЙТИ В ЛОББИ
+    elif ctype == "join_lobby":
+        # Пароль сверяем первым: пока считается хеш, игрок может отключиться
+        allowed = await password_ok(lobby, data.get("password", ""))
+
+        if writer not in clients or writer in lobby.players:
+            return
+        if lobby.actor.closed:
+            # Хост ушел, пока запрос стоял в очереди
+            await send_json(writer, {"type": "error", "msg": "Комната закрыта"})
+        elif len(lobby.players) >= 2:
+            await send_json(writer, {"type": "error", "msg": "Комната полна"})
+        elif not allowed:
+            await send_json(writer, {"type": "error", "msg": "Неверный пароль"})
+        else:
+            lobby.add_player(writer, clients[writer]["name"])
+            clients[writer]["current_lobby"] = lobby.id
+            record("join", lobby, session=journal_session(writer), name=clients[writer]["name"],
+                   id=lobby.players[writer]["id"])
+            await broadcast_lobby_state(lobby)
+            await send_chat_history(lobby, writer)
+            await broadcast_lobby_list()
+
+    # 3.1 СМОТРЕТЬ ИДУЩУЮ ПАРТИЮ
+    elif ctype == "watch_lobby":
+        if writer in clients and writer not in lobby.players:
+            await watch_lobby(lobby, writer, data)
+
+    # 4. ВЫЙТИ
+    elif ctype == "leave_lobby":
+        await leave_lobby(lobby, writer)
+
+    # 5. ВЫБОР ИГРЫ
+    elif ctype == "select_game":
+        if writer == lobby.host:
+            lobby.selected_game_id = data["game_id"]
+            for p in lobby.players.values(): p["ready"] = False
+            record("select", lobby, game=lobby.selected_game_id)
+            await broadcast_lobby_state(lobby)
+
+    # 6. ГОТОВНОСТЬ
+    elif ctype == "toggle_ready":
+        status = bool(data.get("status"))
+        if lobby.players[writer]["ready"] == status:
+            return  # Ничего не изменилось - не рассылаем
+        lobby.players[writer]["ready"] = status
+        await broadcast_lobby_state(lobby)
+
+        all_ready = all(p["ready"] for p in lobby.players.values())
+        if all_ready and len(lobby.players) == 2 and lobby.selected_game_id:
+            await start_game_sequence(lobby)
+
+    # 7. МОНЕТКА
+    elif ctype == "coin_choice":
+        choice = data["choice"]
+        result = lobby.rng.choice(["heads", "tails"])
+        is_winner = (choice == result)
+
+        # Находим соперника
+        opponent = next((w for w in lobby.players if w != writer), None)
+
+        await send_json(writer, {"type": "coin_result", "result": result, "win": is_winner})
+        if opponent:
+            await send_json(opponent, {"type": "coin_result", "result": result, "win": not is_winner})
+
+    # 8. ВЫБОР ПОРЯДКА (СТАРТ)
+    elif ctype == "order_choice":
+        choice = data["choice"]
+
+        if choice == "first":
+            h_col, g_col = "white", "black"
+        else:
+            h_col, g_col = "black", "white"
+
+        opponent = next((w for w in lobby.players if w != writer), None)
+        game_id = lobby.selected_game_id
+
+        reset_battleship(lobby, writer if h_col == "white" else opponent)
+        reset_referee(lobby, writer if h_col == "white" else opponent)
+        reset_clock(lobby)
+        record("start", lobby, game=game_id, colors={journal_session(w): c for w, c in lobby.colors.items()})
+        start_msg = {"type": "start_game", "game": game_id}
+        if lobby.server_shots:
+            start_msg["server_shots"] = True
+
+        await send_json(writer, {**start_msg, "color": h_col})
+        if opponent:
+            await send_json(opponent, {**start_msg, "color": g_col})
+        await restart_spectators(lobby)
+        if lobby.clock:
+            await send_clock(lobby)
+
+        lobby.game_started = True
+        await broadcast_lobby_list()
+
+    # 9. ИГРА (Ходы)
+    elif ctype == "game_move":
+        server_log.trace("game_move", lobby=lobby.id, m=data.get("m"), sub_type=data.get("sub_type"))
+        color = lobby.colors.get(writer)
+        if lobby.clock and color and lobby.clock.flagged(color):
+            # Время вышло раньше, чем ход дошел, а колесо таймеров еще не сработало - ход опоздал
+            await flag_fall(lobby, color)
+        elif lobby.server_shots:
+            await handle_battleship_move(writer, lobby, data)
+        else:
+            await relay_move(writer, lobby, data)
+
+    elif ctype == "game_emote":
+        await pass_to_opponent(writer, lobby, data)
+        spectate(lobby, data)
+
+    # 10. РЕСТАРТ (МЯГКАЯ СМЕНА СТОРОН)
+    elif ctype == "restart_game":
+        players = list(lobby.players.keys())
+
+        if len(players) < 2:
+            # Если один - просто сброс
+            for w in lobby.players:
+                await send_json(w, {"type": "restart_cmd"})
+        else:
+            # Смена сторон
+            if not hasattr(lobby, "current_first_index"):
+                lobby.current_first_index = 0
+
+            lobby.current_first_index = 1 - lobby.current_first_index
+            new_first_writer = players[lobby.current_first_index]
+            reset_battleship(lobby, new_first_writer)
+            reset_referee(lobby, new_first_writer)
+            reset_clock(lobby)
+            record("start", lobby, game=lobby.selected_game_id,
+                   colors={journal_session(w): c for w, c in lobby.colors.items()})
+
+            for w in players:
+                color = "white" if w == new_first_writer else "black"
+                # Шлем новую команду restart_swap
+                await send_json(w, {"type": "restart_swap", "color": color})
+            await restart_spectators(lobby)
+            if lobby.clock:
+                await send_clock(lobby)
+
+    # ЧАТ В ЛОББИ
+    elif ctype == "chat_msg":
+        msg_text = data.get("text")
+        if not isinstance(msg_text, str) or not msg_text.strip():
+            return
+        server_log.trace("chat_msg", lobby=lobby.id, length=len(msg_text))
+        # Длинное отбрасываем до сборки пакета - его не кодируем и не храним (частоту ограничил admit)
+        if not lobby.chat.accepts(msg_text):
+            await send_json(writer, {"type": "error", "msg": "Сообщение слишком длинное"})
+            return
+        sender_name = clients[writer]["name"] if writer in clients else "?"
+
+        # Формируем пакет для рассылки (номер и время - из истории лобби)
+        payload = {"type": "chat_msg", **lobby.chat.append(session_of(writer), sender_name, msg_text)}
+
+        for w in lobby.players:
+            if w != writer:
+                await send_json(w, payload)
+
+
 async def handle_client(reader, writer):
-    """Обработчик одного подключения"""
-    addr = writer.get_extra_info('peername')
-    print(f"Подключился: {addr}")
+    """Обработчик одного подключения: разбирает сообщения и раздает их акторам лобби"""
+    peer = writer.get_extra_info('peername')
+    addr = f"{peer[0]}:{peer[1]}" if peer else "?"
+    log.info("Подключился", extra={"addr": addr})
+    connections[writer] = {"reader": reader, "header": bytearray(), "busy": False,
+                           "limits": RateLimiter(RATE_LIMITS), "warned": False, "ready": None,
+                           "cid": recorder.opened() if recorder else None, "raw": None, "held": None}
 
     try:
         while True:
-            # Читаем строку (клиент должен слать \n в конце каждого JSON)
-            raw_data = await reader.readline()
-            if not raw_data: break  # Соединение разорвано
-
+            # Строка JSON или кадр - в зависимости от протокола клиента
             try:
-                data = json.loads(raw_data.decode('utf-8'))
-            except json.JSONDecodeError:
+                data = await read_message(reader, writer)
+            except EOFError:
+                break  # Соединение разорвано
+            if data is None:
                 continue
 
             ctype = data.get("type")
+            if not await admit(writer, ctype, data):
+                continue
 
             # 1. ЛОГИН
             if ctype == "login":
-                clients[writer] = {"name": data["name"], "current_lobby": None}
+                # Повторный логин (смена имени) не выводит из лобби и не меняет сессию
+                old = clients.get(writer)
+                lid = old["current_lobby"] if old else None
+                session = old["session"] if old else None
+                resume = None
+                if not old:
+                    # Токен прошлого подключения: если сервер перезапускался, место в лобби ждет
+                    token = data.get("session")
+                    resume = detached.pop(session_key(token), None) if isinstance(token, str) else None
+                    session = token if resume else uuid.uuid4().hex
+
+                # Рукопожатие: login_ok еще строкой, дальше - кадры
+                caps = [] if writer in framed else negotiate(data)
+                shots = old["shots"] if old else CAP_SHOTS in caps
+                moves = old["moves"] if old else CAP_MOVES in caps
+                clients[writer] = {"name": data["name"], "current_lobby": lid, "session": session,
+                                   "shots": shots, "moves": moves}
+                REGISTRY.gauge("clients").set(len(clients))
+
+                if caps:
+                    await send_json(writer, {"type": "login_ok", "proto": PROTO_VERSION, "caps": caps})
+                    framed[writer] = CAP_STRUCT in caps
+                    if CAP_HEARTBEAT in caps:
+                        beats[writer] = {"missed": 0, "rtt": None}
+                if not old:
+                    await send_json(writer, {"type": "session", "token": session})
+                if resume:
+                    lobby = lobbies.get(resume[0])
+                    if lobby is None or not lobby.actor.post(writer, {"type": "resume_seat", "seat": resume[1]}):
+                        await send_json(writer, {"type": "kicked", "msg": "Комната не сохранилась"})
                 await broadcast_lobby_list()
 
-            # 2. СОЗДАТЬ ЛОББИ
+            elif writer not in clients:
+                continue  # Без логина - только login
+
+            elif ctype == "pong":
+                on_pong(writer, data)
+                server_log.trace("pong", addr=addr, rtt=beats.get(writer, {}).get("rtt"))
+
+            # Синхронизация часов: клиент по t0 и времени ответа оценивает задержку и сдвиг
+            elif ctype == "clock_sync":
+                await send_json(writer, {"type": "clock_sync", "t0": data.get("t0"), "ts": time.monotonic()})
+
+            # БЫСТРАЯ ИГРА: очередь по игре, лобби создает сервер
+            elif ctype == "quick_match":
+                game_id = data.get("game_id")
+                rating = data.get("rating")
+                if clients[writer]["current_lobby"] is not None:
+                    await send_json(writer, {"type": "error", "msg": "Сначала выйдите из комнаты"})
+                elif game_id not in QUICK_MATCH_GAMES:
+                    await send_json(writer, {"type": "error", "msg": "Для этой игры нет быстрой игры"})
+                else:
+                    rating = int(rating) if isinstance(rating, (int, float)) and 0 <= rating < 10000 else None
+                    opponent = matchmaker.enqueue(writer, game_id, rating)
+                    if opponent is None:
+                        await send_json(writer, {"type": "match_queued", "game_id": game_id})
+                    else:
+                        start_quick_match(game_id, opponent.writer, writer)
+
+            elif ctype == "cancel_match":
+                if matchmaker.cancel(writer):
+                    await send_json(writer, {"type": "match_cancelled"})
+
+            # 2. СОЗДАТЬ ЛОББИ: новый актор, хоста он добавит сам
             elif ctype == "create_lobby":
-                lid = str(uuid.uuid4())[:8]
+                matchmaker.cancel(writer)
                 name = data.get("name", "Room")
                 is_private = data.get("is_private", False)
-                pwd = data.get("password", "")
+                pwd = await asyncio.get_running_loop().run_in_executor(
+                    None, hash_password, str(data.get("password") or ""))
 
+                lid = new_lobby_id()
                 new_lobby = Lobby(lid, name, writer, is_private, pwd)
-                new_lobby.add_player(writer, clients[writer]["name"])
+                open_lobby(new_lobby)
+                new_lobby.actor.post(writer, data)
 
-                lobbies[lid] = new_lobby
-                clients[writer]["current_lobby"] = lid
-
-                await broadcast_lobby_list()
-                await broadcast_lobby_state(new_lobby)
-
-            # 3. ВОЙТИ В ЛОББИ
-            elif ctype == "join_lobby":
-                lid = data["lobby_id"]
-                pwd = data.get("password", "")
-
-                if lid in lobbies:
-                    lobby = lobbies[lid]
-                    if len(lobby.players) >= 2:
-                        await send_json(writer, {"type": "error", "msg": "Комната полна"})
-                    elif lobby.is_private and lobby.password != pwd:
-                        await send_json(writer, {"type": "error", "msg": "Неверный пароль"})
-                    else:
-                        lobby.add_player(writer, clients[writer]["name"])
-                        clients[writer]["current_lobby"] = lid
-                        await broadcast_lobby_state(lobby)
-                        await broadcast_lobby_list()
-
-            # 4. ВЫЙТИ
-            elif ctype == "leave_lobby":
-                await leave_current_lobby(writer)
-
-            # 5. ВЫБОР ИГРЫ
-            elif ctype == "select_game":
-                lid = clients[writer]["current_lobby"]
-                if lid and lid in lobbies:
-                    lobby = lobbies[lid]
-                    if writer == lobby.host:
-                        lobby.selected_game_id = data["game_id"]
-                        for p in lobby.players.values(): p["ready"] = False
-                        await broadcast_lobby_state(lobby)
-
-            # 6. ГОТОВНОСТЬ
-            elif ctype == "toggle_ready":
-                lid = clients[writer]["current_lobby"]
-                if lid and lid in lobbies:
-                    lobby = lobbies[lid]
-                    lobby.players[writer]["ready"] = data["status"]
-                    await broadcast_lobby_state(lobby)
-
-                    all_ready = all(p["ready"] for p in lobby.players.values())
-                    if all_ready and len(lobby.players) == 2 and lobby.selected_game_id:
-                        await start_game_sequence(lobby)
-
-            # 7. МОНЕТКА
-            elif ctype == "coin_choice":
-                lid = clients[writer]["current_lobby"]
-                if lid and lid in lobbies:
-                    lobby = lobbies[lid]
-                    choice = data["choice"]
-                    result = random.choice(["heads", "tails"])
-                    is_winner = (choice == result)
-
-                    # Находим соперника
-                    opponent = next((w for w in lobby.players if w != writer), None)
-
-                    await send_json(writer, {"type": "coin_result", "result": result, "win": is_winner})
-                    if opponent:
-                        await send_json(opponent, {"type": "coin_result", "result": result, "win": not is_winner})
-
-            # 8. ВЫБОР ПОРЯДКА (СТАРТ)
-            elif ctype == "order_choice":
-                lid = clients[writer]["current_lobby"]
-                if lid and lid in lobbies:
-                    lobby = lobbies[lid]
-                    choice = data["choice"]
-
-                    if choice == "first":
-                        h_col, g_col = "white", "black"
-                    else:
-                        h_col, g_col = "black", "white"
-
-                    opponent = next((w for w in lobby.players if w != writer), None)
-                    game_id = lobby.selected_game_id
-
-                    await send_json(writer, {"type": "start_game", "game": game_id, "color": h_col})
-                    if opponent:
-                        await send_json(opponent, {"type": "start_game", "game": game_id, "color": g_col})
-
-                    lobby.game_started = True
-                    await broadcast_lobby_list()
-
-            # 9. ИГРА (Ходы)
-            elif ctype in ["game_move", "game_emote"]:
-                lid = clients[writer]["current_lobby"]
-                if lid and lid in lobbies:
-                    await pass_to_opponent(writer, lobbies[lid], data)
-
-            # 10. РЕСТАРТ (МЯГКАЯ СМЕНА СТОРОН)
-            elif ctype == "restart_game":
-                lid = clients[writer]["current_lobby"]
-                if lid and lid in lobbies:
-                    lobby = lobbies[lid]
-                    players = list(lobby.players.keys())
-
-                    if len(players) < 2:
-                        # Если один - просто сброс
-                        for w in lobby.players:
-                            await send_json(w, {"type": "restart_cmd"})
-                    else:
-                        # Смена сторон
-                        if not hasattr(lobby, "current_first_index"):
-                            lobby.current_first_index = 0
-
-                        lobby.current_first_index = 1 - lobby.current_first_index
-                        new_first_writer = players[lobby.current_first_index]
-
-                        for w in players:
-                            color = "white" if w == new_first_writer else "black"
-                            # Шлем новую команду restart_swap
-                            await send_json(w, {"type": "restart_swap", "color": color})
-
-            # ЧАТ В ЛОББИ
-            elif ctype == "chat_msg":
-                lid = clients[writer]["current_lobby"]
-                if lid and lid in lobbies:
-                    lobby = lobbies[lid]
-                    sender_name = clients[writer]["name"]
-                    msg_text = data.get("text", "")
-
-                    # Формируем пакет для рассылки
-                    payload = {
-                        "type": "chat_msg",
-                        "sender": sender_name,
-                        "text": msg_text
-                    }
-
-                    for w in lobby.players:
-                        if w != writer:
-                            await send_json(w, payload)
+            # 3-10. Всё остальное выполняет актор лобби
+            elif ctype in LOBBY_COMMANDS:
+                if ctype in ("join_lobby", "watch_lobby"):
+                    matchmaker.cancel(writer)
+                elif ctype == "game_move" and "tr" in data:
+                    trace_received(data)
+                route_to_lobby(writer, data)
 
     except Exception as e:
-        print(f"Connection error with {addr}: {e}")
+        log.warning("Ошибка соединения", extra={"addr": addr, "error": repr(e)})
     finally:
-        print(f"Отключился: {addr}")
-        await leave_current_lobby(writer)
+        log.info("Отключился", extra={"addr": addr})
+        matchmaker.cancel(writer)
+        route_to_lobby(writer, {"type": "leave_lobby"})
         if writer in clients: del clients[writer]
+        REGISTRY.gauge("clients").set(len(clients))
+        framed.pop(writer, None)
+        beats.pop(writer, None)
+        conn = connections.pop(writer, None)
+        if recorder and conn and conn["cid"] is not None:
+            recorder.closed(conn["cid"])
         writer.close()
-        await writer.wait_closed()
-
-
-async def main():
-    server = await asyncio.start_server(handle_client, HOST, PORT)
-    addr = server.sockets[0].getsockname()
-    print(f'Server serving on {addr} (AsyncIO)')
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass  # Клиент уже сбросил соединение
+
+
+# --- ПЕРЕДАЧА НОВОМУ ПРОЦЕССУ ---
+
+def handoff_image(lobby):
+    """lobby_image плюс то, что живет только в памяти: готовность, идущие часы, морской бой, зрители, генератор"""
+    image = lobby_image(lobby, session_of)
+    referee = lobby.referee
+    image.update({
+        "game_started": lobby.game_started,
+        "ready": {session_of(w): p["ready"] for w, p in lobby.players.items() if session_of(w)},
+        "colors": {session_of(w): c for w, c in lobby.colors.items() if session_of(w)},
+        "started": referee is not None,  # Судья нужен и после конца партии - зрителям
+        "state": base64.b64encode(referee.state).decode("ascii") if referee else None,
+        "clock": lobby.clock.snapshot() if lobby.clock else None,
+        "server_shots": lobby.server_shots,
+        "fleets": {session_of(w): [list(f.ships), f.shots] for w, f in lobby.fleets.items() if session_of(w)},
+        "shot_turn": session_of(lobby.shot_turn) if lobby.shot_turn else None,
+        "first_index": getattr(lobby, "current_first_index", None),
+        "audience": {session_of(w): fmt for w, (fmt, _) in lobby.audience.watchers.items() if session_of(w)},
+        "chat": lobby.chat.dump(),
+        "rng": dump_rng(lobby.rng),
+    })
+    return image
+
+
+def handoff_state(writers):
+    """Снимок для нового процесса; writers - передаваемые соединения в порядке дескрипторов"""
+    state = {"fds": len(writers) + 1, "clients": [], "lobbies": [handoff_image(l) for l in lobbies.values()]}
+    for w in writers:
+        conn = connections[w]
+        client = clients.get(w, {})
+        state["clients"].append({
+            "session": client.get("session"), "name": client.get("name"),
+            "current_lobby": client.get("current_lobby"), "framed": framed.get(w), "beat": beats.get(w),
+            "shots": client.get("shots", False), "moves": client.get("moves", False),
+            # Принятое, но еще не разобранное: ждущий токена запрос, начало кадра и буфер StreamReader
+            "pending": base64.b64encode(wire_bytes(conn["held"]) + bytes(conn["header"]) +
+                                        bytes(conn["reader"]._buffer)).decode("ascii"),
+        })
+    live = set(writers)
+    state["queue"] = [{"session": session_of(t.writer), "game_id": t.game_id, "rating": t.rating}
+                      for t in matchmaker.tickets.values() if t.writer in live]
+    state["rng"] = {"seed": server_seed, "state": dump_rng(rng)}
+    return state
+
+
+def adopt_lobby(image, live):
+    """Лобби из снимка старого процесса; live - {сессия: writer} полученных соединений"""
+    # Игрок без переданного соединения ждет на месте Detached - по ключу сессии, как после журнала
+    seats = {session: live.get(session) or Detached(as_session_key(session)) for session in image["seats"]}
+    lobby = Lobby(image["id"], image["name"], seats[image["host"]], image["private"], image["password"],
+                  image.get("seed"))
+    if image.get("rng"):
+        load_rng(lobby.rng, image["rng"])  # Монетка продолжает ту же последовательность
+    lobby.selected_game_id = image["game"]
+    lobby.game_started = image["game_started"]
+    place_seats(lobby, image, seats, image["ready"])
+    lobby.colors = {seats[s]: c for s, c in image["colors"].items() if s in seats}
+    if image["state"]:
+        lobby.referee = Referee.restore(image["game"], base64.b64decode(image["state"]))
+
+    lobby.server_shots = image["server_shots"]
+    for session, (ships, shots) in image["fleets"].items():
+        if session in seats:
+            lobby.fleets[seats[session]] = fleet = FleetMask(ships)
+            fleet.shots = shots
+    lobby.shot_turn = seats.get(image["shot_turn"])
+    if image["first_index"] is not None:
+        lobby.current_first_index = image["first_index"]
+    lobby.chat.load(image["chat"])
+
+    open_lobby(lobby)
+    if image["clock"]:
+        lobby.clock = make_clock(lobby)
+        lobby.clock.restore(image["clock"])
+    for session, fmt in image["audience"].items():
+        if session in live:
+            lobby.audience.add(live[session], fmt)
+    if any(isinstance(w, Detached) for w in lobby.players):
+        timers.schedule(RESUME_GRACE, expire_seats, lobby)
+
+
+async def serve_handoff(control, stop):
+    """Ждем новый процесс на управляющем сокете; после удачной передачи сервер останавливается"""
+    loop = asyncio.get_running_loop()
+    while True:
+        conn, _ = await loop.sock_accept(control)
+        if await hand_off(conn):
+            stop.set()
+            return
+
+
+async def hand_off(conn):
+    """Старый процесс: лобби и сокеты - новому. False - передача не удалась, работаем дальше"""
+    global journal, listener
+    loop = asyncio.get_running_loop()
+    log.info("Передача сервера новому процессу")
+
+    # 1. Новые соединения ждут в очереди ядра на нашей копии слушающего сокета
+    listen_sock = socket.socket(fileno=os.dup(listener.sockets[0].fileno()))
+    listener.close()
+    reading.clear()
+    for writer in connections:
+        writer.transport.pause_reading()
+
+    # 2. Разобранные сообщения доделываются: обработчики и акторы лобби, затем буферы записи
+    for task in background:
+        task.cancel()
+    deadline = loop.time() + HANDOFF_TIMEOUT
+    try:
+        while any(c["busy"] for c in connections.values()):
+            await asyncio.sleep(0.01)
+            if loop.time() > deadline:
+                raise asyncio.TimeoutError
+        await asyncio.wait_for(asyncio.gather(*(l.actor.drain() for l in list(lobbies.values()))),
+                               deadline - loop.time())
+        flushed = loop.time() + HANDOFF_FLUSH
+        while loop.time() < flushed and any(w.transport.get_write_buffer_size() for w in connections):
+            await asyncio.sleep(0.01)
+        ok = True
+    except asyncio.TimeoutError:
+        ok = False
+
+    # 3. Снимок и дескрипторы. Соединения с неотправленными данными не передаем:
+    # такие игроки переподключатся с токеном сессии, как после перезапуска
+    if ok:
+        journal.close()
+        writers = [w for w in connections if not w.is_closing() and not w.transport.get_write_buffer_size()]
+        fds = [listen_sock.fileno()] + [w.get_extra_info("socket").fileno() for w in writers]
+        conn.setblocking(True)
+        conn.settimeout(HANDOFF_TIMEOUT)
+        try:
+            await loop.run_in_executor(None, handoff.send_state, conn, handoff_state(writers), fds)
+            ok = await loop.run_in_executor(None, handoff.wait_ack, conn)
+        except OSError:
+            ok = False
+    conn.close()
+
+    if not ok:
+        log.error("Передача не удалась, сервер продолжает работу")
+        listener = await asyncio.start_server(handle_client, sock=listen_sock, limit=MAX_MESSAGE)
+        start_background()
+        reading.set()
+        for writer in connections:
+            if not writer.is_closing():
+                writer.transport.resume_reading()
+        return False
+
+    # Сокеты и журнал теперь у нового процесса: закрываем свои копии молча
+    journal = None
+    for lobby in list(lobbies.values()):
+        close_lobby(lobby)
+    clients.clear()
+    matchmaker.tickets.clear()
+    for writer in list(connections):
+        writer.transport.abort()
+    reading.set()
+    listen_sock.close()
+    log.info("Сервер передан", extra={"connections": len(writers)})
+    return True
+
+
+async def take_over():
+    """Новый процесс: лобби, очереди и сокеты от работающего сервера вместо bind"""
+    global server_seed
+    loop = asyncio.get_running_loop()
+    conn, state, fds = await loop.run_in_executor(
+        None, handoff.receive_state, handoff.control_path(PORT), HANDOFF_TIMEOUT)
+    if state.get("rng"):
+        # Генератор сервера продолжается с того же места, что и в старом процессе
+        server_seed = state["rng"]["seed"]
+        load_rng(rng, state["rng"]["state"])
+
+    live, streams = {}, []
+    for info, fd in zip(state["clients"], fds[1:]):
+        # Непрочитанное старым процессом - в начало буфера, до всего, что придет по сокету
+        reader = asyncio.StreamReader(limit=MAX_MESSAGE)
+        reader.feed_data(base64.b64decode(info["pending"]))
+        protocol = asyncio.StreamReaderProtocol(reader)
+        transport, _ = await loop.connect_accepted_socket(lambda: protocol, socket.socket(fileno=fd))
+        writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+        if info["framed"] is not None:
+            framed[writer] = info["framed"]
+        if info["beat"] is not None:
+            beats[writer] = info["beat"]
+        if info["session"]:
+            clients[writer] = {"name": info["name"], "current_lobby": info["current_lobby"],
+                               "session": info["session"], "shots": info.get("shots", False),
+                               "moves": info.get("moves", False)}
+            live[info["session"]] = writer
+        streams.append((reader, writer))
+
+    for image in state["lobbies"]:
+        adopt_lobby(image, live)
+    for ticket in state["queue"]:
+        writer = live[ticket["session"]]
+        opponent = matchmaker.enqueue(writer, ticket["game_id"], ticket["rating"])
+        if opponent is not None:
+            start_quick_match(ticket["game_id"], opponent.writer, writer)
+
+    server = await asyncio.start_server(handle_client, sock=socket.socket(fileno=fds[0]), limit=MAX_MESSAGE)
+    for reader, writer in streams:
+        task = asyncio.create_task(handle_client(reader, writer))
+        adopted.add(task)
+        task.add_done_callback(adopted.discard)
+    REGISTRY.gauge("clients").set(len(clients))
+
+    await loop.run_in_executor(None, handoff.send_ack, conn)
+    conn.close()
+    log.info("Сервер принят", extra={"connections": len(streams), "lobbies": len(state["lobbies"])})
+    return server
+
+
+def flush_capture():
+    recorder.flush()
+    timers.schedule(capture.FLUSH_INTERVAL, flush_capture)
+
+
+def start_background():
+    background[:] = [asyncio.create_task(timers.run()), asyncio.create_task(journal.run()),
+                     asyncio.create_task(monitor.run())]
+
+
+async def start_metrics(attempts):
+    """Метрики (очереди и время обработки акторов) - http://127.0.0.1:5556/metrics"""
+    for attempt in range(attempts):
+        try:
+            await serve_metrics(METRICS_HOST, METRICS_PORT)
+            log.info("Метрики", extra={"url": f"http://{METRICS_HOST}:{METRICS_PORT}/metrics"})
+            return
+        except OSError as e:
+            if attempt == attempts - 1:
+                log.warning("Метрики недоступны", extra={"error": repr(e)})
+        await asyncio.sleep(0.1)
+
+
+async def main(takeover=False, debug_loop=False, seed=None, record=None):
+    global journal, listener, monitor, recorder, server_seed
+    if REFEREE_MODE:
+        warm_up()
+    server_seed = random.randrange(1 << 32) if seed is None else seed
+    rng.seed(server_seed)
+    if record:
+        recorder = capture.Capture(record, server_seed)
+    monitor = LoopMonitor(LOOP_LOG)
+    monitor.start(asyncio.get_running_loop(), debug_loop)
+
+    if takeover:
+        # Состояние приходит от работающего сервера; журнал он уже дописал и закрыл
+        listener = await take_over()
+        journal = Journal(JOURNAL_DIR)
+        compact_journal()
+        # Порт метрик освободится, когда старый процесс выйдет
+        asyncio.create_task(start_metrics(100))
+    else:
+        # Журнал: сначала поднимаем лобби, которые были открыты до остановки, потом принимаем игроков
+        journal = Journal(JOURNAL_DIR)
+        images = rebuild(journal.replay())
+        recover_lobbies(images)
+        compact_journal()
+        if images:
+            log.info("Лобби восстановлены из журнала", extra={"lobbies": len(images)})
+        listener = await asyncio.start_server(handle_client, HOST, PORT, limit=MAX_MESSAGE)
+        await start_metrics(1)
+    addr = listener.sockets[0].getsockname()
+    log.info("Сервер запущен", extra={"addr": f"{addr[0]}:{addr[1]}", "seed": server_seed})
+
+    # SIGTERM останавливает сервер так же, как Ctrl+C (на Windows сигналов в цикле нет)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    # Управляющий сокет для server.py --takeover (только Linux)
+    control = handoff.listen(handoff.control_path(PORT)) if handoff.SUPPORTED else None
+    control_task = asyncio.create_task(serve_handoff(control, stop)) if control else None
+
+    start_background()
+    timers.schedule(QUICK_MATCH_SWEEP, sweep_matches)
+    timers.schedule(HEARTBEAT_INTERVAL, sweep_heartbeats)
+    if recorder:
+        timers.schedule(capture.FLUSH_INTERVAL, flush_capture)
 
-    async with server:
-        await server.serve_forever()
+    try:
+        await stop.wait()
+    finally:
+        listener.close()
+        for task in background:
+            task.cancel()
+        if control:
+            control_task.cancel()
+            control.close()
+            if journal is not None:
+                # После передачи путь уже занял новый процесс
+                os.unlink(handoff.control_path(PORT))
+        if journal is not None:
+            journal.close()
+        monitor.stop()
+        if recorder:
+            recorder.close()
+        shutdown_referee()
+    log.info("Сервер остановлен")
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Игровой сервер")
+    parser.add_argument("--takeover", action="store_true",
+                        help="принять лобби и соединения у сервера, работающего на том же порту")
+    parser.add_argument("--debug-loop", action="store_true",
+                        help="режим отладки asyncio: в logs/loop.log еще и каждый колбэк дольше порога (медленнее)")
+    parser.add_argument("--log-level", default="info", choices=["debug", "info", "warning", "error"])
+    parser.add_argument("--trace", action="append", default=[], metavar="СОБЫТИЕ=ДОЛЯ",
+                        help="писать долю событий горячего пути, например game_move=0.01 (game_move, chat_msg, pong)")
+    parser.add_argument("--quiet", action="store_true", help="не дублировать лог на консоль")
+    parser.add_argument("--seed", type=int, help="seed монетки и номеров лобби (по умолчанию случайный, пишется в лог)")
+    parser.add_argument("--record", metavar="ФАЙЛ",
+                        help="записывать входящий трафик для tools/replay.py (кроме --takeover); "
+                             "в записи пароли комнат и токены сессий - храните ее как секрет")
+    parser.add_argument("--journal", metavar="ПАПКА", default=JOURNAL_DIR, help="папка журнала лобби")
+    parser.add_argument("--port", type=int, default=PORT, help="порт игроков (--takeover ищет сервер на нем же)")
+    args = parser.parse_args()
+    if args.record and args.takeover:
+        # Принятые соединения уже прошли login в старом процессе: запись без него не воспроизвести,
+        # а тот же файл старый процесс еще пишет
+        parser.error("--record не сочетается с --takeover: запись начинается с нового сервера")
+    JOURNAL_DIR = args.journal
+    PORT = args.port
+    sample = {}
+    for item in args.trace:
+        event, _, rate = item.partition("=")
+        sample[event] = float(rate or 1)
+
+    server_log.setup(SERVER_LOG, args.log_level, sample, console=not args.quiet)
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.takeover, args.debug_loop, args.seed, args.record))
     except KeyboardInterrupt:
-        print("\nСервер остановлен.")
\ No newline at end of file
+        log.info("Сервер остановлен")
+    finally:
+        server_log.shutdown()
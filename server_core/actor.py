@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from server_core.log import get_logger
+from server_core.metrics import REGISTRY
+
+log = get_logger("actor")
+
+_STOP = object()
+
+
+class Actor:
+    """
+    Задача asyncio, которая по одной выполняет команды из своей очереди.
+
+    Состояние владельца (например, лобби) меняется только внутри handler,
+    поэтому команды разных соединений не перемешиваются на await. Команда -
+    это (отправитель, dict), то есть простые данные: очередь можно заменить
+    каналом к процессу-шарду, не меняя обработчики.
+
+    handler(sender, data) - корутина. Метрики: глубина очереди, число
+    команд и суммарное время обработки на актора, плюс общие гистограммы
+    времени обработки и ожидания в очереди.
+    """
+
+    def __init__(self, name, handler, kind="lobby", registry=REGISTRY):
+        self.name = name
+        self.handler = handler
+        self.kind = kind
+        self.registry = registry
+        self.inbox = asyncio.Queue()
+        self.closed = False
+
+        labels = {kind: name}
+        self.depth = registry.gauge("actor_queue_depth", **labels)
+        self.processed = registry.counter("actor_messages_total", **labels)
+        self.busy = registry.counter("actor_busy_seconds_total", **labels)
+        self.process_time = registry.histogram("actor_process_seconds", kind=kind)
+        self.wait_time = registry.histogram("actor_wait_seconds", kind=kind)
+
+        self.task = asyncio.create_task(self._run())
+
+    def post(self, sender, data):
+        """Положить команду в очередь; False, если актор уже закрыт"""
+        if self.closed:
+            return False
+        self.inbox.put_nowait((sender, data, time.perf_counter()))
+        self.depth.set(self.inbox.qsize())
+        return True
+
+    def close(self):
+        """Новые команды не принимаются, уже принятые будут обработаны"""
+        if not self.closed:
+            self.closed = True
+            self.inbox.put_nowait(_STOP)
+
+    async def drain(self):
+        """Дождаться, пока обработаны все уже принятые команды"""
+        await self.inbox.join()
+
+    async def _run(self):
+        try:
+            while True:
+                item = await self.inbox.get()
+                self.depth.set(self.inbox.qsize())
+                if item is _STOP:
+                    self.inbox.task_done()
+                    break
+
+                sender, data, queued = item
+                start = time.perf_counter()
+                self.wait_time.observe(start - queued)
+                try:
+                    await self.handler(sender, data)
+                except Exception:
+                    log.exception("Ошибка в акторе", extra={"actor": f"{self.kind} {self.name}",
+                                                           "command": data.get("type")})
+                elapsed = time.perf_counter() - start
+                self.process_time.observe(elapsed)
+                self.processed.inc()
+                self.busy.inc(elapsed)
+                self.inbox.task_done()
+        finally:
+            labels = {self.kind: self.name}
+            for name in ("actor_queue_depth", "actor_messages_total", "actor_busy_seconds_total"):
+                self.registry.remove(name, **labels)
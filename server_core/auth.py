@@ -0,0 +1,49 @@
+"""
+Секреты лобби в памяти и в журнале.
+
+Пароль комнаты хранится соленым хешем PBKDF2 (hash_password), и сверяет
+его check_password. Оба медленные нарочно: сервер зовет их в потоке
+(run_in_executor), hashlib на это время отпускает GIL.
+
+Токен сессии - ключ игрока к его месту после перезапуска. В журнал идет
+только session_key(токен); вернувшийся игрок присылает токен, и место
+ищется по его ключу. Сам ключ токеном не работает: при входе хешируется
+все, что прислал клиент.
+"""
+import hashlib
+import hmac
+import os
+
+PASSWORD_SCHEME = "pbkdf2_sha256"
+PASSWORD_ITERATIONS = 50000
+SALT_BYTES = 16
+KEY_PREFIX = "sha256:"
+
+
+def hash_password(password):
+    """Строка для хранения; пустой пароль остается пустым (комната без пароля)"""
+    if not password:
+        return ""
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, PASSWORD_ITERATIONS)
+    return f"{PASSWORD_SCHEME}${PASSWORD_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+
+def check_password(stored, password):
+    if not isinstance(password, str):
+        return False
+    if not stored:
+        return password == ""
+    _, iterations, salt, digest = stored.split("$")
+    actual = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt), int(iterations))
+    return hmac.compare_digest(actual.hex(), digest)
+
+
+def session_key(token):
+    """Ключ сессии для журнала и мест Detached"""
+    return KEY_PREFIX + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def as_session_key(session):
+    """Сессия места: ключ (Detached) как есть, токен живого игрока - в ключ"""
+    return session if session.startswith(KEY_PREFIX) else session_key(session)
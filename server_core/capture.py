@@ -0,0 +1,107 @@
+"""
+Запись входящего трафика сервера для воспроизведения (tools/replay.py).
+
+Файл: строка JSON с заголовком (формат, seed генератора сервера, время
+начала), дальше записи RECORD - время от начала записи, номер соединения,
+событие, длина тела - и само тело:
+
+    OPEN   соединение принято (тело пустое)
+    DATA   сообщение клиента в том виде, в каком пришло: строка JSON с \\n
+           или кадр вместе с заголовком
+    CLOSE  соединение закрыто
+
+Пишется все, что сервер прочитал, до лимитов частоты - при воспроизведении
+их снова применит сервер. Записи копятся в памяти и уходят в файл кусками
+по BUFFER_BYTES и по flush() (сервер зовет его раз в FLUSH_INTERVAL).
+
+Запись начинается только с нового сервера: процесс --takeover получает
+соединения после login, и воспроизвести их с середины нельзя, поэтому
+server.py не принимает --record вместе с --takeover. Запись старого
+процесса заканчивается передачей.
+
+В записи весь трафик как есть - пароли комнат и токены сессий тоже,
+поэтому файл доступен только владельцу (FILE_MODE).
+"""
+import json
+import os
+import struct
+import time
+
+from server_core.metrics import REGISTRY
+
+FORMAT = "onscreener-capture"
+VERSION = 1
+RECORD = struct.Struct("<dIBI")  # (сек от начала, соединение, событие, длина тела)
+OPEN, DATA, CLOSE = 0, 1, 2
+BUFFER_BYTES = 64 * 1024
+FLUSH_INTERVAL = 1.0
+FILE_MODE = 0o600
+
+
+class Capture:
+    def __init__(self, path, seed, clock=time.monotonic, registry=REGISTRY):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.clock = clock
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)  # O_BINARY есть только на Windows
+        self.file = os.fdopen(os.open(path, flags, FILE_MODE), "wb")
+        os.chmod(path, FILE_MODE)  # Файл мог остаться от прошлой записи с другими правами
+        header = {"format": FORMAT, "version": VERSION, "seed": seed, "started": time.time()}
+        self.file.write(json.dumps(header).encode("utf-8") + b"\n")
+        self.start = clock()
+        self.buffer = bytearray()
+        self.next_id = 0
+        self.bytes = registry.counter("capture_bytes_total")
+
+    def opened(self):
+        """Новое соединение: его номер в записи"""
+        conn = self.next_id
+        self.next_id += 1
+        self._add(conn, OPEN, b"")
+        return conn
+
+    def received(self, conn, raw):
+        self._add(conn, DATA, raw)
+
+    def closed(self, conn):
+        self._add(conn, CLOSE, b"")
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.file.flush()
+            self.bytes.inc(len(self.buffer))
+            self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def _add(self, conn, event, body):
+        self.buffer += RECORD.pack(self.clock() - self.start, conn, event, len(body))
+        self.buffer += body
+        if len(self.buffer) >= BUFFER_BYTES:
+            self.flush()
+
+
+def read(path):
+    """(заголовок, записи): записи - генератор (время, соединение, событие, тело)"""
+    f = open(path, "rb")
+    header = json.loads(f.readline())
+    if header.get("format") != FORMAT or header.get("version") != VERSION:
+        f.close()
+        raise ValueError(f"{path}: не запись трафика {FORMAT} {VERSION}")
+
+    def records():
+        with f:
+            while True:
+                head = f.read(RECORD.size)
+                if len(head) < RECORD.size:
+                    return  # Конец файла или недописанная запись
+                at, conn, event, size = RECORD.unpack(head)
+                body = f.read(size)
+                if len(body) < size:
+                    return
+                yield at, conn, event, body
+
+    return header, records()
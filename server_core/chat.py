@@ -0,0 +1,94 @@
+"""
+История чата лобби: последние сообщения в кольцевом буфере.
+
+Буфер ограничен по байтам - на лобби (LOBBY_BYTES) и на весь сервер
+(TOTAL_BYTES, общий ChatBudget): новое сообщение вытесняет самые старые
+сообщения своего лобби. Кто вошел в комнату или вернулся в нее после
+переподключения, получает историю одним сообщением chat_history.
+
+Длина проверяется до сборки ответа и стоит один len() строки; частоту
+сообщений ограничивает сервер для всего соединения (server_core.ratelimit).
+"""
+import time
+from collections import deque
+
+from server_core.metrics import REGISTRY
+
+MAX_TEXT = 500  # Символов в одном сообщении
+LOBBY_BYTES = 16 * 1024
+TOTAL_BYTES = 8 * 1024 * 1024
+ENTRY_OVERHEAD = 64  # Оценка на seq, ts и сам dict сверх текста и имени
+
+
+class ChatBudget:
+    """Общий для всех лобби счетчик байт истории"""
+
+    def __init__(self, limit=TOTAL_BYTES, registry=REGISTRY):
+        self.limit = limit
+        self.used = 0
+        self.gauge = registry.gauge("chat_history_bytes")
+
+    def fits(self, size):
+        return self.used + size <= self.limit
+
+    def add(self, size):
+        self.used += size
+        self.gauge.set(self.used)
+
+
+BUDGET = ChatBudget()
+
+
+class ChatHistory:
+    def __init__(self, limit=LOBBY_BYTES, budget=BUDGET, registry=REGISTRY):
+        self.limit = limit
+        self.budget = budget
+        self.entries = deque()  # [(байт, сессия автора, сообщение)]
+        self.size = 0
+        self.seq = 0  # Номер последнего сообщения: клиент по нему отбрасывает уже показанное
+
+        self.messages = registry.counter("chat_messages_total")
+        self.rejected = registry.counter("chat_rejected_total", reason="too_long")
+
+    def accepts(self, text):
+        if len(text) > MAX_TEXT:
+            self.rejected.inc()
+            return False
+        return True
+
+    def append(self, session, sender, text):
+        """Сообщение в историю; возвращает его в виде для рассылки"""
+        self.seq += 1
+        entry = {"seq": self.seq, "sender": sender, "text": text, "ts": time.time()}
+        self.messages.inc()
+        self._push(ENTRY_OVERHEAD + len(sender.encode("utf-8")) + len(text.encode("utf-8")), session, entry)
+        return entry
+
+    def history(self, session):
+        """Сообщения для chat_history; свои помечены mine (клиент их уже показал сам)"""
+        return [{**entry, "mine": True} if author == session else entry for _, author, entry in self.entries]
+
+    def clear(self):
+        """Лобби закрыто: память возвращается в общий бюджет"""
+        self.budget.add(-self.size)
+        self.entries.clear()
+        self.size = 0
+
+    def dump(self):
+        return {"seq": self.seq, "entries": [[author, entry] for _, author, entry in self.entries]}
+
+    def load(self, data):
+        self.seq = data["seq"]
+        for author, entry in data["entries"]:
+            self._push(ENTRY_OVERHEAD + len(entry["sender"].encode("utf-8")) + len(entry["text"].encode("utf-8")),
+                       author, entry)
+
+    def _push(self, size, session, entry):
+        while self.entries and (self.size + size > self.limit or not self.budget.fits(size)):
+            old_size, _, _ = self.entries.popleft()
+            self.size -= old_size
+            self.budget.add(-old_size)
+        if self.size + size <= self.limit and self.budget.fits(size):
+            self.entries.append((size, session, entry))
+            self.size += size
+            self.budget.add(size)
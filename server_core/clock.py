@@ -0,0 +1,111 @@
+"""
+Шахматные часы партии на сервере.
+
+Контроль времени - (base, increment, per_turn): общий запас на партию в
+секундах с добавкой за ход (Фишер) и/или лимит на один ход. None -
+ограничения нет. Истечение времени ставится в общее колесо таймеров;
+колесо только сообщает о нем (on_flag), решение принимает актор лобби
+через flagged().
+"""
+import time
+
+# game_id -> (base, increment, per_turn)
+TIME_CONTROLS = {
+    "chess": (600, 5, None),
+    "checkers": (600, 5, None),
+    "tic_tac_toe": (None, 0, 30),
+    "gomoku": (None, 0, 60),
+    "battleship": (None, 0, 60),
+}
+
+
+class GameClock:
+    def __init__(self, wheel, base=None, increment=0, per_turn=None, on_flag=None, clock=time.monotonic):
+        self.wheel = wheel
+        self.base = base
+        self.increment = increment
+        self.per_turn = per_turn
+        self.on_flag = on_flag
+        self.clock = clock
+
+        self.remaining = {"white": base, "black": base}
+        self.turn = None  # Чьи часы идут; None - стоят
+        self.turn_started = 0.0
+        self.timer = None
+
+    @classmethod
+    def for_game(cls, game_id, wheel, on_flag):
+        """Часы по контролю TIME_CONTROLS; None, если у игры его нет"""
+        control = TIME_CONTROLS.get(game_id)
+        if control is None:
+            return None
+        return cls(wheel, *control, on_flag=on_flag)
+
+    def left(self, color, now=None):
+        """Сколько секунд осталось у color прямо сейчас (None - без ограничений)"""
+        now = self.clock() if now is None else now
+        elapsed = now - self.turn_started if color == self.turn else 0.0
+        limits = []
+        if self.base is not None:
+            limits.append(self.remaining[color] - elapsed)
+        if self.per_turn is not None:
+            limits.append(self.per_turn - elapsed)
+        return max(0.0, min(limits)) if limits else None
+
+    def start(self, color):
+        self.turn = color
+        self.turn_started = self.clock()
+        self._arm()
+
+    def moved(self, next_color):
+        """Ход сделан: списываем время ходившего, запускаем часы next_color.
+
+        Инкремент - только когда очередь переходит: продолжение взятия в
+        шашках (или выстрел после попадания) тот же ход, а не новый.
+        """
+        if self.turn is None:
+            return
+        now = self.clock()
+        if self.base is not None:
+            self.remaining[self.turn] -= now - self.turn_started
+            if next_color != self.turn:
+                self.remaining[self.turn] += self.increment
+        self.turn = next_color
+        self.turn_started = now
+        self._arm()
+
+    def stop(self):
+        if self.turn is None:
+            return
+        if self.base is not None:
+            self.remaining[self.turn] -= self.clock() - self.turn_started
+        self.turn = None
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+
+    def flagged(self, color):
+        """Время color действительно вышло (а не ход успел раньше, чем сработал таймер)"""
+        return self.turn == color and self.left(color) <= 0
+
+    def snapshot(self):
+        """Состояние для другого процесса: остаток, чьи часы идут и сколько уже идут"""
+        elapsed = self.clock() - self.turn_started if self.turn else 0.0
+        return {"remaining": dict(self.remaining), "turn": self.turn, "elapsed": elapsed}
+
+    def restore(self, snapshot):
+        self.remaining = dict(snapshot["remaining"])
+        if snapshot["turn"]:
+            self.turn = snapshot["turn"]
+            self.turn_started = self.clock() - snapshot["elapsed"]
+            self._arm()
+
+    def to_message(self):
+        now = self.clock()
+        return {"type": "clock", "white": self.left("white", now), "black": self.left("black", now),
+                "turn": self.turn, "ts": now}
+
+    def _arm(self):
+        if self.timer:
+            self.timer.cancel()
+        self.timer = self.wheel.schedule(self.left(self.turn), self.on_flag, self.turn)
@@ -0,0 +1,87 @@
+"""
+Передача работающего сервера новому процессу без разрыва соединений (Linux).
+
+Старый процесс слушает управляющий Unix-сокет. Новый (server.py
+--takeover) подключается к нему, старый перестает принимать соединения и
+разбирать сообщения клиентов, дорабатывает очереди лобби и передает
+снимок состояния (JSON) и дескрипторы - слушающий сокет и сокеты
+клиентов - через SCM_RIGHTS. Новый процесс поднимает лобби, начинает
+принимать соединения и подтверждает (ACK). Только после этого старый
+закрывает свои копии дескрипторов и выходит; без подтверждения он
+продолжает работать сам.
+
+Сокеты одни и те же, поэтому клиенты ничего не замечают: сообщения,
+пришедшие во время передачи, ждут в буфере ядра.
+"""
+import json
+import os
+import socket
+import struct
+import tempfile
+
+SUPPORTED = hasattr(socket, "AF_UNIX") and hasattr(socket, "send_fds")
+MAX_FDS = 200  # Дескрипторов в одном сообщении (в ядре Linux предел 253)
+ACK = b"K"
+LENGTH = struct.Struct("!I")
+
+
+def control_path(port):
+    return os.path.join(tempfile.gettempdir(), f"onscreener-{port}.sock")
+
+
+def listen(path):
+    """Управляющий сокет работающего сервера (неблокирующий, для loop.sock_accept)"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen(1)
+    sock.setblocking(False)
+    return sock
+
+
+def send_state(conn, state, fds):
+    """Старый процесс (в потоке): снимок, затем дескрипторы пачками по MAX_FDS"""
+    data = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    conn.sendall(LENGTH.pack(len(data)) + data)
+    for i in range(0, len(fds), MAX_FDS):
+        socket.send_fds(conn, [b"F"], fds[i:i + MAX_FDS])
+
+
+def wait_ack(conn):
+    try:
+        return conn.recv(1) == ACK
+    except OSError:
+        return False
+
+
+def receive_state(path, timeout):
+    """Новый процесс (в потоке): (соединение, снимок, дескрипторы). Дескрипторов - state["fds"]"""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout)
+    conn.connect(path)
+    length, = LENGTH.unpack(_recv_exactly(conn, LENGTH.size))
+    state = json.loads(_recv_exactly(conn, length))
+    fds = []
+    while len(fds) < state["fds"]:
+        _, batch, _, _ = socket.recv_fds(conn, 1, MAX_FDS)
+        if not batch:
+            raise ConnectionError("сервер не передал сокеты")
+        fds.extend(batch)
+    return conn, state, fds
+
+
+def send_ack(conn):
+    conn.sendall(ACK)
+
+
+def _recv_exactly(conn, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("сервер закрыл управляющий сокет")
+        data += chunk
+    return bytes(data)
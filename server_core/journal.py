@@ -0,0 +1,169 @@
+"""
+Журнал лобби: события (открытие, вход, выход, старт партии, ходы)
+дописываются в конец файла, чтобы после падения сервера восстановить
+комнаты и идущие партии.
+
+append() только кладет запись в пакет в памяти. Задача run() раз в
+flush_interval пишет весь накопленный пакет одним write и делает fsync
+(групповая фиксация) в отдельном потоке, поэтому диск не задерживает цикл
+событий. Потерять можно только последний неполный интервал.
+
+Запись - строка JSON. Журнал делится на сегменты journal-000001.log, ...
+compact(records) начинает новый сегмент со снимка живых лобби и удаляет
+все старые сегменты - так журнал не растет вместе с числом сыгранных партий.
+
+Папка журнала (DIR_MODE) и сегменты (FILE_MODE) доступны только владельцу:
+в записях ключи сессий и хеши паролей комнат (server_core.auth).
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+
+from server_core.log import get_logger
+from server_core.metrics import REGISTRY
+
+log = get_logger("journal")
+
+SEGMENT_PREFIX = "journal-"
+SEGMENT_SUFFIX = ".log"
+FLUSH_INTERVAL = 0.05
+SEGMENT_SIZE = 8 * 1024 * 1024  # Больше - следующий пакет идет в новый сегмент
+DIR_MODE = 0o700
+FILE_MODE = 0o600
+
+
+def encode_record(record):
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class _Compaction:
+    """Отметка в очереди записи: здесь начать новый сегмент со снимка"""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+
+class Journal:
+    def __init__(self, directory, flush_interval=FLUSH_INTERVAL, segment_size=SEGMENT_SIZE, registry=REGISTRY):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.segment_size = segment_size
+        os.makedirs(directory, mode=DIR_MODE, exist_ok=True)
+        os.chmod(directory, DIR_MODE)  # Папка могла остаться от версии без ограничения прав
+
+        self.pending = []  # Строки и отметки сжатия, еще не записанные на диск
+        self.lock = threading.Lock()  # Файл трогает только тот, кто держит lock
+        self.segments = self._list_segments()
+        self.file = None
+        self.size = 0
+
+        self.records = registry.counter("journal_records_total")
+        self.written = registry.counter("journal_bytes_total")
+        self.flush_time = registry.histogram("journal_flush_seconds")
+        self.segment_count = registry.gauge("journal_segments")
+        self.segment_count.set(len(self.segments))
+
+    # --- ЗАПИСЬ ---
+
+    def append(self, record):
+        self.pending.append(encode_record(record))
+        self.records.inc()
+
+    def compact(self, records):
+        """Записи до этого вызова - в старый сегмент, после - за снимком records в новом"""
+        self.pending.append(_Compaction([encode_record(r) for r in records]))
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        await asyncio.get_running_loop().run_in_executor(None, self._write_batch, batch)
+
+    async def run(self):
+        """Единственная задача, которая пишет журнал"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except OSError as e:
+                log.error("Журнал не записан", extra={"error": repr(e)})
+
+    def close(self):
+        """Дописать остаток синхронно (при остановке сервера)"""
+        batch, self.pending = self.pending, []
+        self._write_batch(batch)
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+    def _write_batch(self, batch):
+        with self.lock:
+            start = time.perf_counter()
+            chunk = []
+            for item in batch:
+                if isinstance(item, _Compaction):
+                    self._write(chunk)
+                    chunk = []
+                    self._start_segment()
+                    self._write(item.lines)
+                    # Снимок на диске - старые сегменты больше не нужны
+                    for number in self.segments[:-1]:
+                        os.remove(self._path(number))
+                    self.segments = self.segments[-1:]
+                else:
+                    chunk.append(item)
+            self._write(chunk)
+            if self.size > self.segment_size:
+                self._start_segment()
+            self.segment_count.set(len(self.segments))
+            self.flush_time.observe(time.perf_counter() - start)
+
+    def _write(self, lines):
+        if not lines:
+            return
+        if self.file is None:
+            self._start_segment()
+        data = b"".join(lines)
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.size += len(data)
+        self.written.inc(len(data))
+
+    def _start_segment(self):
+        if self.file:
+            self.file.close()
+        number = self.segments[-1] + 1 if self.segments else 1
+        self.segments.append(number)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)  # O_BINARY есть только на Windows
+        self.file = os.fdopen(os.open(self._path(number), flags, FILE_MODE), "ab")
+        self.size = 0
+
+    # --- ЧТЕНИЕ ---
+
+    def replay(self):
+        """Все записи по порядку. Оборванная последняя строка (падение при записи) пропускается"""
+        for number in self._list_segments():
+            with open(self._path(number), "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except (UnicodeDecodeError, ValueError):
+                        continue
+                    if isinstance(record, dict):
+                        yield record
+
+    def _list_segments(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                number = name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+                if number.isdigit():
+                    numbers.append(int(number))
+        return sorted(numbers)
+
+    def _path(self, number):
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}")
@@ -0,0 +1,109 @@
+"""
+Лог сервера: записи JSON по строкам в файле с ротацией (logs/server.log).
+
+Цикл событий только кладет запись в очередь (QueueHandler). В файл и на
+консоль ее пишет отдельный поток QueueListener, поэтому медленный
+терминал или переполненный pipe не задерживают цикл.
+
+Поля события передаются через extra и попадают в запись как есть:
+
+    log.info("Подключился", extra={"addr": "127.0.0.1:50000"})
+
+Горячие пути (ходы, чат, пинги) пишутся через trace(): событие попадает в
+лог с вероятностью из setup(sample={"game_move": 0.01}); по умолчанию -
+никогда, и тогда trace стоит один поиск в dict.
+"""
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+ROOT = "onscreener"
+FILE_BYTES = 10 * 1024 * 1024
+FILE_COUNT = 5
+
+# Атрибуты любого LogRecord - все остальное пришло из extra
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_root = logging.getLogger(ROOT)
+_trace = _root.getChild("trace")
+_rates = {}  # {событие: доля, которая пишется}
+_listener = None
+
+
+def get_logger(name):
+    return _root.getChild(name)
+
+
+def fields(record):
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS}
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Как в logging, но трассировка исключения - отдельное поле exc, а не хвост msg"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = record.exc_info = record.exc_text = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {"ts": round(record.created, 6), "level": record.levelname.lower(),
+                 "logger": record.name, "msg": record.getMessage(), **fields(record)}
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Для человека: сообщение и поля key=value"""
+
+    def format(self, record):
+        extra = " ".join(f"{k}={v}" for k, v in fields(record).items())
+        return f"{record.getMessage()} {extra}" if extra else record.getMessage()
+
+
+def setup(path, level="info", sample=None, console=True):
+    """Запустить поток записи; sample - {событие trace: доля от 0 до 1}"""
+    global _listener
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=FILE_BYTES, backupCount=FILE_COUNT,
+                                                        encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(ConsoleFormatter())
+        handlers.append(console_handler)
+
+    records = queue.SimpleQueue()
+    _root.handlers[:] = [QueueHandler(records)]
+    _root.setLevel(level.upper())
+    _root.propagate = False
+    _rates.clear()
+    _rates.update(sample or {})
+    _listener = logging.handlers.QueueListener(records, *handlers)
+    _listener.start()
+
+
+def shutdown():
+    """Дописать очередь и остановить поток записи"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def trace(event, **data):
+    rate = _rates.get(event)
+    if rate and (rate >= 1 or random.random() < rate):
+        _trace.info(event, extra=data)
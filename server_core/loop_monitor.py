@@ -0,0 +1,120 @@
+"""
+Монитор цикла событий: насколько цикл опаздывает и чем он занят, когда
+опаздывает.
+
+Задача run() просыпается каждые tick секунд; опоздание пробуждения - это
+задержка цикла (гистограмма loop_lag_seconds). Отдельный поток-сторож
+смотрит на время последнего пробуждения: если цикл молчит дольше порога,
+сторож раз в sample секунд снимает стек потока цикла (sys._current_frames),
+а когда цикл оживет - пишет в файл одну запись JSON с длительностью
+зависания и самыми частыми стеками. Файл ротируется по размеру.
+
+Стоимость в обычной работе - tick-задача и поток, который просыпается
+раз в tick; стеки снимаются только во время зависаний. Режим отладки
+asyncio (имена медленных колбэков по slow_callback_duration) дороже и
+включается отдельно.
+"""
+import asyncio
+import collections
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+
+from server_core.metrics import REGISTRY
+
+TICK = 0.05
+THRESHOLD = 0.1  # Зависание: цикл молчит дольше tick + THRESHOLD
+SAMPLE = 0.005
+STACK_DEPTH = 12  # Кадров с конца стека в записи
+TOP_STACKS = 5
+FILE_BYTES = 1024 * 1024
+FILE_COUNT = 3
+
+
+class LoopMonitor:
+    def __init__(self, path, tick=TICK, threshold=THRESHOLD, sample=SAMPLE, registry=REGISTRY):
+        self.tick = tick
+        self.threshold = threshold
+        self.sample = sample
+        self.last = None  # perf_counter последнего пробуждения; None - задача не идет
+        self.thread_id = None  # Поток цикла событий
+        self.stopped = threading.Event()
+        self.watchdog = None
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.log = logging.getLogger("onscreener.loop")
+        self.log.propagate = False
+        self.log.setLevel(logging.INFO)
+        if not self.log.handlers:
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=FILE_BYTES, backupCount=FILE_COUNT,
+                                                           encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.log.addHandler(handler)
+
+        self.lag = registry.histogram("loop_lag_seconds")
+        self.stalls = registry.counter("loop_stalls_total")
+        self.stall_time = registry.histogram("loop_stall_seconds")
+
+    def start(self, loop, debug=False):
+        """Поток-сторож; debug - режим отладки asyncio с отчетами о колбэках дольше порога"""
+        loop.slow_callback_duration = self.threshold
+        if debug:
+            loop.set_debug(True)
+            # asyncio пишет "Executing <Handle ...> took 0.2 seconds" в свой логгер
+            logging.getLogger("asyncio").addHandler(self.log.handlers[0])
+        self.watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self.watchdog.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    async def run(self):
+        self.thread_id = threading.get_ident()
+        self.last = time.perf_counter()
+        try:
+            while True:
+                await asyncio.sleep(self.tick)
+                now = time.perf_counter()
+                self.lag.observe(max(0.0, now - self.last - self.tick))
+                self.last = now
+        finally:
+            self.last = None  # Задачу сняли (остановка, передача процесса) - это не зависание
+
+    # --- ПОТОК-СТОРОЖ ---
+
+    def _watch(self):
+        stacks = collections.Counter()
+        stalled_since = None
+        while not self.stopped.wait(self.sample if stalled_since else self.tick):
+            last = self.last
+            now = time.perf_counter()
+            if last is not None and now - last > self.tick + self.threshold:
+                if stalled_since is None:
+                    stalled_since = last + self.tick  # Цикл должен был проснуться здесь
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is not None:
+                    stacks[self._stack(frame)] += 1
+            elif stalled_since is not None:
+                self._report(now - stalled_since if last is None else last - stalled_since, stacks)
+                stacks = collections.Counter()
+                stalled_since = None
+
+    def _stack(self, frame):
+        frames = []
+        while frame is not None and len(frames) < STACK_DEPTH:
+            code = frame.f_code
+            frames.append(f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}")
+            frame = frame.f_back
+        return tuple(reversed(frames))
+
+    def _report(self, duration, stacks):
+        self.stalls.inc()
+        self.stall_time.observe(duration)
+        total = sum(stacks.values()) or 1
+        top = [{"share": round(n / total, 3), "stack": list(stack)} for stack, n in stacks.most_common(TOP_STACKS)]
+        self.log.info(json.dumps({"ts": time.time(), "stall": round(duration, 4), "samples": total, "stacks": top},
+                                 ensure_ascii=False))
@@ -0,0 +1,142 @@
+"""
+Быстрая игра: очереди игроков по game_id.
+
+Очередь одной игры - корзины по рейтингу шириной RATING_BUCKET, в каждой -
+OrderedDict ожидающих в порядке прихода. Постановка и отмена - O(1), поиск
+соперника смотрит только корзины внутри окна рейтинга. Окно растет со
+временем ожидания, поэтому долго ждущий игрок в итоге найдет любого;
+для этого очереди периодически пересматриваются (sweep).
+"""
+import time
+from collections import OrderedDict
+
+from server_core.metrics import REGISTRY
+
+RATING_BUCKET = 100
+DEFAULT_RATING = 1200
+RATING_WINDOW = 100  # Начальное окно: соперник в пределах ±100
+RATING_WIDEN = 50  # Окно растет на столько очков за секунду ожидания
+MAX_WINDOW = 3000
+
+# Границы корзин гистограммы времени ожидания, секунды
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+
+class Ticket:
+    __slots__ = ("writer", "game_id", "rating", "queued")
+
+    def __init__(self, writer, game_id, rating, queued):
+        self.writer = writer
+        self.game_id = game_id
+        self.rating = rating
+        self.queued = queued
+
+    def window(self, now):
+        return min(RATING_WINDOW + RATING_WIDEN * (now - self.queued), MAX_WINDOW)
+
+
+class MatchQueue:
+    def __init__(self):
+        self.buckets = {}  # {номер корзины: OrderedDict(writer -> Ticket)}
+        self.size = 0
+
+    def add(self, ticket):
+        self.buckets.setdefault(ticket.rating // RATING_BUCKET, OrderedDict())[ticket.writer] = ticket
+        self.size += 1
+
+    def remove(self, ticket):
+        key = ticket.rating // RATING_BUCKET
+        bucket = self.buckets[key]
+        del bucket[ticket.writer]
+        if not bucket:
+            del self.buckets[key]
+        self.size -= 1
+
+    def tickets(self):
+        """Все ожидающие, самые давние первыми"""
+        return sorted((t for bucket in self.buckets.values() for t in bucket.values()), key=lambda t: t.queued)
+
+    def find(self, ticket, now):
+        """Самый давно ждущий соперник, окна обоих покрывают разницу рейтингов"""
+        window = ticket.window(now)
+        lo = int(ticket.rating - window) // RATING_BUCKET
+        hi = int(ticket.rating + window) // RATING_BUCKET
+        if hi - lo + 1 > len(self.buckets):
+            keys = [k for k in self.buckets if lo <= k <= hi]
+        else:
+            keys = [k for k in range(lo, hi + 1) if k in self.buckets]
+
+        best = None
+        for key in keys:
+            for other in self.buckets[key].values():
+                if other is ticket:
+                    continue
+                if abs(other.rating - ticket.rating) <= min(window, other.window(now)):
+                    if best is None or other.queued < best.queued:
+                        best = other
+                    break  # Дальше в корзине - пришедшие позже
+        return best
+
+
+class Matchmaker:
+    def __init__(self, registry=REGISTRY, clock=time.monotonic):
+        self.queues = {}  # {game_id: MatchQueue}
+        self.tickets = {}  # {writer: Ticket}
+        self.registry = registry
+        self.clock = clock
+
+    def enqueue(self, writer, game_id, rating=None):
+        """В очередь game_id. Если соперник уже ждет - убирает обоих и возвращает его Ticket"""
+        self.cancel(writer)
+        now = self.clock()
+        ticket = Ticket(writer, game_id, DEFAULT_RATING if rating is None else rating, now)
+        queue = self.queues.setdefault(game_id, MatchQueue())
+
+        opponent = queue.find(ticket, now)
+        if opponent is None:
+            queue.add(ticket)
+            self.tickets[writer] = ticket
+            self._update(game_id)
+            return None
+
+        self._take(opponent, now)
+        self._matched(ticket, now)
+        return opponent
+
+    def cancel(self, writer):
+        """Убрать из очереди; False, если игрок не ждал"""
+        ticket = self.tickets.pop(writer, None)
+        if ticket is None:
+            return False
+        self.queues[ticket.game_id].remove(ticket)
+        self._update(ticket.game_id)
+        return True
+
+    def sweep(self):
+        """Повторный поиск с расширившимися окнами; список пар (давний, новый)"""
+        now = self.clock()
+        pairs = []
+        for queue in self.queues.values():
+            for ticket in queue.tickets():
+                if self.tickets.get(ticket.writer) is not ticket:
+                    continue  # Уже в паре на этом проходе
+                opponent = queue.find(ticket, now)
+                if opponent is not None:
+                    self._take(ticket, now)
+                    self._take(opponent, now)
+                    pairs.append((ticket, opponent) if ticket.queued <= opponent.queued else (opponent, ticket))
+        return pairs
+
+    def _take(self, ticket, now):
+        del self.tickets[ticket.writer]
+        self.queues[ticket.game_id].remove(ticket)
+        self._matched(ticket, now)
+
+    def _matched(self, ticket, now):
+        game_id = ticket.game_id
+        self.registry.histogram("matchmaking_wait_seconds", WAIT_BUCKETS, game=game_id).observe(now - ticket.queued)
+        self.registry.counter("matchmaking_matched_total", game=game_id).inc()
+        self._update(game_id)
+
+    def _update(self, game_id):
+        self.registry.gauge("matchmaking_queued", game=game_id).set(self.queues[game_id].size)
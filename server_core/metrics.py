@@ -0,0 +1,152 @@
+"""
+Метрики сервера: счетчики, значения и гистограммы в одном реестре.
+
+Метрика определяется именем и метками (например, lobby="a1b2c3d4").
+Реестр отдается в текстовом формате Prometheus по HTTP (serve_metrics)
+и как dict (snapshot) для логов и инструментов.
+"""
+import asyncio
+import bisect
+
+# Границы корзин гистограмм времени, секунды
+TIME_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+
+class Histogram:
+    """Число наблюдений по корзинам: counts[i] - значения <= buckets[i], последняя - остальные"""
+    kind = "histogram"
+
+    def __init__(self, buckets=TIME_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Оценка квантиля сверху: граница корзины, в которую он попал"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}  # {(имя, метки): метрика}
+
+    def _get(self, cls, name, labels, *args):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self.metrics.get(key)
+        if metric is None:
+            metric = self.metrics[key] = cls(*args)
+        return metric
+
+    def counter(self, name, **labels):
+        return self._get(Counter, name, labels)
+
+    def gauge(self, name, **labels):
+        return self._get(Gauge, name, labels)
+
+    def histogram(self, name, buckets=TIME_BUCKETS, **labels):
+        return self._get(Histogram, name, labels, buckets)
+
+    def remove(self, name, **labels):
+        """Убрать метрику (например, лобби закрылось)"""
+        self.metrics.pop((name, tuple(sorted(labels.items()))), None)
+
+    def snapshot(self):
+        result = {}
+        for (name, labels), metric in sorted(self.metrics.items()):
+            key = name + _format_labels(labels)
+            if metric.kind == "histogram":
+                result[key] = {"count": metric.count, "sum": metric.sum, "max": metric.max,
+                               "p50": metric.quantile(0.5), "p99": metric.quantile(0.99)}
+            else:
+                result[key] = metric.value
+        return result
+
+    def render(self):
+        """Текстовый формат Prometheus"""
+        lines, typed = [], set()
+        for (name, labels), metric in sorted(self.metrics.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} {metric.kind}")
+                typed.add(name)
+            if metric.kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+                continue
+            seen = 0
+            for bound, n in zip(metric.buckets + ("+Inf",), metric.counts):
+                seen += n
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {seen}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {metric.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+REGISTRY = Registry()
+
+
+async def serve_metrics(host, port, registry=REGISTRY):
+    """Минимальный HTTP-сервер: любой GET отдает registry.render()"""
+
+    async def handle(reader, writer):
+        try:
+            # Заголовки запроса не нужны - дочитываем до пустой строки
+            while (await reader.readline()).strip():
+                pass
+            body = registry.render().encode("utf-8")
+            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,63 @@
+"""
+Ограничение частоты сообщений одного соединения: ведро токенов на
+соединение целиком ("*") и на отдельные типы сообщений.
+
+Общее ведро проверяется до чтения сообщения (без токена соединение не
+читается, и клиент упирается в TCP), ведро типа - после разбора. Ведро: rate токенов в секунду,
+не больше burst подряд. Отказы считаются в rate_limited_total{type}.
+"""
+import time
+
+from server_core.metrics import REGISTRY
+
+ANY = "*"
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = now
+
+    def take(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait(self):
+        """Через сколько секунд появится токен (после неудачного take)"""
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Ведра одного соединения; limits - {тип или ANY: (rate, burst)}"""
+
+    def __init__(self, limits, clock=time.monotonic, registry=REGISTRY):
+        self.limits = limits
+        self.clock = clock
+        self.registry = registry
+        self.buckets = {}
+
+    def allow(self, ctype=ANY):
+        limit = self.limits.get(ctype)
+        if limit is None:
+            return True
+        now = self.clock()
+        bucket = self.buckets.get(ctype)
+        if bucket is None:
+            bucket = self.buckets[ctype] = TokenBucket(*limit, now)
+        if bucket.take(now):
+            return True
+        self.registry.counter("rate_limited_total", type=ctype).inc()
+        return False
+
+    def wait(self, ctype=ANY):
+        """Секунд до следующего токена типа ctype"""
+        bucket = self.buckets.get(ctype)
+        return bucket.wait() if bucket else 0.0
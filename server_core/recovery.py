@@ -0,0 +1,82 @@
+"""
+Восстановление лобби из журнала после перезапуска сервера.
+
+rebuild(records) проигрывает записи журнала и возвращает образы живых
+лобби - простые dict, из которых server.py собирает Lobby. Игроки в
+образе - это сессии (токены, которые клиент присылает в login), потому
+что соединений после перезапуска еще нет. До возвращения игрока его
+место в лобби занимает Detached.
+
+Сессии в журнале - ключи (auth.session_key), а не сами токены, пароль -
+соленый хеш (auth.hash_password).
+
+Записи ("e" - вид события):
+    open    lobby, name, host, private, password, seed (генератора лобби)
+    join    lobby, session, name, id
+    leave   lobby, session
+    close   lobby
+    select  lobby, game
+    start   lobby, game, colors {сессия: цвет}
+    move    lobby, m, clock [у белых, у черных] или null
+    end     lobby
+    lobby   полный образ (снимок при сжатии журнала)
+"""
+
+
+class Detached:
+    """Место игрока, который еще не переподключился: стоит вместо writer"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def is_closing(self):
+        return True  # send_json такому месту ничего не пишет
+
+    def __repr__(self):
+        return f"Detached({self.session[:8]})"
+
+
+def new_image(lobby_id, name, host, private, password):
+    return {"id": lobby_id, "name": name, "host": host, "private": private, "password": password,
+            "game": None, "seats": {}, "started": False, "colors": {}, "state": None, "moves": [], "clock": None,
+            "seed": None}
+
+
+def rebuild(records):
+    """{lobby_id: образ} для лобби, которые не были закрыты"""
+    lobbies = {}
+    for r in records:
+        event, lid = r.get("e"), r.get("lobby")
+        if event == "lobby":
+            image = new_image(lid, r["name"], r["host"], r["private"], r["password"])
+            image.update({k: r[k] for k in image if k in r})
+            lobbies[lid] = image
+            continue
+        if event == "open":
+            lobbies[lid] = new_image(lid, r["name"], r["host"], r["private"], r["password"])
+            lobbies[lid]["seed"] = r.get("seed")
+            continue
+
+        image = lobbies.get(lid)
+        if image is None:
+            continue
+        if event == "join":
+            image["seats"][r["session"]] = {"name": r["name"], "id": r["id"]}
+        elif event == "leave":
+            image["seats"].pop(r["session"], None)
+            image["colors"].pop(r["session"], None)
+        elif event == "close":
+            del lobbies[lid]
+        elif event == "select":
+            image["game"] = r["game"]
+        elif event == "start":
+            image.update(game=r["game"], started=True, colors=r["colors"], state=None, moves=[], clock=None)
+        elif event == "move":
+            image["moves"].append(r["m"])
+            image["clock"] = r.get("clock")
+        elif event == "end":
+            # Партия закончилась - после перезапуска игроки вернутся в комнату
+            image.update(started=False, state=None, moves=[], clock=None)
+
+    # Без хоста лобби не живет (как в leave_lobby)
+    return {lid: image for lid, image in lobbies.items() if image["host"] in image["seats"]}
@@ -0,0 +1,142 @@
+"""
+Судья на сервере: проверяет каждый ход по правилам игры до пересылки.
+
+Состояние партии хранится компактным снимком (to_bytes логики), а
+проверка хода - чистая функция validate_move(снимок, ход) -> новый
+снимок. Поэтому дорогие правила (шахматы, шашки) проверяются в пуле
+процессов и не задерживают цикл событий, а дешевые - прямо на месте.
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from games.chess.logic import ChessLogic
+from games.checkers.logic import CheckersLogic
+from games.tic_tac_toe.logic import TicTacToeLogic
+from server_core.metrics import REGISTRY
+
+# game_id -> (класс логики, аргументы конструктора)
+LOGICS = {
+    "chess": (ChessLogic, ()),
+    "checkers": (CheckersLogic, ()),
+    "tic_tac_toe": (TicTacToeLogic, (3, 3, 3)),
+    "gomoku": (TicTacToeLogic, (15, 15, 5)),
+}
+POOLED_GAMES = {"chess", "checkers"}  # Проверка дороже пересылки через процесс
+REFEREE_WORKERS = 2
+
+# Цвет игрока в крестиках-ноликах: X ходит первым, как белые
+TURN_COLORS = {'white': 'white', 'black': 'black', 'X': 'white', 'O': 'black'}
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        # spawn, а не fork: рабочие процессы не должны наследовать сокеты сервера
+        _pool = ProcessPoolExecutor(max_workers=REFEREE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def warm_up():
+    """Запуск процессов пула заранее, чтобы первый ход не ждал их старта"""
+    get_pool().submit(initial_state, "chess")
+
+
+def shutdown():
+    """Остановить пул: процессы spawn не завершаются сами вместе с сервером"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def initial_state(game_id):
+    cls, args = LOGICS[game_id]
+    return cls(*args).to_bytes()
+
+
+def validate_move(game_id, state, move):
+    """
+    Проверяет и применяет ход к снимку. Возвращает (ok, снимок, чей ход,
+    победитель): ход - 'white' / 'black', победитель - цвет, 'draw' или None.
+    """
+    cls, _ = LOGICS[game_id]
+    logic = cls.from_bytes(state)
+    if logic.game_over:
+        return False, state, None, None
+
+    if cls is TicTacToeLogic:
+        ok = logic.make_move(*move)
+    else:
+        ok = logic.move_piece(*move)
+    if not ok:
+        return False, state, TURN_COLORS[logic.turn], None
+
+    winner = None
+    if logic.game_over:
+        winner = 'draw' if logic.winner == 'Draw' else TURN_COLORS[logic.winner]
+    return True, logic.to_bytes(), TURN_COLORS[logic.turn], winner
+
+
+class Referee:
+    """Судья одной партии в лобби (создается на старте и при рестарте)"""
+
+    def __init__(self, game_id, pooled=None):
+        self.game_id = game_id
+        self.state = initial_state(game_id)
+        self.turn = 'white'
+        self.winner = None
+        self.pooled = game_id in POOLED_GAMES if pooled is None else pooled
+
+        self.validate_time = REGISTRY.histogram("referee_validate_seconds", game=game_id)
+        self.moves = REGISTRY.counter("referee_moves_total", game=game_id)
+        self.rejected = REGISTRY.counter("referee_rejected_total", game=game_id)
+
+    @classmethod
+    def supports(cls, game_id):
+        return game_id in LOGICS
+
+    @classmethod
+    def restore(cls, game_id, state, moves=()):
+        """Судья по снимку и ходам после него (восстановление из журнала)"""
+        referee = cls(game_id)
+        logic = LOGICS[game_id][0].from_bytes(state) if state else None
+        if logic is not None:
+            referee.state = state
+            referee.turn = TURN_COLORS[logic.turn]
+            if logic.game_over:
+                referee.winner = 'draw' if logic.winner == 'Draw' else TURN_COLORS[logic.winner]
+        for move in moves:
+            ok, referee.state, turn, winner = validate_move(game_id, referee.state, move)
+            if ok:
+                referee.turn, referee.winner = turn, winner
+        return referee
+
+    @property
+    def game_over(self):
+        return self.winner is not None
+
+    async def play(self, color, move):
+        """Ход игрока color. Возвращает True, если ход принят (победитель - в self.winner)"""
+        if self.game_over or color != self.turn:
+            self.rejected.inc()
+            return False
+
+        start = time.perf_counter()
+        if self.pooled:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(get_pool(), validate_move, self.game_id, self.state, move)
+        else:
+            result = validate_move(self.game_id, self.state, move)
+        self.validate_time.observe(time.perf_counter() - start)
+
+        ok, state, turn, winner = result
+        if not ok:
+            self.rejected.inc()
+            return False
+        self.moves.inc()
+        self.state, self.turn, self.winner = state, turn, winner
+        return True
@@ -0,0 +1,83 @@
+"""
+Зрители лобби: рассылка одного сообщения сотням соединений.
+
+Сообщение кодируется один раз на формат провода (строка JSON, кадр с
+JSON-телом, кадр с компактным телом), и одни и те же bytes пишутся в
+транспорт каждого зрителя. drain() зрителей не ждем - медленный зритель не
+задерживает игроков. Если у зрителя в буфере записи больше HIGH_WATER
+байт, он отстал: новые сообщения ему не пишутся, а когда буфер опустеет
+ниже LOW_WATER, он получает свежий снимок партии вместо всего
+пропущенного. Так память на зрителя ограничена примерно HIGH_WATER.
+"""
+from core.wire import encode_frame, encode_line
+from server_core.metrics import REGISTRY
+
+HIGH_WATER = 64 * 1024
+LOW_WATER = 8 * 1024
+
+
+def encode_for(data, fmt):
+    """fmt: None - строка JSON, False/True - кадр без/с компактными телами"""
+    return encode_line(data) if fmt is None else encode_frame(data, fmt)
+
+
+class Audience:
+    def __init__(self, registry=REGISTRY):
+        self.watchers = {}  # {writer: [формат провода, отстал ли]}
+        self.total = registry.gauge("spectators")
+        self.sent = registry.counter("spectator_messages_total")
+        self.skipped = registry.counter("spectator_skipped_total")
+        self.resyncs = registry.counter("spectator_resyncs_total")
+
+    def __len__(self):
+        return len(self.watchers)
+
+    def __contains__(self, writer):
+        return writer in self.watchers
+
+    def add(self, writer, fmt):
+        self.watchers[writer] = [fmt, False]
+        self.total.inc()
+
+    def remove(self, writer):
+        if self.watchers.pop(writer, None) is not None:
+            self.total.dec()
+
+    def clear(self):
+        for writer in list(self.watchers):
+            self.remove(writer)
+
+    def broadcast(self, data, snapshot=None):
+        """
+        data - всем зрителям. snapshot() - сообщение с текущим состоянием
+        партии для отставших; если data - ход, снимок его уже содержит.
+        """
+        encoded = {}
+        sync = {}
+        for writer, watcher in list(self.watchers.items()):
+            if writer.is_closing():
+                self.remove(writer)
+                continue
+            fmt, lagging = watcher
+            buffered = writer.transport.get_write_buffer_size()
+
+            if lagging:
+                if buffered > LOW_WATER or snapshot is None:
+                    self.skipped.inc()
+                    continue
+                if fmt not in sync:
+                    sync[fmt] = encode_for(snapshot(), fmt)
+                writer.write(sync[fmt])
+                watcher[1] = False
+                self.resyncs.inc()
+                if data.get("type") == "game_move":
+                    continue
+            elif buffered > HIGH_WATER:
+                watcher[1] = True
+                self.skipped.inc()
+                continue
+
+            if fmt not in encoded:
+                encoded[fmt] = encode_for(data, fmt)
+            writer.write(encoded[fmt])
+            self.sent.inc()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк движков правил всех игр (без Qt).
+
+    python -m tools.bench_engines                 # случайные партии по всем играм
+    python -m tools.bench_engines chess -n 20     # только шахматы
+    python -m tools.bench_engines --script moves.json
+
+Скрипт - JSON {game_id: [[ход, ход, ...], ...]}, ход - список координат,
+например [[6, 4], [4, 4]] для шахмат или [1, 1] для крестиков-ноликов.
+
+Для каждой игры печатает ходов/сек (apply + legal_moves), среднее
+число блоков памяти, которые остаются занятыми после хода (включая
+историю для undo), и пиковую память за партию (tracemalloc).
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from core.engine import load_engines
+
+
+def to_move(value):
+    """JSON-списки -> кортежи, как в legal_moves"""
+    if isinstance(value, list):
+        return tuple(to_move(v) for v in value)
+    return value
+
+
+def random_games(engine_cls, games, max_moves, seed):
+    rng = random.Random(seed)
+    for i in range(games):
+        engine = engine_cls(seed=seed + i)
+        moves = []
+        while not engine.is_terminal() and len(moves) < max_moves:
+            legal = engine.legal_moves()
+            if not legal:
+                break
+            move = rng.choice(legal)
+            engine.apply(move)
+            moves.append(move)
+        yield seed + i, moves
+
+
+def play(engine_cls, seed, moves):
+    """Проигрывает партию; возвращает (ходов, секунд, прирост блоков)"""
+    engine = engine_cls(seed=seed)
+    blocks = 0
+    start = time.perf_counter()
+    for move in moves:
+        engine.legal_moves()
+        before = sys.getallocatedblocks()
+        engine.apply(move)
+        blocks += sys.getallocatedblocks() - before
+    return len(moves), time.perf_counter() - start, blocks
+
+
+def peak_memory(engine_cls, seed, moves):
+    tracemalloc.start()
+    try:
+        engine = engine_cls(seed=seed)
+        for move in moves:
+            engine.legal_moves()
+            engine.apply(move)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench(game_id, engine_cls, games_moves):
+    total_moves = total_time = total_blocks = 0
+    peak = 0
+    gc.disable()
+    try:
+        for seed, moves in games_moves:
+            n, seconds, blocks = play(engine_cls, seed, moves)
+            total_moves += n
+            total_time += seconds
+            total_blocks += blocks
+    finally:
+        gc.enable()
+    for seed, moves in games_moves:
+        peak = max(peak, peak_memory(engine_cls, seed, moves))
+
+    return {
+        "game": game_id,
+        "games": len(games_moves),
+        "moves": total_moves,
+        "moves_per_sec": total_moves / total_time if total_time else 0.0,
+        "blocks_per_move": total_blocks / total_moves if total_moves else 0.0,
+        "peak_kib": peak / 1024,
+    }
+
+
+def main(argv=None):
+    engines = load_engines()
+
+    parser = argparse.ArgumentParser(description="Бенчмарк движков игр")
+    parser.add_argument("games", nargs="*", help="game_id (по умолчанию все)")
+    parser.add_argument("-n", "--count", type=int, default=10, help="партий на игру")
+    parser.add_argument("--max-moves", type=int, default=200, help="ограничение длины партии")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--script", help="JSON со сценариями партий")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    scripted = {}
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            scripted = {gid: [[to_move(m) for m in game] for game in games]
+                        for gid, games in json.load(f).items()}
+
+    selected = args.games or list(scripted or engines)
+    results = []
+    for game_id in selected:
+        if game_id not in engines:
+            parser.error(f"неизвестная игра: {game_id}")
+        engine_cls = engines[game_id]
+        if game_id in scripted:
+            games_moves = [(args.seed, moves) for moves in scripted[game_id]]
+        else:
+            # Ходы генерируем заранее, чтобы в замер не попал выбор случайного хода
+            games_moves = list(random_games(engine_cls, args.count, args.max_moves, args.seed))
+        results.append(bench(game_id, engine_cls, games_moves))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'game':<12} {'games':>5} {'moves':>7} {'moves/s':>10} {'blocks/move':>12} {'peak KiB':>9}")
+    for r in results:
+        print(f"{r['game']:<12} {r['games']:>5} {r['moves']:>7} {r['moves_per_sec']:>10.0f} "
+              f"{r['blocks_per_move']:>12.1f} {r['peak_kib']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Скорость MCTS по всем играм: плейаутов в секунду из начальной позиции.
+
+    python -m tools.bench_mcts                   # по 1 секунде на игру
+    python -m tools.bench_mcts checkers -t 3 -w 4
+"""
+import argparse
+
+from core.engine import load_engines
+from core.mcts import MCTSPlayer
+
+
+def main(argv=None):
+    engines = load_engines()
+
+    parser = argparse.ArgumentParser(description="Бенчмарк MCTS")
+    parser.add_argument("games", nargs="*", help="game_id (по умолчанию все)")
+    parser.add_argument("-t", "--time", type=float, default=1.0, help="секунд на поиск")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="процессов (корневой параллелизм)")
+    parser.add_argument("--rollout", type=int, default=60, help="лимит длины доигрывания")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{'game':<12} {'playouts':>9} {'seconds':>8} {'playouts/s':>11}  move")
+    for game_id in args.games or list(engines):
+        if game_id not in engines:
+            parser.error(f"неизвестная игра: {game_id}")
+        engine = engines[game_id](seed=args.seed)
+        player = MCTSPlayer(time_limit=args.time, workers=args.workers,
+                            rollout_limit=args.rollout, seed=args.seed)
+        move = player.choose(engine)
+        print(f"{game_id:<12} {player.playouts:>9} {player.elapsed:>8.2f} {player.playouts_per_sec:>11.0f}  {move}")
+
+
+if __name__ == "__main__":
+    main()
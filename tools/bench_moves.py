@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк разбора ходов из сообщений game_move.
+
+    python -m tools.bench_moves               # все игры с ходами
+    python -m tools.bench_moves chess -n 50
+
+Сравнивает старый формат {"data": "r1,c1:r2,c2"} (parse_legacy) с новым
+{"m": int} (decode_move): размер сообщения в байтах и время на сообщение,
+включая json.loads. Плюс доля отброшенных испорченных сообщений.
+"""
+import argparse
+import json
+import random
+import time
+
+from core.engine import load_engines
+from core.moves import MOVE_FORMATS, encode_move, message_move
+from tools.bench_engines import random_games
+
+# Испорченные сообщения: должны отбрасываться без исключений
+MALFORMED = [
+    {"type": "game_move"},
+    {"type": "game_move", "m": -1},
+    {"type": "game_move", "m": 1 << 20},
+    {"type": "game_move", "m": "12"},
+    {"type": "game_move", "m": 1.5},
+    {"type": "game_move", "m": True},
+    {"type": "game_move", "data": "9,9:x,1"},
+    {"type": "game_move", "data": "1,2:"},
+    {"type": "game_move", "data": ",:,"},
+    {"type": "game_move", "data": None},
+    {"type": "game_move", "data": "-1,2"},
+]
+
+
+def legacy_text(game_id, move):
+    if MOVE_FORMATS[game_id][2] == "pair":
+        (r1, c1), (r2, c2) = move
+        return f"{r1},{c1}:{r2},{c2}"
+    return f"{move[0]},{move[1]}"
+
+
+def time_decode(game_id, lines, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            message_move(game_id, json.loads(line))
+    return (time.perf_counter() - start) / (repeat * len(lines))
+
+
+def bench(game_id, moves, repeat):
+    legacy = [json.dumps({"type": "game_move", "data": legacy_text(game_id, m)}).encode() for m in moves]
+    compact = [json.dumps({"type": "game_move", "m": encode_move(game_id, m)}).encode() for m in moves]
+
+    # Проверка: оба формата дают тот же ход
+    mismatches = sum(1 for m, a, b in zip(moves, legacy, compact)
+                     if message_move(game_id, json.loads(a)) != m or message_move(game_id, json.loads(b)) != m)
+    rejected = sum(1 for msg in MALFORMED if message_move(game_id, msg) is None)
+
+    return {
+        "game": game_id,
+        "moves": len(moves),
+        "legacy_bytes": sum(map(len, legacy)) / len(legacy),
+        "compact_bytes": sum(map(len, compact)) / len(compact),
+        "legacy_us": time_decode(game_id, legacy, repeat) * 1e6,
+        "compact_us": time_decode(game_id, compact, repeat) * 1e6,
+        "mismatches": mismatches,
+        "rejected": f"{rejected}/{len(MALFORMED)}",
+    }
+
+
+def main(argv=None):
+    engines = load_engines()
+    games = [g for g in MOVE_FORMATS if g in engines and g != "battleship"]
+
+    parser = argparse.ArgumentParser(description="Бенчмарк кодека ходов")
+    parser.add_argument("games", nargs="*", help=f"game_id (по умолчанию {', '.join(games)})")
+    parser.add_argument("-n", "--count", type=int, default=20, help="партий на игру")
+    parser.add_argument("--repeat", type=int, default=20, help="повторов разбора")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for game_id in args.games or games:
+        if game_id not in engines or game_id not in MOVE_FORMATS:
+            parser.error(f"неизвестная игра: {game_id}")
+        moves = [m for _, game in random_games(engines[game_id], args.count, 200, args.seed) for m in game]
+        random.Random(args.seed).shuffle(moves)
+        results.append(bench(game_id, moves, args.repeat))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'game':<12} {'moves':>6} {'old B':>6} {'new B':>6} {'old us':>7} {'new us':>7} {'bad':>4} {'rejected':>9}")
+    for r in results:
+        print(f"{r['game']:<12} {r['moves']:>6} {r['legacy_bytes']:>6.1f} {r['compact_bytes']:>6.1f} "
+              f"{r['legacy_us']:>7.2f} {r['compact_us']:>7.2f} {r['mismatches']:>4} {r['rejected']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Стоимость проверки хода судьей сервера для каждой игры.
+
+    python -m tools.bench_referee
+    python -m tools.bench_referee chess -n 5 --workers 2
+
+Партии берутся случайные (как в bench_engines). Для каждого хода
+validate_move вызывается прямо в процессе и через пул процессов; печатается
+среднее и p99 в микросекундах. Разница - цена пересылки снимка в процесс,
+которую судья платит за то, чтобы не занимать цикл событий.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core.engine import load_engines
+from server_core.referee import LOGICS, initial_state, validate_move
+from tools.bench_engines import random_games
+
+
+def replay(game_id, games, call):
+    """Проигрывает партии через call(game_id, state, move); возвращает время каждого хода"""
+    times = []
+    for _, moves in games:
+        state = initial_state(game_id)
+        for move in moves:
+            start = time.perf_counter()
+            ok, state, turn, winner = call(game_id, state, move)
+            times.append(time.perf_counter() - start)
+            if not ok:
+                raise AssertionError(f"{game_id}: судья отклонил легальный ход {move}")
+    return times
+
+
+def summary(times):
+    times = sorted(times)
+    return sum(times) / len(times) * 1e6, times[int(len(times) * 0.99)] * 1e6
+
+
+def main(argv=None):
+    engines = load_engines()
+
+    parser = argparse.ArgumentParser(description="Бенчмарк судьи")
+    parser.add_argument("games", nargs="*", help=f"game_id (по умолчанию {', '.join(LOGICS)})")
+    parser.add_argument("-n", "--count", type=int, default=5, help="партий на игру")
+    parser.add_argument("--max-moves", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2, help="процессов в пуле")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        def pooled(game_id, state, move):
+            return pool.submit(validate_move, game_id, state, move).result()
+
+        for game_id in args.games or list(LOGICS):
+            if game_id not in LOGICS:
+                parser.error(f"судья не знает игру: {game_id}")
+            games = list(random_games(engines[game_id], args.count, args.max_moves, args.seed))
+            inline_mean, inline_p99 = summary(replay(game_id, games, validate_move))
+            pool_mean, pool_p99 = summary(replay(game_id, games, pooled))
+            results.append({
+                "game": game_id,
+                "moves": sum(len(moves) for _, moves in games),
+                "inline_us": inline_mean, "inline_p99_us": inline_p99,
+                "pool_us": pool_mean, "pool_p99_us": pool_p99,
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'game':<12} {'moves':>6} {'inline us':>10} {'p99':>8} {'pool us':>9} {'p99':>8}")
+    for r in results:
+        print(f"{r['game']:<12} {r['moves']:>6} {r['inline_us']:>10.1f} {r['inline_p99_us']:>8.1f} "
+              f"{r['pool_us']:>9.1f} {r['pool_p99_us']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
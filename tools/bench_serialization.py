@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк компактных снимков позиций (to_bytes / from_bytes) всех игр.
+
+    python -m tools.bench_serialization               # все игры
+    python -m tools.bench_serialization chess -n 20
+
+Позиции берутся из случайных партий (как в bench_engines). Для каждой
+позиции проверяется, что from_bytes(to_bytes()) дает те же байты, и
+печатаются размер снимка, время кодирования/декодирования и размер
+pickle той же логики для сравнения.
+"""
+import argparse
+import json
+import pickle
+import time
+
+from core.engine import load_engines
+from tools.bench_engines import random_games
+
+
+def collect_logics(engine_cls, games, max_moves, seed):
+    """Копии логик после каждого хода случайных партий"""
+    logics = []
+    for game_seed, moves in random_games(engine_cls, games, max_moves, seed):
+        engine = engine_cls(seed=game_seed)
+        for move in moves:
+            engine.apply(move)
+            # У морского боя две логики (по одной на игрока)
+            for logic in getattr(engine, "sides", None) or [engine.logic]:
+                logics.append(pickle.loads(pickle.dumps(logic)))
+    return logics
+
+
+def bench(game_id, logics):
+    cls = type(logics[0])
+
+    start = time.perf_counter()
+    blobs = [logic.to_bytes() for logic in logics]
+    encode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    restored = [cls.from_bytes(blob) for blob in blobs]
+    decode = time.perf_counter() - start
+
+    mismatches = sum(1 for blob, logic in zip(blobs, restored) if logic.to_bytes() != blob)
+    n = len(logics)
+    return {
+        "game": game_id,
+        "positions": n,
+        "bytes": max(len(blob) for blob in blobs),
+        "pickle_bytes": sum(len(pickle.dumps(logic)) for logic in logics) / n,
+        "encode_us": encode / n * 1e6,
+        "decode_us": decode / n * 1e6,
+        "mismatches": mismatches,
+    }
+
+
+def main(argv=None):
+    engines = load_engines()
+
+    parser = argparse.ArgumentParser(description="Бенчмарк снимков позиций")
+    parser.add_argument("games", nargs="*", help="game_id (по умолчанию все)")
+    parser.add_argument("-n", "--count", type=int, default=10, help="партий на игру")
+    parser.add_argument("--max-moves", type=int, default=200, help="ограничение длины партии")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for game_id in args.games or list(engines):
+        if game_id not in engines:
+            parser.error(f"неизвестная игра: {game_id}")
+        logics = collect_logics(engines[game_id], args.count, args.max_moves, args.seed)
+        results.append(bench(game_id, logics))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'game':<12} {'positions':>9} {'bytes':>6} {'pickle':>7} {'enc us':>7} {'dec us':>7} {'bad':>4}")
+    for r in results:
+        print(f"{r['game']:<12} {r['positions']:>9} {r['bytes']:>6} {r['pickle_bytes']:>7.0f} "
+              f"{r['encode_us']:>7.1f} {r['decode_us']:>7.1f} {r['mismatches']:>4}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Стоимость часов партий: колесо таймеров против asyncio-таймера на каждые часы.
+
+    python -m tools.bench_timers
+    python -m tools.bench_timers -n 100000 --moves 5
+
+Моделируется n одновременных партий: каждые часы ставятся, затем
+--moves раз переставляются (ход - отмена старого таймера и новый) и
+колесо крутится одну секунду. Печатается время на операцию в
+микросекундах и время одного тика колеса со всеми часами.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from server_core.metrics import Registry
+from server_core.timer_wheel import TimerWheel
+
+
+def bench_wheel(count, moves, tick):
+    wheel = TimerWheel(tick=tick, registry=Registry())
+    rng = random.Random(1)
+
+    start = time.perf_counter()
+    timers = [wheel.schedule(rng.uniform(30, 600), print) for _ in range(count)]
+    for _ in range(moves):
+        for i, timer in enumerate(timers):
+            timer.cancel()
+            timers[i] = wheel.schedule(rng.uniform(30, 600), print)
+    schedule_us = (time.perf_counter() - start) / (count * (moves + 1)) * 1e6
+
+    ticks = int(1 / tick)
+    start = time.perf_counter()
+    wheel.advance(wheel.time + ticks * tick)
+    tick_us = (time.perf_counter() - start) / ticks * 1e6
+    return schedule_us, tick_us
+
+
+async def bench_loop(count, moves):
+    loop = asyncio.get_running_loop()
+    rng = random.Random(1)
+
+    start = time.perf_counter()
+    handles = [loop.call_later(rng.uniform(30, 600), print) for _ in range(count)]
+    for _ in range(moves):
+        for i, handle in enumerate(handles):
+            handle.cancel()
+            handles[i] = loop.call_later(rng.uniform(30, 600), print)
+    schedule_us = (time.perf_counter() - start) / (count * (moves + 1)) * 1e6
+
+    # Отмененные таймеры лежат в куче цикла, пока их не вытолкнет перестройка
+    heap = len(loop._scheduled)
+    for handle in handles:
+        handle.cancel()
+    return schedule_us, heap
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк колеса таймеров")
+    parser.add_argument("-n", "--count", type=int, default=100000, help="одновременных часов")
+    parser.add_argument("--moves", type=int, default=5, help="ходов (перестановок) на часы")
+    parser.add_argument("--tick", type=float, default=0.1)
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    wheel_us, tick_us = bench_wheel(args.count, args.moves, args.tick)
+    loop_us, heap = asyncio.run(bench_loop(args.count, args.moves))
+    result = {"clocks": args.count, "wheel_schedule_us": wheel_us, "wheel_tick_us": tick_us,
+              "loop_schedule_us": loop_us, "loop_heap_size": heap}
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"clocks: {args.count}, moves: {args.moves}")
+    print(f"wheel: schedule+cancel {wheel_us:.2f} us, tick {tick_us:.1f} us")
+    print(f"loop:  call_later+cancel {loop_us:.2f} us, heap {heap} handles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк форматов на проводе: JSON по строкам (протокол 1) против кадров
+(протокол 2) с JSON-телом и с компактными телами для частых сообщений.
+
+    python -m tools.bench_wire
+    python -m tools.bench_wire -n 50000 --json
+
+Для каждого вида сообщения печатает размер в байтах и время
+кодирования + декодирования одного сообщения в микросекундах.
+"""
+import argparse
+import json
+import time
+
+from core.wire import HEADER, StreamDecoder, decode_body, encode_frame, encode_line
+
+SAMPLES = {
+    "move": {"type": "game_move", "m": 2356},
+    "shot": {"type": "game_move", "sub_type": "shot", "m": 55},
+    "shot_result": {"type": "game_move", "sub_type": "shot_result", "r": 5, "c": 5, "status": "kill",
+                    "ship_data": {"r": 5, "c": 3, "ori": "h", "size": 3}, "incoming": True},
+    "toggle_ready": {"type": "toggle_ready", "status": True},
+    "chat": {"type": "chat_msg", "sender": "Игрок", "text": "Привет! Сыграем еще?"},
+    "lobby_state": {"type": "lobby_state", "lobby_id": "a1b2c3d4", "name": "Room", "selected_game": "chess",
+                    "players": [{"name": "Игрок 1", "ready": True, "is_host": True, "id": 1},
+                                {"name": "Игрок 2", "ready": False, "is_host": False, "id": 2}],
+                    "am_i_host": False},
+    "lobby_list": {"type": "lobby_list", "lobbies": [
+        {"id": f"{i:08x}", "name": f"Room {i}", "private": i % 3 == 0, "players": 1, "max": 2} for i in range(20)]},
+}
+
+
+def roundtrip_line(data, count):
+    decoder = StreamDecoder()
+    start = time.perf_counter()
+    for _ in range(count):
+        decoder.feed(encode_line(data))
+        decoder.next_message()
+    return (time.perf_counter() - start) / count
+
+
+def roundtrip_frame(data, count, compact):
+    start = time.perf_counter()
+    for _ in range(count):
+        raw = encode_frame(data, compact)
+        length, kind = HEADER.unpack_from(raw)
+        decode_body(kind, raw[HEADER.size:])
+    return (time.perf_counter() - start) / count
+
+
+def bench(name, data, count):
+    compact = encode_frame(data)
+    # Проверка, что компактное тело разбирается в то же сообщение
+    length, kind = HEADER.unpack_from(compact)
+    assert decode_body(kind, compact[HEADER.size:]) == data, name
+
+    return {
+        "message": name,
+        "line_bytes": len(encode_line(data)),
+        "frame_json_bytes": len(encode_frame(data, compact=False)),
+        "frame_compact_bytes": len(compact),
+        "line_us": roundtrip_line(data, count) * 1e6,
+        "frame_json_us": roundtrip_frame(data, count, False) * 1e6,
+        "frame_compact_us": roundtrip_frame(data, count, True) * 1e6,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк кодеков протокола")
+    parser.add_argument("messages", nargs="*", help=f"виды сообщений ({', '.join(SAMPLES)})")
+    parser.add_argument("-n", "--count", type=int, default=20000, help="повторов на сообщение")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.messages or SAMPLES:
+        if name not in SAMPLES:
+            parser.error(f"неизвестное сообщение: {name}")
+        results.append(bench(name, SAMPLES[name], args.count))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'message':<13} {'line B':>7} {'frame B':>8} {'compact B':>10} "
+          f"{'line us':>8} {'frame us':>9} {'compact us':>11}")
+    for r in results:
+        print(f"{r['message']:<13} {r['line_bytes']:>7} {r['frame_json_bytes']:>8} {r['frame_compact_bytes']:>10} "
+              f"{r['line_us']:>8.2f} {r['frame_json_us']:>9.2f} {r['frame_compact_us']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
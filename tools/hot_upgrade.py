@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Проверка обновления сервера без остановки (Linux): партии под нагрузкой
+переживают замену процесса.
+
+    python -m tools.hot_upgrade
+    python -m tools.hot_upgrade --pairs 100 --games 10 --upgrades 3
+
+Запускает server.py, пары ботов играют в крестики-нолики через быструю
+игру (ходы с паузой --move-delay), а каждые --interval секунд запускается
+server.py --takeover - новый процесс забирает лобби и сокеты у старого.
+Журнал серверы ведут во временной папке, которая удаляется после прогона.
+Замены проходят все, даже если партии кончились раньше последней.
+В конце печатается, сколько партий доиграно, сколько соединений
+оборвалось и сколько ходов сервер отклонил; код выхода 1, если хоть одна
+партия потеряна или старый процесс не вышел сам.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from core.moves import encode_move
+from tools.load_harness import Bot, percentiles
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Белые выигрывают третьим ходом: клетки не пересекаются, все ходы законны
+WHITE_MOVES = [(0, 0), (0, 1), (0, 2)]
+BLACK_MOVES = [(1, 0), (1, 1)]
+
+
+def start_server(*args):
+    """server.py с аргументами; лог на консоль не нужен, а stderr (трассировка упавшего процесса) - наш"""
+    return subprocess.Popen([sys.executable, "server.py", "--quiet", *args], cwd=ROOT, stdout=subprocess.DEVNULL)
+
+
+async def wait_port(host, port, timeout=15):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def play_one(bot, args, results):
+    """Одна партия от очереди до game_over; после нее бот выходит из лобби"""
+    await bot.send({"type": "quick_match", "game_id": "tic_tac_toe"})
+    found = await bot.recv({"match_found"}, args.timeout)
+    if found["role"] == "picker":
+        await bot.send({"type": "coin_choice", "choice": "heads"})
+    coin = await bot.recv({"coin_result"}, args.timeout)
+    if coin["win"]:
+        await bot.send({"type": "order_choice", "choice": "first"})
+    start = await bot.recv({"start_game"}, args.timeout)
+
+    moves = list(WHITE_MOVES if start["color"] == "white" else BLACK_MOVES)
+    if start["color"] == "white":
+        await asyncio.sleep(args.move_delay)
+        await bot.send({"type": "game_move", "m": encode_move("tic_tac_toe", moves.pop(0))})
+    while True:
+        sent = time.perf_counter()
+        data = await bot.recv({"game_move", "game_over", "resync"}, args.timeout)
+        results["waits"].append(time.perf_counter() - sent)
+        if data["type"] == "game_over":
+            break
+        if data["type"] == "resync":
+            results["rejected"] += 1
+            break
+        if moves:  # Черным после победного хода белых ходить уже некуда - ждем game_over
+            await asyncio.sleep(args.move_delay)
+            await bot.send({"type": "game_move", "m": encode_move("tic_tac_toe", moves.pop(0))})
+
+    await bot.send({"type": "leave_lobby"})
+    await bot.recv({"left_lobby_success", "kicked"}, args.timeout)
+
+
+async def player(i, args, results):
+    bot = await Bot.connect(args.host, args.port, f"bot{i}")
+    try:
+        for _ in range(args.games):
+            await play_one(bot, args, results)
+            results["finished"] += 1
+    except (asyncio.TimeoutError, ConnectionError, OSError):
+        results["dropped"] += 1
+    finally:
+        bot.close()
+
+
+async def upgrade(args, servers, results, journal):
+    """Раз в --interval секунд новый процесс забирает сервер у текущего"""
+    for _ in range(args.upgrades):
+        await asyncio.sleep(args.interval)
+        old = servers[-1]
+        started = time.perf_counter()
+        servers.append(start_server("--takeover", "--port", str(args.port), "--journal", journal))
+        try:
+            code = await asyncio.wait_for(asyncio.to_thread(old.wait), args.timeout)
+        except asyncio.TimeoutError:
+            code = None
+        results["upgrades"].append({"seconds": time.perf_counter() - started, "old_exit": code})
+
+
+async def run(args, journal):
+    results = {"finished": 0, "dropped": 0, "rejected": 0, "waits": [], "upgrades": []}
+    servers = [start_server("--port", str(args.port), "--journal", journal)]
+    try:
+        await wait_port(args.host, args.port)
+        players = [asyncio.create_task(player(i, args, results)) for i in range(args.pairs * 2)]
+        upgrader = asyncio.create_task(upgrade(args, servers, results, journal))
+        await asyncio.gather(*players)
+        # Партии могли кончиться раньше последней замены - дожидаемся ее, а не обрываем
+        await upgrader
+    finally:
+        for server in servers:
+            if server.poll() is None:
+                server.terminate()
+                server.wait()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Обновление сервера под нагрузкой")
+    parser.add_argument("--pairs", type=int, default=50, help="пар ботов")
+    parser.add_argument("--games", type=int, default=10, help="партий на бота")
+    parser.add_argument("--upgrades", type=int, default=2, help="сколько раз заменить процесс")
+    parser.add_argument("--interval", type=float, default=3, help="секунд между заменами")
+    parser.add_argument("--move-delay", type=float, default=0.1, help="пауза перед ходом, сек")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as journal_dir:
+        results = asyncio.run(run(args, os.path.join(journal_dir, "journal")))
+    expected = args.pairs * 2 * args.games
+    report = {"games_expected": expected // 2, "games_finished": results["finished"] // 2,
+              "dropped": results["dropped"], "rejected": results["rejected"],
+              "upgrades": results["upgrades"], "message_wait": percentiles(results["waits"])}
+    ok = (results["finished"] == expected and not results["rejected"]
+          and len(results["upgrades"]) == args.upgrades
+          and all(u["old_exit"] == 0 for u in results["upgrades"]))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"games {report['games_finished']}/{report['games_expected']}, "
+              f"dropped {report['dropped']}, rejected {report['rejected']}")
+        for u in report["upgrades"]:
+            print(f"upgrade {u['seconds'] * 1000:8.1f}ms, old process exit {u['old_exit']}")
+        p = report["message_wait"]
+        if p:
+            print("message wait   " + " ".join(f"{k} {v * 1000:8.1f}ms" for k, v in p.items()))
+        print("OK" if ok else "FAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
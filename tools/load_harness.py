@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный стенд: много ботов-клиентов против запущенного сервера.
+
+    python server.py &
+    python -m tools.load_harness quick_match -n 200 --rate 50
+    python -m tools.load_harness quick_match -n 1000 --games chess,checkers --ratings 800:2200
+    python -m tools.load_harness flood -n 50 --rate 100 --hold 10 --metrics 5556
+
+Сценарий quick_match: боты приходят пуассоновским потоком (--rate в секунду),
+встают в очередь быстрой игры со случайным рейтингом, проходят монетку и
+ждут start_game. Печатаются перцентили времени до пары (match_found) и до
+старта партии, а с --metrics - то же по гистограмме сервера.
+
+Сценарий flood: боты создают лобби и --hold секунд шлют пачками chat_msg,
+game_emote и toggle_ready (плюс одну строку длиннее лимита сервера).
+Каждый десятый бот - зонд: ведет себя прилично и раз в полсекунды меряет
+clock_sync. Печатается время ответа зондам под флудом, а с --metrics -
+счетчики отброшенных сервером сообщений.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import urllib.request
+
+from core.wire import decode_json, encode_line
+
+
+class Bot:
+    """Клиент на JSON по строкам (протокол 1)"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port, name):
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+        bot = cls(reader, writer)
+        await bot.send({"type": "login", "name": name})
+        return bot
+
+    async def send(self, data):
+        self.writer.write(encode_line(data))
+        await self.writer.drain()
+
+    async def recv(self, types, timeout):
+        """Следующее сообщение одного из типов types (остальные пропускаются)"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            raw = await asyncio.wait_for(self.reader.readline(), deadline - time.perf_counter())
+            if not raw:
+                raise ConnectionError("сервер закрыл соединение")
+            data = decode_json(raw)
+            if data and data.get("type") in types:
+                return data
+
+    def close(self):
+        self.writer.close()
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(len(values) * q))]
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": values[-1]}
+
+
+# --- СЦЕНАРИИ ---
+
+async def quick_match_bot(i, args, rng, results):
+    game_id = rng.choice(args.games)
+    lo, hi = args.ratings
+    try:
+        bot = await Bot.connect(args.host, args.port, f"bot{i}")
+    except OSError:
+        results["errors"] += 1
+        return
+
+    try:
+        start = time.perf_counter()
+        await bot.send({"type": "quick_match", "game_id": game_id, "rating": rng.randint(lo, hi)})
+        found = await bot.recv({"match_found"}, args.timeout)
+        results["match"].append(time.perf_counter() - start)
+
+        if found["role"] == "picker":
+            await bot.send({"type": "coin_choice", "choice": rng.choice(["heads", "tails"])})
+        coin = await bot.recv({"coin_result"}, args.timeout)
+        if coin["win"]:
+            await bot.send({"type": "order_choice", "choice": "first"})
+        await bot.recv({"start_game"}, args.timeout)
+        results["start"].append(time.perf_counter() - start)
+
+        await asyncio.sleep(args.hold)
+    except (asyncio.TimeoutError, ConnectionError):
+        results["timeouts"] += 1
+    finally:
+        bot.close()
+
+
+FLOOD_BATCH = 100  # Сообщений в одной пачке флудера
+FLOOD_MESSAGES = [encode_line(data) for data in (
+    {"type": "chat_msg", "text": "спам"},
+    {"type": "game_emote", "emoji": "👍"},
+    {"type": "toggle_ready", "status": True},
+    {"type": "toggle_ready", "status": False},
+)]
+
+
+async def flood_bot(i, args, rng, results):
+    try:
+        bot = await Bot.connect(args.host, args.port, f"bot{i}")
+    except OSError:
+        results["errors"] += 1
+        return
+
+    try:
+        if i % 10 == 0:
+            await probe(bot, args, results)
+        else:
+            await flood(bot, args, rng, results)
+    except (asyncio.TimeoutError, ConnectionError):
+        results["timeouts"] += 1
+    finally:
+        bot.close()
+
+
+async def probe(bot, args, results):
+    deadline = time.perf_counter() + args.hold
+    while time.perf_counter() < deadline:
+        sent = time.perf_counter()
+        await bot.send({"type": "clock_sync", "t0": sent})
+        await bot.recv({"clock_sync"}, args.timeout)
+        results["rtt"].append(time.perf_counter() - sent)
+        await asyncio.sleep(0.5)
+
+
+async def flood(bot, args, rng, results):
+    await bot.send({"type": "create_lobby", "name": "flood"})
+    await bot.recv({"lobby_state"}, args.timeout)
+    # Ответы (ошибки, lobby_state) читаем, иначе сервер упрется в полный сокет
+    reader = asyncio.create_task(bot.recv(set(), args.hold + args.timeout))
+    try:
+        bot.writer.write(b"x" * (1 << 15) + b"\n")  # Длиннее лимита строки сервера
+        deadline = time.perf_counter() + args.hold
+        while time.perf_counter() < deadline:
+            bot.writer.write(b"".join(rng.choices(FLOOD_MESSAGES, k=FLOOD_BATCH)))
+            await bot.writer.drain()
+            results["sent"] += FLOOD_BATCH
+            await asyncio.sleep(0.01)
+    finally:
+        reader.cancel()
+        try:
+            await reader  # Сервер закрыл соединение - здесь всплывет ConnectionError
+        except asyncio.CancelledError:
+            pass
+
+
+SCENARIOS = {"quick_match": quick_match_bot, "flood": flood_bot}
+METRICS = {"quick_match": ("matchmaking_",),
+           "flood": ("rate_limited_total", "oversized_messages_total", "ready_coalesced_total")}
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    results = {"match": [], "start": [], "rtt": [], "sent": 0, "timeouts": 0, "errors": 0}
+    scenario = SCENARIOS[args.scenario]
+
+    tasks = []
+    started = time.perf_counter()
+    for i in range(args.count):
+        tasks.append(asyncio.create_task(scenario(i, args, random.Random(rng.random()), results)))
+        await asyncio.sleep(rng.expovariate(args.rate))
+    await asyncio.gather(*tasks)
+    results["elapsed"] = time.perf_counter() - started
+    return results
+
+
+def fetch_metrics(host, port, prefixes):
+    with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as response:
+        text = response.read().decode("utf-8")
+    return [line for line in text.splitlines() if line.startswith(prefixes)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный стенд сервера")
+    parser.add_argument("scenario", choices=list(SCENARIOS))
+    parser.add_argument("-n", "--count", type=int, default=200, help="ботов")
+    parser.add_argument("--rate", type=float, default=50, help="новых ботов в секунду")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--games", type=lambda s: s.split(","), default=["chess", "checkers", "tic_tac_toe"])
+    parser.add_argument("--ratings", type=lambda s: tuple(map(int, s.split(":"))), default=(800, 2000),
+                        help="диапазон рейтингов, мин:макс")
+    parser.add_argument("--timeout", type=float, default=60, help="сколько бот ждет пару, сек")
+    parser.add_argument("--hold", type=float, default=0, help="сколько бот остается в партии, сек")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--metrics", type=int, metavar="PORT", help="порт метрик сервера (5556)")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    report = {"bots": args.count, "elapsed": results["elapsed"],
+              "timeouts": results["timeouts"], "errors": results["errors"],
+              "time_to_match": percentiles(results["match"]), "time_to_start": percentiles(results["start"]),
+              "flood_sent": results["sent"], "probe_rtt": percentiles(results["rtt"])}
+    if args.metrics:
+        report["server"] = fetch_metrics(args.host, args.metrics, METRICS[args.scenario])
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"bots {args.count}, elapsed {report['elapsed']:.1f}s, "
+          f"timeouts {report['timeouts']}, errors {report['errors']}")
+    if report["flood_sent"]:
+        print(f"flood messages sent {report['flood_sent']}")
+    for name in ("time_to_match", "time_to_start", "probe_rtt"):
+        p = report[name]
+        if p:
+            print(f"{name:<14} " + " ".join(f"{k} {v * 1000:8.1f}ms" for k, v in p.items()))
+    for line in report.get("server", []):
+        if "_bucket" not in line:
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Воспроизведение записи трафика (server.py --record) на свежем сервере.
+
+    python server.py --record capture.bin        # записываем
+    python -m tools.replay capture.bin           # в темпе записи
+    python -m tools.replay capture.bin --fast --metrics 5556
+    python -m tools.replay capture.bin --no-server --port 5560
+
+Запускает server.py с seed из записи и пустым журналом во временной
+папке (монетка, выбор бросающего и номера лобби выпадут как в записи),
+открывает соединения и шлет сообщения клиентов байт в байт в их моменты
+времени, а с --fast - без пауз, насколько сервер успевает. Ответы
+сервера читаются и отбрасываются. В конце печатается, сколько сообщений
+ушло и за сколько сервер их разобрал, а с --metrics - время обработки
+акторов и задержка цикла событий.
+
+Порядок сообщений одного соединения сохраняется точно. Между разными
+соединениями при смене соединения выдерживается пауза --order-gap: без
+нее ответ клиента, посланный в записи через доли миллисекунды после
+чужого сообщения, может дойти до сервера раньше него. С --fast пауз нет,
+и такие гонки могут разрешиться иначе, чем в записи. Монетку это не
+сдвигает: у каждого лобби свой генератор, и чужие партии его не трогают.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from server_core.capture import OPEN, DATA, CLOSE, read
+from tools.hot_upgrade import start_server, wait_port
+from tools.load_harness import fetch_metrics
+
+METRICS = ("actor_process_seconds", "actor_wait_seconds", "actor_messages_total", "loop_lag_seconds",
+           "loop_stalls_total", "rate_limited_total", "referee_rejected_total")
+WRITE_BUFFER = 256 * 1024  # Столько неотправленного на соединение - ждем drain
+
+
+async def drain(reader, results):
+    """Ответы сервера: считаем и выбрасываем, пока он не закроет соединение"""
+    try:
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return
+            results["bytes_out"] += len(chunk)
+    except ConnectionError:
+        results["errors"] += 1
+
+
+async def replay(args, records):
+    results = {"connections": 0, "messages": 0, "bytes_in": 0, "bytes_out": 0, "errors": 0, "missing": 0}
+    writers, readers = {}, []
+    last_conn, shift = None, 0.0
+    started = time.perf_counter()
+    for at, conn, event, body in records:
+        if not args.fast:
+            delay = at + shift - (time.perf_counter() - started)
+            if conn != last_conn and delay < args.order_gap:
+                # Соседние сообщения разных соединений часто причина и следствие (ответ пришел -
+                # клиент ответил): даем серверу разобрать первое, сдвигая остаток записи
+                shift += args.order_gap - delay
+                delay = args.order_gap
+            if delay > 0:
+                await asyncio.sleep(delay)
+            last_conn = conn
+
+        if event == OPEN:
+            reader, writer = await asyncio.open_connection(args.host, args.port, limit=1 << 20)
+            writers[conn] = writer
+            readers.append(asyncio.create_task(drain(reader, results)))
+            results["connections"] += 1
+        elif event == DATA:
+            writer = writers.get(conn)
+            if writer is None or writer.is_closing():
+                results["missing"] += 1  # Соединение открыто до начала записи или закрыто сервером
+                continue
+            writer.write(body)
+            results["messages"] += 1
+            results["bytes_in"] += len(body)
+            if writer.transport.get_write_buffer_size() > WRITE_BUFFER:
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    results["errors"] += 1
+        elif event == CLOSE:
+            writer = writers.pop(conn, None)
+            if writer is not None:
+                writer.close()
+    results["sent"] = time.perf_counter() - started
+    results["shift"] = shift
+
+    # Закрытое нами соединение сервер закроет, когда разберет все, что в нем пришло
+    for writer in writers.values():
+        writer.close()
+    await asyncio.gather(*readers)
+    results["elapsed"] = time.perf_counter() - started
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Воспроизведение записи трафика сервера")
+    parser.add_argument("capture", help="файл server.py --record")
+    parser.add_argument("--fast", action="store_true", help="без пауз между сообщениями")
+    parser.add_argument("--order-gap", type=float, default=0.001, metavar="SEC",
+                        help="пауза при смене соединения, чтобы сервер разобрал предыдущее (0 - только время записи)")
+    parser.add_argument("--no-server", action="store_true",
+                        help="не запускать server.py, слать в уже запущенный (seed задайте ему сами)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--metrics", type=int, metavar="PORT", help="порт метрик сервера (5556)")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    header, records = read(args.capture)
+    server = None
+    with tempfile.TemporaryDirectory() as journal_dir:
+        if not args.no_server:
+            server = start_server("--seed", str(header["seed"]), "--port", str(args.port),
+                                  "--journal", os.path.join(journal_dir, "journal"))
+        try:
+            if server:
+                asyncio.run(wait_port(args.host, args.port))
+            results = asyncio.run(replay(args, records))
+            report = {"seed": header["seed"], **results,
+                      "messages_per_second": results["messages"] / results["elapsed"] if results["elapsed"] else 0}
+            if args.metrics:
+                report["server"] = fetch_metrics(args.host, args.metrics, METRICS)
+        finally:
+            if server and server.poll() is None:
+                server.terminate()
+                server.wait()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"seed {report['seed']}, connections {report['connections']}, messages {report['messages']} "
+          f"({report['bytes_in']} B), replies {report['bytes_out']} B")
+    print(f"sent in {report['sent']:.2f}s (behind the capture by {report['shift']:.2f}s), "
+          f"processed in {report['elapsed']:.2f}s, "
+          f"{report['messages_per_second']:.0f} msg/s, errors {report['errors']}, missing {report['missing']}")
+    for line in report.get("server", []):
+        if "_bucket" not in line:
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Сводка трасс задержки ходов (core.latency): перцентили по участкам пути.
+
+    python -m tools.trace_summary ~/.config/onscreener/latency.jsonl
+    python -m tools.trace_summary latency.jsonl --by-game
+    python -m tools.trace_summary a.jsonl b.jsonl --json
+
+Участок считается, если в трассе есть обе его метки. Метки клиентов
+переведены в часы сервера по оценке сдвига из пинга, поэтому uplink и
+downlink несут ошибку оценки (до половины RTT) и бывают отрицательными;
+их сумма и участки внутри одной машины (gui, server, queue, paint) точны.
+"""
+import argparse
+import json
+
+from tools.load_harness import percentiles
+
+# (название, метка начала, метка конца)
+SEGMENTS = [
+    ("gui", "ci", "cs"),  # Клик -> ход ушел в сеть у ходившего
+    ("uplink", "cs", "sr"),
+    ("server", "sr", "ss"),  # Очередь актора, судья, рассылка
+    ("downlink", "ss", "pr"),
+    ("queue", "pr", "pd"),  # Поток сети -> окно соперника
+    ("paint", "pd", "pp"),  # Применение хода и отрисовка
+    ("total", "ci", "pp"),
+    ("network", "cs", "pr"),  # От отправки до приема, без окон
+]
+
+
+def load(paths):
+    traces = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    traces.append(json.loads(line))
+                except ValueError:
+                    continue  # Недописанная строка
+    return traces
+
+
+def summarize(traces):
+    samples = {name: [] for name, _, _ in SEGMENTS}
+    for trace in traces:
+        hops = trace.get("hops") or {}
+        for name, start, end in SEGMENTS:
+            if start in hops and end in hops:
+                samples[name].append(hops[end] - hops[start])
+    return {name: {"count": len(values), **percentiles(values)} for name, values in samples.items()}
+
+
+def print_summary(title, summary):
+    print(title)
+    for name, p in summary.items():
+        if p["count"]:
+            print(f"  {name:<9} n {p['count']:<6} " +
+                  " ".join(f"{k} {p[k] * 1000:8.1f}ms" for k in ("p50", "p90", "p99", "max")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сводка трасс задержки ходов")
+    parser.add_argument("files", nargs="+", help="latency.jsonl")
+    parser.add_argument("--by-game", action="store_true", help="отдельно по каждой игре")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args(argv)
+
+    traces = load(args.files)
+    report = {"all": summarize(traces)}
+    if args.by_game:
+        games = {}
+        for trace in traces:
+            games.setdefault(trace.get("game") or "?", []).append(trace)
+        report.update((game, summarize(group)) for game, group in sorted(games.items()))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"traces {len(traces)}")
+    for title, summary in report.items():
+        print_summary(title, summary)
+
+
+if __name__ == "__main__":
+    main()